@@ -1,36 +1,164 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 from ..models.schemas import ChatRequest
-from ..services.rag import answer_stream
-from ..services.live_retrieval import retrieve_live
+from ..services.rag import answer_tokens, source_links
+from ..services.live_retrieval import RetrievalReport, retrieve_live_async
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
+# Legacy text framing: the answer text, then the sources as a trailer. Kept
+# byte-for-byte as it always was; progress is only sent in NDJSON and SSE.
+SOURCES_MARKER = "\n\nSOURCES_DATA:"
 
-@router.post("/stream")
-def chat_stream(req: ChatRequest):
-    if not req.question.strip():
-        raise HTTPException(status_code=400, detail="Question is required")
+_MEDIA_TYPES = {
+    "text": "text/plain; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def _stream_format(request: Request, requested: Optional[str]) -> str:
+    """`?format=` wins; otherwise the Accept header picks NDJSON or SSE, else legacy text."""
+    if requested:
+        if requested not in _MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unknown stream format: {requested}")
+        return requested
+    accept = request.headers.get("accept", "")
+    if "application/x-ndjson" in accept:
+        return "ndjson"
+    if "text/event-stream" in accept:
+        return "sse"
+    return "text"
+
+
+async def _chat_events(question: str, country: Optional[str]) -> AsyncIterator[dict]:
+    """Retrieval progress as it happens, then sources, answer tokens and done/error.
 
-    logger.warning("CHAT: starting retrieve_live for %r / jurisdiction=%r", req.question, req.country)
+    The first event goes out before any upstream is contacted, so the client
+    (and any proxy idle timer) sees bytes immediately. Sources are sent
+    before the first token, so citations can be rendered while the answer
+    is still being written.
+    """
+    yield {"type": "retrieval_started"}
+
+    events: asyncio.Queue = asyncio.Queue()
+    report = RetrievalReport()
+    retrieval = asyncio.ensure_future(
+        retrieve_live_async(question, jurisdiction=country, max_results=10, report=report, on_event=events.put_nowait)
+    )
+    retrieval.add_done_callback(lambda _task: events.put_nowait(None))
     try:
-        results = retrieve_live(req.question, jurisdiction=req.country, max_results=10)
-        logger.warning("CHAT: retrieve_live returned %d result(s)", len(results))
+        while (event := await events.get()) is not None:
+            yield event
+        results = retrieval.result()
+        logger.warning(
+            "CHAT: retrieve_live returned %d result(s) in %d ms (dropped: %s)",
+            len(results),
+            report.elapsed_ms,
+            report.dropped or "none",
+        )
     except Exception as exc:
         logger.warning("CHAT: retrieve_live raised exception: %s", exc)
         results = []
+    finally:
+        if not retrieval.done():
+            # Client went away mid-retrieval; coalesced callers keep the shared work
+            retrieval.cancel()
+
+    yield {
+        "type": "retrieval_finished",
+        "count": len(results),
+        "elapsed_ms": report.elapsed_ms,
+        "dropped": report.dropped,
+        "coalesced": report.coalesced,
+    }
+    yield {"type": "sources", "sources": source_links(results)}
+
+    try:
+        async for chunk in iterate_in_threadpool(answer_tokens(question, country, results)):
+            yield {"type": "token", "text": chunk}
+    except Exception as exc:
+        logger.error("CHAT: answer generation failed: %s", exc)
+        yield {"type": "error", "message": "Answer generation failed. Please try again."}
+        return
+    yield {"type": "done"}
+
 
-    def generator():
-        for chunk in answer_stream(req.question, req.country, results=results):
-            yield chunk
+async def _text_stream(events: AsyncIterator[dict], count: int) -> AsyncIterator[str]:
+    """Render the events after `retrieval_finished` in the original text/plain framing."""
+    sources: list = []
+    async for event in events:
+        kind = event["type"]
+        if kind == "token":
+            yield event["text"]
+        elif kind == "sources":
+            sources = event["sources"]
+        elif kind == "done":
+            if count:
+                # stdlib json, not orjson: existing clients compare this trailer byte-for-byte
+                yield f"{SOURCES_MARKER}{json.dumps(sources)}"
+        elif kind == "error":
+            # No way to signal an error in plain text; end the stream where it is
+            return
 
+
+async def _text_response(events: AsyncIterator[dict]) -> StreamingResponse:
+    """Legacy clients get no progress, so retrieval finishes before the
+    response starts and `X-Retrieval-Count` can be sent as it used to be."""
+    count = 0
+    async for event in events:
+        if event["type"] == "retrieval_finished":
+            count = event["count"]
+            break
     return StreamingResponse(
-        generator(),
-        media_type="text/plain; charset=utf-8",
-        headers={"X-Retrieval-Count": str(len(results))},
+        _text_stream(events, count),
+        media_type=_MEDIA_TYPES["text"],
+        headers={"X-Retrieval-Count": str(count)},
     )
 
+
+async def _ndjson_stream(events: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    async for event in events:
+        yield orjson.dumps(event, option=orjson.OPT_APPEND_NEWLINE)
+
+
+async def _sse_stream(events: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    async for event in events:
+        yield b"event: " + event["type"].encode() + b"\ndata: " + orjson.dumps(event) + b"\n\n"
+
+
+_ENCODERS = {"ndjson": _ndjson_stream, "sse": _sse_stream}
+
+
+@router.post("/stream")
+async def chat_stream(
+    req: ChatRequest,
+    request: Request,
+    format: Optional[str] = Query(None, description="text (default), ndjson or sse"),
+):
+    if not req.question.strip():
+        raise HTTPException(status_code=400, detail="Question is required")
+
+    stream_format = _stream_format(request, format)
+    logger.warning(
+        "CHAT: starting retrieve_live for %r / jurisdiction=%r (%s)", req.question, req.country, stream_format
+    )
+    events = _chat_events(req.question, req.country)
+    if stream_format == "text":
+        return await _text_response(events)
+    return StreamingResponse(
+        _ENCODERS[stream_format](events),
+        media_type=_MEDIA_TYPES[stream_format],
+        # Ask reverse proxies not to buffer, or the early progress events are held back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
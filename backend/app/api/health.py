@@ -96,11 +96,23 @@ def health_db():
 
 @router.get("/retrieval")
 def health_retrieval():
-    """Diagnostic endpoint: tests each live retrieval source and reports results."""
+    """Diagnostic endpoint: tests each live retrieval source and reports results.
+
+    `breakers` shows the circuit breaker state of every upstream host contacted
+    since startup, read after the probes above have run; `latency` shows the
+    rolling per-source percentiles that drive adaptive timeouts and hedging;
+    `rate_limits` shows remaining quota and queue depth per paced upstream;
+    `ecfr_local` shows the titles loaded into the local eCFR mirror, if any.
+    """
     import os
+    from ..services.circuit_breaker import breaker_states
+    from ..services.ecfr_index import get_ecfr_index
+    from ..services.latency import latency_stats
+    from ..services.rate_limit import rate_limit_stats
     from ..services.live_retrieval import fetch_ecfr, fetch_federal_register, fetch_courtlistener_federal, fetch_uscode
+    from ..services.query_analysis import analyze_query
 
-    test_query = "overtime pay federal law"
+    test_query = analyze_query("overtime pay federal law", "US")
     report = {}
 
     try:
@@ -133,8 +145,28 @@ def health_retrieval():
     except Exception as e:
         report["uscode_govinfo"] = {"status": "error", "error": str(e)}
 
+    ecfr_index = get_ecfr_index()
     total = sum(v.get("results", 0) for v in report.values() if isinstance(v.get("results"), int))
-    return {"total_results": total, "sources": report}
+    return {
+        "total_results": total,
+        "sources": report,
+        "breakers": breaker_states(),
+        "latency": latency_stats(),
+        "rate_limits": rate_limit_stats(),
+        "ecfr_local": ecfr_index.stats() if ecfr_index is not None else None,
+    }
+
+
+@router.get("/cache")
+def health_cache():
+    """Live retrieval result cache: hit/miss/eviction counters per source,
+    plus how many calls joined an identical in-flight retrieval or fetch,
+    and the Federal Register full-text cache."""
+    from ..services.live_retrieval import fr_text_cache_stats
+    from ..services.retrieval_cache import cache_stats
+    from ..services.singleflight import flight_stats
+
+    return {**cache_stats(), "coalesced": flight_stats(), "fr_fulltext": fr_text_cache_stats()}
 
 
 @router.post("/test-fetch")
@@ -157,13 +189,17 @@ def test_fetch_post(body: dict = None):
 @router.get("/retrieval-full")
 def health_retrieval_full():
     """Tests the exact same code path as the chat endpoint — parallel retrieve_live."""
-    from ..services.live_retrieval import retrieve_live
+    from ..services.live_retrieval import RetrievalReport, retrieve_live
     import traceback
 
     try:
-        results = retrieve_live("What are the federal laws for overtime pay?", jurisdiction="US", max_results=7)
+        report = RetrievalReport()
+        results = retrieve_live("What are the federal laws for overtime pay?", jurisdiction="US", max_results=7, report=report)
         return {
             "total_results": len(results),
+            "elapsed_ms": report.elapsed_ms,
+            "sources": report.sources,
+            "dropped": report.dropped,
             "results": [
                 {"citation": r.citation, "source": r.source, "url": r.url}
                 for r in results
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
+from functools import lru_cache
 from typing import Optional
 import os
 
@@ -26,6 +27,9 @@ class Settings(BaseSettings):
     # Data
     db_path: str = Field(default=os.path.join(os.path.dirname(__file__), "..", "data", "app.db"))
     db_url: Optional[str] = Field(default=None, description="Postgres URL; if set, pgvector is used")
+    vector_segments_path: Optional[str] = Field(default=None, description="SQLite mode embedding segment files; defaults to vectors/ next to db_path")
+    vector_search_mode: str = Field(default="exact", description="exact, or ivf once lists are built with `python -m app.services.vector_index train`")
+    ivf_nprobe: int = Field(default=16, description="IVF lists scanned per query; higher raises recall and latency")
 
     # Supabase REST API (preferred over direct DB connection)
     supabase_url: Optional[str] = Field(default=None, description="https://<project-ref>.supabase.co")
@@ -37,10 +41,41 @@ class Settings(BaseSettings):
     # OpenStates (state legislation search)
     openstates_api_key: Optional[str] = Field(default=None, description="API key from openstates.org for state bill/statute search")
 
+    # Live retrieval: persistent upstream response cache (SQLite, shared by workers)
+    response_cache_enabled: bool = Field(default=True)
+    response_cache_path: Optional[str] = Field(default=None, description="Defaults to http_cache.db next to db_path")
+    response_cache_max_mb: int = Field(default=256, description="Size cap; least recently used entries are evicted")
+
+    # Live retrieval: Cornell LII statute pages are pre-fetched and refreshed in the background
+    statute_store_refresh_hours: float = Field(default=24 * 7)
+
+    # Live retrieval: local eCFR mirror built with `python -m app.services.ecfr_index ingest`
+    ecfr_index_path: Optional[str] = Field(default=None, description="Defaults to ecfr.db next to db_path")
+    ecfr_remote_fallback: bool = Field(default=True, description="Search ecfr.gov when the local mirror has no section matching every term")
+
+    # Live retrieval: candidates from every source are reranked before the top results go to the LLM
+    rerank_embeddings: bool = Field(default=False, description="Add OpenAI embedding similarity to the lexical rerank score (one extra API call per question)")
+    near_duplicate_threshold: float = Field(default=0.6, description="Estimated text similarity (0-1) at which a lower-ranked result is dropped as a near-duplicate; 1 disables")
+
+    # Live retrieval: hard cap on time spent gathering sources before the answer starts
+    retrieval_deadline_seconds: float = Field(default=8.0)
+
+    # Live retrieval: outbound pacing for quota-limited upstreams (token bucket per host)
+    courtlistener_requests_per_minute: float = Field(default=80.0, description="CourtListener allows 5,000 requests/hour per token")
+    openstates_requests_per_minute: float = Field(default=60.0)
+    rate_limit_burst: int = Field(default=5)
+    rate_limit_max_wait_seconds: float = Field(default=2.0, description="Longest a request may queue for a slot before it is skipped")
+
     # B2B API key management
     admin_secret: Optional[str] = Field(default=None, description="Secret used to generate B2B API keys via POST /api/apikeys/generate")
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    """The process-wide settings, read from the environment and .env once.
+
+    Every field is fixed at first use. After changing environment variables
+    (e.g. in a test), call `get_settings.cache_clear()` to have them re-read.
+    """
     return Settings()
 
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -8,11 +11,28 @@ from .api.chat import router as chat_router
 from .api.health import router as health_router
 from .api.webhooks import router as webhooks_router
 from .api.apikeys import router as apikeys_router
+from .services import http_client
+from .services.live_retrieval import start_statute_store, stop_statute_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pre-open pooled keep-alive connections to the live retrieval upstreams
+    http_client.warm_up()
+    # Chat retrieval runs on the async clients; warm those too, without holding up startup
+    warm_async = asyncio.create_task(http_client.warm_up_async())
+    # Load Cornell LII statute text from disk and refresh it off the request path
+    start_statute_store()
+    yield
+    warm_async.cancel()
+    stop_statute_store()
+    http_client.close_all()
+    await http_client.aclose_all()
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
-    app = FastAPI(title=settings.app_name)
+    app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import logging
+import math
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows scored against the centroids per matrix product, to bound memory
+_ASSIGN_BATCH = 65536
+# k-means trains on at most this many rows per list
+_SAMPLE_PER_LIST = 64
+
+
+def default_nlist(n_rows: int) -> int:
+    """Inverted lists for `n_rows` vectors: about sqrt(n), so a probe scans ~sqrt(n) rows."""
+    return max(1, min(n_rows, int(round(math.sqrt(n_rows)))))
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (by cosine) of each unit vector, as int32 list numbers."""
+    lists = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _ASSIGN_BATCH):
+        batch = np.asarray(vectors[start:start + _ASSIGN_BATCH], dtype=np.float32)
+        lists[start:start + len(batch)] = (batch @ centroids.T).argmax(axis=1)
+    return lists
+
+
+def train_centroids(sample: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means: `nlist` unit centroids for a sample of unit vectors.
+
+    Starts from randomly chosen sample rows; a list that ends up empty is
+    re-seeded with the row currently farthest from its centroid.
+    """
+    rng = np.random.default_rng(seed)
+    sample = np.asarray(sample, dtype=np.float32)
+    nlist = min(nlist, len(sample))
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for iteration in range(iterations):
+        similarity = sample @ centroids.T
+        lists = similarity.argmax(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, lists, sample)
+        counts = np.bincount(lists, minlength=nlist)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            farthest = np.argsort(similarity[np.arange(len(sample)), lists])[: len(empty)]
+            sums[empty] = sample[farthest]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+        logger.debug("k-means iteration %d: %d empty list(s)", iteration + 1, len(empty))
+    return centroids
+
+
+def sample_size(nlist: int, n_rows: int) -> int:
+    return min(n_rows, nlist * _SAMPLE_PER_LIST)
+
+
+class InvertedLists:
+    """One segment's rows grouped by list: `order` holds row numbers sorted
+    by list and `offsets[l]:offsets[l + 1]` is list `l`'s slice of it."""
+
+    def __init__(self, lists: np.ndarray, nlist: int) -> None:
+        lists = np.asarray(lists)
+        self.order = np.argsort(lists, kind="stable").astype(np.int64)
+        self.offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(lists, minlength=nlist), out=self.offsets[1:])
+
+    def rows(self, probes: np.ndarray) -> np.ndarray:
+        """Row numbers in any of the `probes` lists."""
+        starts, ends = self.offsets[probes], self.offsets[probes + 1]
+        if len(probes) == 1:
+            return self.order[starts[0]:ends[0]]
+        return np.concatenate([self.order[s:e] for s, e in zip(starts, ends)])
+
+
+def recall_at_k(exact: np.ndarray, approximate: np.ndarray) -> float:
+    """Fraction of the exact top-k ids (rows of `exact`) found by the approximate search."""
+    found = sum(len(np.intersect1d(e, a)) for e, a in zip(exact, approximate))
+    total = sum(len(e) for e in exact)
+    return found / total if total else 1.0
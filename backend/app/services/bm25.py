@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "has",
+    "have", "how", "i", "if", "in", "is", "it", "its", "me", "my", "of", "on", "or", "that",
+    "the", "their", "there", "this", "to", "under", "us", "was", "what", "when", "where",
+    "which", "who", "will", "with", "would", "should", "could", "your", "about", "any",
+    "federal", "law", "laws", "legal", "rule", "rules", "state",
+    # Everyday verbs and fillers that carry no legal topic
+    "get", "got", "keep", "kept", "make", "made", "need", "want", "let", "use", "used",
+    "being", "been", "not", "no", "someone", "they", "them", "because", "still", "also",
+})
+
+# Longest first; a suffix is only removed when at least three characters remain.
+_SUFFIXES = ("ations", "ation", "ated", "ates", "ate", "ings", "ing", "ions", "ion", "ed", "s")
+
+
+def _stem(word: str) -> str:
+    if word.endswith("ies") and len(word) > 5:
+        return word[:-3] + "y"
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, stopword-free, lightly stemmed terms of `text`."""
+    return [_stem(t) for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a small fixed corpus, scored with one NumPy reduction.
+
+    The corpus is tokenized once and every term's BM25 weight in every
+    document (idf × saturated, length-normalized tf) is precomputed into a
+    dense vocabulary × documents float32 matrix. Scoring a query is then a
+    gather of its term rows and a column sum, with no per-document Python
+    work; terms outside the vocabulary contribute nothing.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.2, b: float = 0.75) -> None:
+        self._vocab: Dict[str, int] = {}
+        doc_terms = [tokenize(doc) for doc in documents]
+        rows: List[int] = []
+        cols: List[int] = []
+        for doc_idx, terms in enumerate(doc_terms):
+            for term in terms:
+                rows.append(self._vocab.setdefault(term, len(self._vocab)))
+                cols.append(doc_idx)
+
+        n_docs = len(documents)
+        tf = np.zeros((len(self._vocab), n_docs), dtype=np.float32)
+        np.add.at(tf, (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)), 1.0)
+
+        lengths = np.array([len(terms) for terms in doc_terms], dtype=np.float32)
+        avg_length = float(lengths.mean()) if n_docs and lengths.mean() > 0 else 1.0
+        df = (tf > 0).sum(axis=1).astype(np.float32)
+        idf = np.log((n_docs - df + 0.5) / (df + 0.5) + 1.0)
+        norm = k1 * (1.0 - b + b * lengths / avg_length)
+        self._weights = (idf[:, None] * tf * (k1 + 1.0) / (tf + norm[None, :])).astype(np.float32)
+
+    def __len__(self) -> int:
+        return self._weights.shape[1]
+
+    def scores(self, text: str) -> np.ndarray:
+        """BM25 score of every document for `text` (each distinct query term counted once)."""
+        term_ids = sorted({self._vocab[t] for t in tokenize(text) if t in self._vocab})
+        if not term_ids:
+            return np.zeros(len(self), dtype=np.float32)
+        return self._weights[term_ids].sum(axis=0)
+
+    def top(
+        self, text: str, k: int, min_score: float = 0.0, mask: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """Up to `k` (document index, score) pairs scoring above `min_score`, best first.
+
+        `mask` restricts the candidates to documents where it is True. Ties
+        keep corpus order, so the result is deterministic.
+        """
+        scores = self.scores(text)
+        eligible = scores > min_score
+        if mask is not None:
+            eligible &= mask
+        candidates = np.flatnonzero(eligible)
+        order = candidates[np.argsort(-scores[candidates], kind="stable")][:k]
+        return [(int(i), float(scores[i])) for i in order]
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import email.utils
+import random
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Rolling window of recent calls a breaker judges the upstream by.
+_WINDOW = 20
+# Calls needed in the window before the error rate is trusted.
+_MIN_CALLS = 5
+# Open once this fraction of the window failed or was slow.
+_FAILURE_RATE = 0.5
+# A call slower than this counts against the upstream even if it succeeded.
+_SLOW_CALL_SECONDS = 8.0
+# First open period; doubles on each failed half-open probe up to the cap.
+_OPEN_SECONDS = 30.0
+_MAX_OPEN_SECONDS = 300.0
+
+# Retry policy for transient failures (see `retry_delay`).
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_ATTEMPTS = 3
+_BACKOFF_BASE = 0.25
+_BACKOFF_CAP = 2.0
+# A Retry-After longer than this is not waited out in-request; the breaker is
+# held open for that long instead.
+_MAX_RETRY_AFTER = 5.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"circuit open for {name} (retry in {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one upstream host.
+
+    Closed: calls flow and outcomes fill a rolling window. When at least
+    `_MIN_CALLS` are recorded and `_FAILURE_RATE` of them failed (error, 429,
+    5xx or slower than `_SLOW_CALL_SECONDS`), the breaker opens. Open: calls
+    are refused immediately until the open period ends. Half-open: a single
+    probe call is let through; success closes the breaker, failure reopens it
+    for twice as long.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Deque[Tuple[bool, float]] = deque(maxlen=_WINDOW)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._open_for = _OPEN_SECONDS
+        self._probe_in_flight = False
+        self._counts = {"success": 0, "failure": 0, "rejected": 0, "opened": 0}
+
+    def _retry_in(self, now: float) -> float:
+        return max(0.0, self._opened_at + self._open_for - now)
+
+    def before_call(self) -> None:
+        """Reserve a call slot or raise `CircuitOpenError`."""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == OPEN:
+                if self._retry_in(now) > 0:
+                    self._counts["rejected"] += 1
+                    raise CircuitOpenError(self.name, self._retry_in(now))
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self._counts["rejected"] += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self._probe_in_flight = True
+
+    def release(self) -> None:
+        """Give back a slot from `before_call` for a call that was never sent."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record(self, ok: bool, latency: float) -> None:
+        """Record the outcome of a call admitted by `before_call`."""
+        failed = not ok or latency > _SLOW_CALL_SECONDS
+        now = time.monotonic()
+        with self._lock:
+            self._counts["failure" if failed else "success"] += 1
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if failed:
+                    self._open(now, min(self._open_for * 2, _MAX_OPEN_SECONDS))
+                else:
+                    self._state = CLOSED
+                    self._open_for = _OPEN_SECONDS
+                    self._calls.clear()
+                return
+            self._calls.append((failed, latency))
+            if self._state == CLOSED and len(self._calls) >= _MIN_CALLS:
+                failures = sum(1 for f, _ in self._calls if f)
+                if failures / len(self._calls) >= _FAILURE_RATE:
+                    self._open(now, _OPEN_SECONDS)
+
+    def hold_open(self, seconds: float) -> None:
+        """Open for at least `seconds`, e.g. when an upstream asks us to back off."""
+        now = time.monotonic()
+        with self._lock:
+            self._probe_in_flight = False
+            if self._state != OPEN or self._retry_in(now) < seconds:
+                self._open(now, min(seconds, _MAX_OPEN_SECONDS))
+
+    def _open(self, now: float, seconds: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._open_for = seconds
+        self._counts["opened"] += 1
+        self._calls.clear()
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            state = self._state
+            if state == OPEN and self._retry_in(now) <= 0:
+                state = HALF_OPEN
+            latencies = sorted(latency for _, latency in self._calls)
+            return {
+                "state": state,
+                "retry_in_s": round(self._retry_in(now), 1) if state == OPEN else 0.0,
+                "window_calls": len(self._calls),
+                "window_failures": sum(1 for f, _ in self._calls if f),
+                "p50_latency_ms": int(latencies[len(latencies) // 2] * 1000) if latencies else None,
+                **self._counts,
+            }
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given as delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def retry_delay(attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+    """Seconds to sleep before retry number `attempt` (1-based), or None to give up.
+
+    Full-jitter exponential backoff, never shorter than the upstream's
+    Retry-After; a Retry-After beyond `_MAX_RETRY_AFTER` is not retried.
+    """
+    if attempt >= MAX_ATTEMPTS:
+        return None
+    if retry_after is not None and retry_after > _MAX_RETRY_AFTER:
+        return None
+    delay = random.uniform(0, min(_BACKOFF_CAP, _BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+def too_long_retry_after(retry_after: Optional[float]) -> bool:
+    return retry_after is not None and retry_after > _MAX_RETRY_AFTER
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_lock = threading.Lock()
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    """Return the breaker for the host of `url`."""
+    host = urlsplit(url).netloc.lower()
+    breaker = _breakers.get(host)
+    if breaker is None:
+        with _lock:
+            breaker = _breakers.setdefault(host, CircuitBreaker(host))
+    return breaker
+
+
+def breaker_states() -> Dict[str, dict]:
+    return {host: breaker.snapshot() for host, breaker in sorted(_breakers.items())}
@@ -0,0 +1,396 @@
+"""
+Local mirror of eCFR titles with a SQLite FTS5 full-text index.
+
+Bulk title XML (govinfo `ECFR-title29.xml`, or the eCFR versioner's
+`title-29.xml`) is parsed incrementally into one row per section, with the
+title/chapter/part/subpart hierarchy and the citation kept alongside the
+text. Regulation lookups can then be answered locally in milliseconds, and
+keep working while ecfr.gov is slow or down.
+
+Ingest, inspect and query from the backend directory:
+
+    python -m app.services.ecfr_index ingest /path/to/ECFR-title29.xml [...]
+    python -m app.services.ecfr_index stats
+    python -m app.services.ecfr_index search "overtime regular rate" --limit 5
+
+Re-ingesting a title replaces all of its sections.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Levels of the eCFR DIV hierarchy that are kept with each section (TYPE attribute values).
+_LEVELS = ("TITLE", "SUBTITLE", "CHAPTER", "SUBCHAP", "PART", "SUBPART", "SUBJGRP")
+
+# Words that describe the kind of source rather than its subject; they match
+# nearly every section and are left out of local full-text queries.
+_QUERY_STOPWORDS = frozenset({
+    "federal", "law", "laws", "legal", "regulation", "regulations", "rule", "rules",
+    "cfr", "code", "section", "and", "or", "not", "to", "on", "by", "with", "be", "it",
+})
+_QUERY_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Section heading weighted above body text by bm25().
+_HEADING_WEIGHT = 4.0
+
+# Section children that are not regulation text: the heading, source notes and authority notes.
+_NON_TEXT_TAGS = frozenset({"HEAD", "CITA", "SECAUTH"})
+
+_INSERT_BATCH = 500
+
+
+@dataclass
+class EcfrSection:
+    title: int
+    chapter: str
+    part: str
+    subpart: str
+    section: str
+    heading: str
+    citation: str
+    url: str
+    text: str
+    hierarchy: Dict[str, str]
+
+
+def _ensure_db(conn: sqlite3.Connection) -> None:
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sections (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title INTEGER NOT NULL,
+            chapter TEXT,
+            part TEXT,
+            subpart TEXT,
+            section TEXT NOT NULL,
+            heading TEXT,
+            citation TEXT NOT NULL,
+            url TEXT NOT NULL,
+            hierarchy TEXT NOT NULL,
+            text TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sections_title ON sections(title, section)")
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(
+            heading, text, content='sections', content_rowid='id', tokenize='porter unicode61'
+        )
+        """
+    )
+    # Keep the external-content FTS index in step with the sections table
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS sections_ai AFTER INSERT ON sections BEGIN
+            INSERT INTO sections_fts(rowid, heading, text) VALUES (new.id, new.heading, new.text);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS sections_ad AFTER DELETE ON sections BEGIN
+            INSERT INTO sections_fts(sections_fts, rowid, heading, text) VALUES ('delete', old.id, old.heading, old.text);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS titles (
+            title INTEGER PRIMARY KEY,
+            heading TEXT,
+            amended TEXT,
+            source_file TEXT,
+            sections INTEGER NOT NULL,
+            ingested_at REAL NOT NULL
+        )
+        """
+    )
+    conn.commit()
+
+
+def _index_path() -> str:
+    settings = get_settings()
+    if settings.ecfr_index_path:
+        return os.path.abspath(settings.ecfr_index_path)
+    return os.path.join(os.path.dirname(os.path.abspath(settings.db_path)), "ecfr.db")
+
+
+def _clean(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _element_text(elem: ET.Element) -> str:
+    return _clean("".join(elem.itertext()))
+
+
+def _section_number(raw: str) -> str:
+    """`§ 778.100` (govinfo) and `778.100` (versioner) both become `778.100`."""
+    return raw.replace("§", "").strip()
+
+
+def _section_heading(head: str, number: str) -> str:
+    """Drop the leading `§ 778.100` from a section HEAD, keeping the caption."""
+    heading = head.lstrip("§ ").strip()
+    if heading.startswith(number):
+        heading = heading[len(number):]
+    return heading.strip(" .—-") or head
+
+
+def _parse_title(path: str) -> Tuple[Dict[str, str], Iterator[EcfrSection]]:
+    """Stream the sections of one title XML file.
+
+    Returns title-level metadata (filled in as parsing proceeds, complete once
+    the iterator is exhausted) and an iterator of sections. Each DIV is cleared
+    as soon as it ends, so memory stays flat even for the largest titles.
+    """
+    meta: Dict[str, str] = {}
+
+    def sections() -> Iterator[EcfrSection]:
+        # (TYPE, N, HEAD text) for every open DIV
+        stack: List[List[str]] = []
+        for event, elem in ET.iterparse(path, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag.startswith("DIV"):
+                    stack.append([elem.get("TYPE", "").upper(), elem.get("N", ""), ""])
+                continue
+
+            if tag == "AMDDATE" and not meta.get("amended"):
+                meta["amended"] = _element_text(elem)
+            elif tag == "HEAD" and stack and not stack[-1][2]:
+                stack[-1][2] = _element_text(elem)
+            elif tag.startswith("DIV") and stack:
+                kind, number, head = stack.pop()
+                if kind == "TITLE":
+                    meta["title"] = number
+                    meta["heading"] = head
+                elif kind == "SECTION":
+                    section = _build_section(elem, number, head, stack)
+                    if section is not None:
+                        yield section
+                elem.clear()
+
+    return meta, sections()
+
+
+def _build_section(elem: ET.Element, number: str, head: str, stack: List[List[str]]) -> Optional[EcfrSection]:
+    levels = {kind: (n, h) for kind, n, h in stack if kind in _LEVELS}
+    title_n = levels.get("TITLE", ("", ""))[0]
+    if not title_n.isdigit():
+        return None
+    number = _section_number(number)
+    paragraphs = [_element_text(child) for child in elem if child.tag not in _NON_TEXT_TAGS]
+    text = "\n\n".join(p for p in paragraphs if p)
+    # [Reserved] and removed sections carry no text
+    if not number or not text:
+        return None
+
+    part = levels.get("PART", ("", ""))[0] or number.split(".")[0]
+    heading = _section_heading(head, number)
+    hierarchy = {kind.lower(): h for kind, (_n, h) in levels.items() if h}
+    hierarchy["section"] = heading
+    return EcfrSection(
+        title=int(title_n),
+        chapter=levels.get("CHAPTER", ("", ""))[0],
+        part=part,
+        subpart=levels.get("SUBPART", ("", ""))[0],
+        section=number,
+        heading=heading,
+        citation=f"{title_n} C.F.R. § {number}",
+        url=f"https://www.ecfr.gov/current/title-{title_n}/part-{part}/section-{number}",
+        text=text,
+        hierarchy=hierarchy,
+    )
+
+
+def fts_query(text: str, match_all: bool) -> str:
+    """FTS5 MATCH expression for free text: quoted terms joined by AND or OR."""
+    terms = [t for t in dict.fromkeys(_QUERY_TOKEN.findall(text.lower())) if t not in _QUERY_STOPWORDS]
+    return f" {'AND' if match_all else 'OR'} ".join(f'"{t}"' for t in terms)
+
+
+class EcfrIndex:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10.0)
+        self._lock = threading.Lock()
+        with self._lock:
+            _ensure_db(self._conn)
+
+    def ingest(self, xml_path: str) -> Tuple[int, int]:
+        """Load one title XML file, replacing that title's sections; returns (title, sections)."""
+        meta, sections = _parse_title(xml_path)
+        title: Optional[int] = None
+        count = 0
+        batch: List[tuple] = []
+        with self._lock:
+            try:
+                for section in sections:
+                    if title is None:
+                        title = section.title
+                        self._conn.execute("DELETE FROM sections WHERE title = ?", (title,))
+                    batch.append((
+                        section.title, section.chapter, section.part, section.subpart, section.section,
+                        section.heading, section.citation, section.url,
+                        json.dumps(section.hierarchy, ensure_ascii=False), section.text,
+                    ))
+                    if len(batch) >= _INSERT_BATCH:
+                        count += self._insert(batch)
+                if batch:
+                    count += self._insert(batch)
+                if title is None:
+                    self._conn.rollback()
+                    raise ValueError(f"{xml_path}: no eCFR sections found")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO titles (title, heading, amended, source_file, sections, ingested_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (title, meta.get("heading"), meta.get("amended"), os.path.abspath(xml_path), count, time.time()),
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.execute("INSERT INTO sections_fts(sections_fts) VALUES ('optimize')")
+            self._conn.commit()
+        logger.info("eCFR index: title %s loaded with %d section(s) from %s", title, count, xml_path)
+        return title, count
+
+    def _insert(self, batch: List[tuple]) -> int:
+        self._conn.executemany(
+            "INSERT INTO sections (title, chapter, part, subpart, section, heading, citation, url, hierarchy, text) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            batch,
+        )
+        n = len(batch)
+        batch.clear()
+        return n
+
+    def search(self, text: str, limit: int = 5, match_all: bool = True) -> List[EcfrSection]:
+        """Best-matching sections by bm25, section heading weighted above body text."""
+        match = fts_query(text, match_all)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT s.title, s.chapter, s.part, s.subpart, s.section, s.heading,
+                       s.citation, s.url, s.text, s.hierarchy
+                FROM sections_fts JOIN sections s ON s.id = sections_fts.rowid
+                WHERE sections_fts MATCH ?
+                ORDER BY bm25(sections_fts, ?, 1.0)
+                LIMIT ?
+                """,
+                (match, _HEADING_WEIGHT, limit),
+            ).fetchall()
+        return [
+            EcfrSection(title, chapter or "", part or "", subpart or "", section, heading or "",
+                        citation, url, body, json.loads(hierarchy))
+            for title, chapter, part, subpart, section, heading, citation, url, body, hierarchy in rows
+        ]
+
+    def section_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(sections), 0) FROM titles").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT title, heading, amended, sections, ingested_at FROM titles ORDER BY title"
+            ).fetchall()
+        titles = {
+            str(title): {"heading": heading, "amended": amended, "sections": sections, "ingested_at": ingested_at}
+            for title, heading, amended, sections, ingested_at in rows
+        }
+        return {
+            "path": self.path,
+            "sections": sum(t["sections"] for t in titles.values()),
+            "titles": titles,
+        }
+
+
+_INDEX: Optional[EcfrIndex] = None
+# None until the first look; a 0.0 sentinel would compare against time.monotonic(),
+# whose origin is arbitrary (often boot), and could skip the first check
+_INDEX_CHECKED_AT: Optional[float] = None
+_init_lock = threading.Lock()
+
+# How often a missing or empty index file is looked for again, so a mirror
+# ingested while the server runs is picked up without a restart.
+_RECHECK_SECONDS = 60.0
+
+
+def _checked_recently(now: float) -> bool:
+    return _INDEX_CHECKED_AT is not None and now - _INDEX_CHECKED_AT < _RECHECK_SECONDS
+
+
+def get_ecfr_index() -> Optional[EcfrIndex]:
+    """Return the local eCFR index, or None until at least one title is ingested."""
+    global _INDEX, _INDEX_CHECKED_AT
+    if _INDEX is not None:
+        return _INDEX
+    now = time.monotonic()
+    if _checked_recently(now):
+        return None
+    with _init_lock:
+        if _INDEX is None and not _checked_recently(now):
+            _INDEX_CHECKED_AT = now
+            path = _index_path()
+            if not os.path.exists(path):
+                return None
+            try:
+                index = EcfrIndex(path)
+                if index.section_count():
+                    _INDEX = index
+            except Exception as exc:
+                logger.warning("eCFR index at %s unavailable: %s", path, exc)
+        return _INDEX
+
+
+def _main() -> None:
+    parser = argparse.ArgumentParser(description="Build and query the local eCFR full-text index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest_cmd = sub.add_parser("ingest", help="Load eCFR bulk title XML files")
+    ingest_cmd.add_argument("files", nargs="+")
+    sub.add_parser("stats", help="Sections per ingested title")
+    search_cmd = sub.add_parser("search", help="Full-text search of the index")
+    search_cmd.add_argument("query")
+    search_cmd.add_argument("--limit", type=int, default=5)
+    search_cmd.add_argument("--any", action="store_true", help="Match any term instead of all terms")
+    args = parser.parse_args()
+
+    index = EcfrIndex(_index_path())
+    if args.command == "ingest":
+        for path in args.files:
+            started = time.monotonic()
+            title, count = index.ingest(path)
+            print(f"Title {title}: {count} section(s) from {path} in {time.monotonic() - started:.1f}s")
+    elif args.command == "stats":
+        stats = index.stats()
+        print(f"{stats['path']}: {stats['sections']} section(s)")
+        for title, info in stats["titles"].items():
+            print(f"  Title {title} ({info['amended'] or 'undated'}): {info['sections']} section(s) — {info['heading']}")
+    elif args.command == "search":
+        for section in index.search(args.query, args.limit, match_all=not args.any):
+            print(f"{section.citation} — {section.heading}\n  {section.url}\n  {section.text[:160]}…")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from html.parser import HTMLParser
+from typing import List, Optional, Sequence, Tuple
+
+# Elements whose contents are never useful statute or rule text.
+_SKIP_TAGS = frozenset({"script", "style", "nav", "noscript", "svg", "template", "head", "header", "footer"})
+
+# (tag, attribute, value) selectors; a `class` value matches any class token.
+Target = Tuple[str, str, str]
+
+# Cornell LII renders the statute body in the first tab pane.
+LII_BODY_TARGETS: Tuple[Target, ...] = (("div", "id", "tab_default_1"),)
+
+
+class HTMLTextExtractor(HTMLParser):
+    """Incremental HTML → plain text with a character budget.
+
+    Feed it response chunks as they arrive; `done` turns True once the budget
+    is reached so the caller can stop downloading. Text inside `targets`
+    containers is preferred; if no target container is ever seen, the text of
+    the whole page (minus skipped elements) is returned instead.
+    """
+
+    def __init__(self, max_chars: int, targets: Sequence[Target] = ()) -> None:
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.targets = tuple(targets)
+        self._skip_depth = 0
+        self._target_tag: Optional[str] = None
+        self._target_depth = 0
+        self._seen_target = False
+        self._parts: List[str] = []
+        self._fallback: List[str] = []
+        self._chars = 0
+        self._fallback_chars = 0
+
+    @property
+    def done(self) -> bool:
+        return self._chars >= self.max_chars
+
+    def _is_target(self, tag: str, attrs: list) -> bool:
+        for t_tag, t_attr, t_value in self.targets:
+            if tag != t_tag:
+                continue
+            for name, value in attrs:
+                if name != t_attr or value is None:
+                    continue
+                if value == t_value or (name == "class" and t_value in value.split()):
+                    return True
+        return False
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if self._target_tag is not None:
+            if tag == self._target_tag:
+                self._target_depth += 1
+        elif self.targets and self._is_target(tag, attrs):
+            self._target_tag = tag
+            self._target_depth = 1
+            self._seen_target = True
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIP_TAGS:
+            if self._skip_depth:
+                self._skip_depth -= 1
+            return
+        if self._target_tag is not None and tag == self._target_tag:
+            self._target_depth -= 1
+            if self._target_depth == 0:
+                self._target_tag = None
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth or self.done:
+            return
+        text = " ".join(data.split())
+        if not text:
+            return
+        if self._target_tag is not None:
+            self._parts.append(text)
+            self._chars += len(text) + 1
+        elif not self._seen_target and self._fallback_chars < self.max_chars:
+            self._fallback.append(text)
+            self._fallback_chars += len(text) + 1
+            # Without targets the page text itself counts against the budget
+            if not self.targets:
+                self._chars = self._fallback_chars
+
+    def text(self) -> str:
+        parts = self._parts if self._seen_target else self._fallback
+        return " ".join(parts)[: self.max_chars]
+
+
+def extract_text(html: str, max_chars: int, targets: Sequence[Target] = ()) -> str:
+    """Non-streaming convenience wrapper around `HTMLTextExtractor`."""
+    extractor = HTMLTextExtractor(max_chars, targets)
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text()
@@ -0,0 +1,584 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Optional, Sequence
+from urllib.parse import urlsplit
+
+import httpx
+
+from .circuit_breaker import (
+    RETRY_STATUSES,
+    CircuitOpenError,
+    get_breaker,
+    retry_after_seconds,
+    retry_delay,
+    too_long_retry_after,
+)
+from .html_text import HTMLTextExtractor, Target
+from . import latency
+from .rate_limit import RateLimitedError, get_bucket
+from .response_cache import get_response_cache
+
+logger = logging.getLogger(__name__)
+
+# Upstream origins used by live_retrieval. Connections to these are opened at
+# startup so the first chat request does not pay the TCP+TLS handshake.
+UPSTREAM_ORIGINS = (
+    "https://www.ecfr.gov",
+    "https://www.federalregister.gov",
+    "https://v3.openstates.org",
+    "https://www.courtlistener.com",
+    "https://www.law.cornell.edu",
+)
+
+_USER_AGENT = "LegalSearchHub/1.0"
+_WARMUP_TIMEOUT = 5.0
+
+# Hard cap on bytes read from a single streamed page (Federal Register bodies
+# can run to several megabytes).
+_MAX_PAGE_BYTES = 4 * 1024 * 1024
+
+# HTTP/2 needs the optional `h2` package; brotli decoding needs `brotli`.
+# Both ship with `httpx[http2,brotli]` but we degrade cleanly without them.
+try:
+    import h2  # type: ignore  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+try:
+    import brotli  # type: ignore  # noqa: F401
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # type: ignore  # noqa: F401
+        _ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        _ACCEPT_ENCODING = "gzip, deflate"
+
+# One pool per upstream host keeps a slow host from starving the others of
+# keep-alive slots.
+_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+_DEFAULT_HEADERS = {"User-Agent": _USER_AGENT, "Accept-Encoding": _ACCEPT_ENCODING}
+
+# Transport failures that happen before the upstream has spent real time on the
+# request, so retrying is cheap. Read timeouts are recorded but not retried.
+_RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+# Failures after which a stale cached body is served instead of an error.
+_STALE_ON = (CircuitOpenError, RateLimitedError, httpx.TransportError)
+
+# Runs the primary and hedged copies of a sync request side by side.
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+_clients: Dict[str, httpx.Client] = {}
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+_lock = threading.Lock()
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _new_client() -> httpx.Client:
+    return httpx.Client(http2=_HTTP2, limits=_LIMITS, follow_redirects=True, headers=_DEFAULT_HEADERS)
+
+
+def _new_async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(http2=_HTTP2, limits=_LIMITS, follow_redirects=True, headers=_DEFAULT_HEADERS)
+
+
+def get_client(url: str) -> httpx.Client:
+    """Return the shared, keep-alive client for the host of `url`."""
+    key = _host_key(url)
+    client = _clients.get(key)
+    if client is not None and not client.is_closed:
+        return client
+    with _lock:
+        client = _clients.get(key)
+        if client is None or client.is_closed:
+            client = _new_client()
+            _clients[key] = client
+        return client
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    """Return the shared async client for the host of `url`.
+
+    Async clients are bound to the event loop that first uses them, which is
+    the single uvicorn loop in production.
+    """
+    key = _host_key(url)
+    client = _async_clients.get(key)
+    if client is not None and not client.is_closed:
+        return client
+    with _lock:
+        client = _async_clients.get(key)
+        if client is None or client.is_closed:
+            client = _new_async_client()
+            _async_clients[key] = client
+        return client
+
+
+def _source_for(url: str, source: Optional[str]) -> str:
+    return source or urlsplit(url).netloc.lower()
+
+
+def _close_later(future: Future) -> None:
+    """Release the connection of a hedged response that lost the race."""
+    def _close(f: Future) -> None:
+        if not f.cancelled() and f.exception() is None:
+            f.result().close()
+
+    future.add_done_callback(_close)
+
+
+def _send_hedged(client: httpx.Client, request: httpx.Request, stream: bool, source: str) -> httpx.Response:
+    """Send once; if no answer by the source's p95, race a duplicate request.
+
+    The first successful response wins; the other is closed when it lands.
+    Only used for idempotent GETs, and never for quota-limited hosts.
+    """
+    delay = None if get_bucket(str(request.url)) else latency.hedge_delay(source)
+    if delay is None:
+        return client.send(request, stream=stream)
+    primary = _HEDGE_POOL.submit(client.send, request, stream=stream)
+    done, _ = wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+    latency.record_hedge(source)
+    logger.info("Hedging request to %s after %.2fs", source, delay)
+    pending = {primary, _HEDGE_POOL.submit(client.send, request, stream=stream)}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        winners = [future for future in done if future.exception() is None]
+        if winners:
+            # Both can land in the same wait(); every response but the returned one is closed
+            for loser in winners[1:] + list(pending):
+                _close_later(loser)
+            return winners[0].result()
+        error = error or next(iter(done)).exception()
+    raise error
+
+
+async def _send_hedged_async(
+    client: httpx.AsyncClient, request: httpx.Request, stream: bool, source: str
+) -> httpx.Response:
+    """Async variant of `_send_hedged`; a losing request still in flight is
+    cancelled, one that completed alongside the winner is closed."""
+    delay = None if get_bucket(str(request.url)) else latency.hedge_delay(source)
+    if delay is None:
+        return await client.send(request, stream=stream)
+    primary = asyncio.ensure_future(client.send(request, stream=stream))
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+    latency.record_hedge(source)
+    logger.info("Hedging request to %s after %.2fs", source, delay)
+    pending = {primary, asyncio.ensure_future(client.send(request, stream=stream))}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winners = [task for task in done if task.exception() is None]
+            if winners:
+                for loser in winners[1:]:
+                    await loser.result().aclose()
+                return winners[0].result()
+            error = error or next(iter(done)).exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _should_retry(breaker, bucket, attempt: int, response: httpx.Response) -> Optional[float]:
+    """Record a completed attempt's status and return the delay before retrying, if any."""
+    if response.status_code not in RETRY_STATUSES:
+        return None
+    if bucket is not None and response.status_code == 429:
+        bucket.drain()
+    retry_after = retry_after_seconds(response.headers.get("retry-after"))
+    if too_long_retry_after(retry_after):
+        # The upstream asked for a long pause: shed it instead of waiting in-request
+        breaker.hold_open(retry_after)
+    return retry_delay(attempt, retry_after)
+
+
+def _send(client: httpx.Client, request: httpx.Request, source: str, stream: bool = False) -> httpx.Response:
+    """Send through the host's circuit breaker, retrying transient failures.
+
+    429/5xx responses and connection failures are retried with jittered
+    exponential backoff (honouring Retry-After); the last response is
+    returned as-is when retries run out. Raises `CircuitOpenError` without
+    touching the network while the host's breaker is open. Quota-limited
+    hosts take a token per admitted attempt, queueing briefly or raising
+    `RateLimitedError` when the queue is too long. Each attempt's
+    latency feeds `source`'s histogram; timed-out attempts count at the
+    time they waited, so a degrading upstream lengthens its own timeout.
+    """
+    breaker = get_breaker(str(request.url))
+    bucket = get_bucket(str(request.url))
+    attempt = 0
+    while True:
+        attempt += 1
+        # Breaker first: a call it refuses must not spend (or queue for) quota
+        breaker.before_call()
+        if bucket is not None:
+            try:
+                bucket.acquire()
+            except BaseException:
+                # Never sent, so not an outcome; just free a half-open probe slot
+                breaker.release()
+                raise
+        started = time.monotonic()
+        try:
+            response = _send_hedged(client, request, stream, source)
+        except httpx.TransportError as exc:
+            breaker.record(False, time.monotonic() - started)
+            if isinstance(exc, httpx.TimeoutException):
+                latency.record(source, time.monotonic() - started)
+            delay = retry_delay(attempt) if isinstance(exc, _RETRY_ERRORS) else None
+            if delay is None:
+                raise
+            logger.info("Retrying %s in %.2fs after %s", request.url.host, delay, exc)
+            time.sleep(delay)
+            continue
+        except BaseException:
+            # Decoding errors, redirect loops, cancellation: still an outcome,
+            # or a half-open breaker would keep waiting for its probe forever
+            breaker.record(False, time.monotonic() - started)
+            raise
+        elapsed = time.monotonic() - started
+        latency.record(source, elapsed)
+        breaker.record(response.status_code not in RETRY_STATUSES, elapsed)
+        delay = _should_retry(breaker, bucket, attempt, response)
+        if delay is None:
+            return response
+        logger.info("Retrying %s in %.2fs after HTTP %d", request.url.host, delay, response.status_code)
+        response.close()
+        time.sleep(delay)
+
+
+async def _send_async(
+    client: httpx.AsyncClient, request: httpx.Request, source: str, stream: bool = False
+) -> httpx.Response:
+    """Async variant of `_send`."""
+    breaker = get_breaker(str(request.url))
+    bucket = get_bucket(str(request.url))
+    attempt = 0
+    while True:
+        attempt += 1
+        # Breaker first: a call it refuses must not spend (or queue for) quota
+        breaker.before_call()
+        if bucket is not None:
+            try:
+                await bucket.acquire_async()
+            except BaseException:
+                # Never sent, so not an outcome; just free a half-open probe slot
+                breaker.release()
+                raise
+        started = time.monotonic()
+        try:
+            response = await _send_hedged_async(client, request, stream, source)
+        except httpx.TransportError as exc:
+            breaker.record(False, time.monotonic() - started)
+            if isinstance(exc, httpx.TimeoutException):
+                latency.record(source, time.monotonic() - started)
+            delay = retry_delay(attempt) if isinstance(exc, _RETRY_ERRORS) else None
+            if delay is None:
+                raise
+            logger.info("Retrying %s in %.2fs after %s", request.url.host, delay, exc)
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            # Decoding errors, redirect loops, cancellation: still an outcome,
+            # or a half-open breaker would keep waiting for its probe forever
+            breaker.record(False, time.monotonic() - started)
+            raise
+        elapsed = time.monotonic() - started
+        latency.record(source, elapsed)
+        breaker.record(response.status_code not in RETRY_STATUSES, elapsed)
+        delay = _should_retry(breaker, bucket, attempt, response)
+        if delay is None:
+            return response
+        logger.info("Retrying %s in %.2fs after HTTP %d", request.url.host, delay, response.status_code)
+        await response.aclose()
+        await asyncio.sleep(delay)
+
+
+def upstream_get(
+    url: str,
+    *,
+    params: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    timeout: float,
+    source: Optional[str] = None,
+) -> httpx.Response:
+    """GET `url` through the shared pool and the persistent response cache.
+
+    `timeout` is the default for `source` (the URL's host when not given);
+    once enough requests have been observed it is replaced by one derived
+    from that source's latency histogram, and slow requests are hedged.
+    A fresh cached body is returned without any network I/O; a stale one is
+    revalidated with a conditional request and reused on 304. While the
+    upstream is failing (breaker open, transport error, 5xx) a stale cached
+    body is served rather than an error.
+    """
+    client = get_client(url)
+    source = _source_for(url, source)
+    timeout = latency.adaptive_timeout(source, timeout)
+    request = client.build_request("GET", url, params=params, headers=headers, timeout=timeout)
+    cache = get_response_cache()
+    key = str(request.url)
+    entry = cache.get(key) if cache is not None else None
+    if entry is not None:
+        if entry.is_fresh():
+            return entry.to_response(request)
+        request.headers.update(entry.conditional_headers())
+
+    try:
+        response = _send(client, request, source)
+    except _STALE_ON as exc:
+        if entry is None:
+            raise
+        logger.warning("Serving stale %s: %s", key, exc)
+        return entry.to_response(request)
+    if entry is not None and response.status_code >= 500:
+        return entry.to_response(request)
+    if cache is not None:
+        if entry is not None and response.status_code == 304:
+            cache.touch(key, response)
+            return entry.to_response(request)
+        if response.status_code == 200:
+            cache.put(key, response)
+    return response
+
+
+async def upstream_get_async(
+    url: str,
+    *,
+    params: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    timeout: float,
+    source: Optional[str] = None,
+) -> httpx.Response:
+    """Async variant of `upstream_get`; SQLite I/O runs off the event loop."""
+    client = get_async_client(url)
+    source = _source_for(url, source)
+    timeout = latency.adaptive_timeout(source, timeout)
+    request = client.build_request("GET", url, params=params, headers=headers, timeout=timeout)
+    cache = get_response_cache()
+    key = str(request.url)
+    entry = await asyncio.to_thread(cache.get, key) if cache is not None else None
+    if entry is not None:
+        if entry.is_fresh():
+            return entry.to_response(request)
+        request.headers.update(entry.conditional_headers())
+
+    try:
+        response = await _send_async(client, request, source)
+    except _STALE_ON as exc:
+        if entry is None:
+            raise
+        logger.warning("Serving stale %s: %s", key, exc)
+        return entry.to_response(request)
+    if entry is not None and response.status_code >= 500:
+        return entry.to_response(request)
+    if cache is not None:
+        if entry is not None and response.status_code == 304:
+            await asyncio.to_thread(cache.touch, key, response)
+            return entry.to_response(request)
+        if response.status_code == 200:
+            await asyncio.to_thread(cache.put, key, response)
+    return response
+
+
+def _text_cache_key(request: httpx.Request, max_chars: int, targets: Sequence[Target]) -> str:
+    # Extracted text is cached under its own key; the fragment keeps the host intact
+    selector = ",".join(f"{t}.{a}={v}" for t, a, v in targets)
+    return f"{request.url}#text:{max_chars}:{selector}"
+
+
+def _store_text(cache, key: str, response: httpx.Response, text: str) -> None:
+    cache.put_body(
+        key,
+        200,
+        "text/plain; charset=utf-8",
+        text.encode("utf-8"),
+        response.headers.get("etag"),
+        response.headers.get("last-modified"),
+    )
+
+
+def upstream_get_text(
+    url: str,
+    *,
+    timeout: float,
+    max_chars: int,
+    max_bytes: int = _MAX_PAGE_BYTES,
+    targets: Sequence[Target] = (),
+    source: Optional[str] = None,
+) -> str:
+    """Stream an HTML page and return its extracted plain text.
+
+    Chunks are parsed as they arrive and the download stops once `max_chars`
+    of text or `max_bytes` of body have been read, so the full document is
+    never held in memory. The extracted text (not the raw page) is stored in
+    the response cache and revalidated like any other entry.
+    """
+    client = get_client(url)
+    source = _source_for(url, source)
+    timeout = latency.adaptive_timeout(source, timeout)
+    request = client.build_request("GET", url, timeout=timeout)
+    cache = get_response_cache()
+    key = _text_cache_key(request, max_chars, targets)
+    entry = cache.get(key) if cache is not None else None
+    if entry is not None:
+        if entry.is_fresh():
+            return entry.body.decode("utf-8")
+        request.headers.update(entry.conditional_headers())
+
+    try:
+        response = _send(client, request, source, stream=True)
+    except _STALE_ON as exc:
+        if entry is None:
+            raise
+        logger.warning("Serving stale %s: %s", key, exc)
+        return entry.body.decode("utf-8")
+    try:
+        if entry is not None and response.status_code >= 500:
+            return entry.body.decode("utf-8")
+        if entry is not None and response.status_code == 304:
+            cache.touch(key, response)
+            return entry.body.decode("utf-8")
+        response.raise_for_status()
+        extractor = HTMLTextExtractor(max_chars, targets)
+        for chunk in response.iter_text():
+            extractor.feed(chunk)
+            if extractor.done or response.num_bytes_downloaded >= max_bytes:
+                break
+        extractor.close()
+    finally:
+        response.close()
+
+    text = extractor.text()
+    if cache is not None and text:
+        _store_text(cache, key, response, text)
+    return text
+
+
+async def upstream_get_text_async(
+    url: str,
+    *,
+    timeout: float,
+    max_chars: int,
+    max_bytes: int = _MAX_PAGE_BYTES,
+    targets: Sequence[Target] = (),
+    source: Optional[str] = None,
+) -> str:
+    """Async variant of `upstream_get_text`."""
+    client = get_async_client(url)
+    source = _source_for(url, source)
+    timeout = latency.adaptive_timeout(source, timeout)
+    request = client.build_request("GET", url, timeout=timeout)
+    cache = get_response_cache()
+    key = _text_cache_key(request, max_chars, targets)
+    entry = await asyncio.to_thread(cache.get, key) if cache is not None else None
+    if entry is not None:
+        if entry.is_fresh():
+            return entry.body.decode("utf-8")
+        request.headers.update(entry.conditional_headers())
+
+    try:
+        response = await _send_async(client, request, source, stream=True)
+    except _STALE_ON as exc:
+        if entry is None:
+            raise
+        logger.warning("Serving stale %s: %s", key, exc)
+        return entry.body.decode("utf-8")
+    try:
+        if entry is not None and response.status_code >= 500:
+            return entry.body.decode("utf-8")
+        if entry is not None and response.status_code == 304:
+            await asyncio.to_thread(cache.touch, key, response)
+            return entry.body.decode("utf-8")
+        response.raise_for_status()
+        extractor = HTMLTextExtractor(max_chars, targets)
+        async for chunk in response.aiter_text():
+            extractor.feed(chunk)
+            if extractor.done or response.num_bytes_downloaded >= max_bytes:
+                break
+        extractor.close()
+    finally:
+        await response.aclose()
+
+    text = extractor.text()
+    if cache is not None and text:
+        await asyncio.to_thread(_store_text, cache, key, response, text)
+    return text
+
+
+def _warm(origin: str) -> None:
+    try:
+        get_client(origin).head(origin, timeout=_WARMUP_TIMEOUT)
+        logger.info("Warmed connection to %s", origin)
+    except Exception as exc:
+        logger.warning("Connection warm-up failed for %s: %s", origin, exc)
+
+
+def warm_up(origins: Optional[tuple] = None) -> None:
+    """Open a pooled connection to every upstream in the background.
+
+    Runs on daemon threads so application startup is never blocked on a
+    slow or unreachable upstream.
+    """
+    for origin in origins or UPSTREAM_ORIGINS:
+        threading.Thread(target=_warm, args=(origin,), name=f"warmup:{origin}", daemon=True).start()
+
+
+async def _warm_async(origin: str) -> None:
+    try:
+        await get_async_client(origin).head(origin, timeout=_WARMUP_TIMEOUT)
+        logger.info("Warmed async connection to %s", origin)
+    except Exception as exc:
+        logger.warning("Async connection warm-up failed for %s: %s", origin, exc)
+
+
+async def warm_up_async(origins: Optional[tuple] = None) -> None:
+    """Open a pooled connection to every upstream on the async clients.
+
+    The async pools are separate from the sync ones and are bound to the
+    running loop, so this must run on the loop that serves requests.
+    """
+    await asyncio.gather(*(_warm_async(origin) for origin in origins or UPSTREAM_ORIGINS))
+
+
+def close_all() -> None:
+    """Close every pooled client. Called on application shutdown."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception as exc:
+            logger.debug("Error closing HTTP client: %s", exc)
+
+
+async def aclose_all() -> None:
+    """Close every pooled async client. Must run on the loop that used them."""
+    with _lock:
+        clients = list(_async_clients.values())
+        _async_clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as exc:
+            logger.debug("Error closing async HTTP client: %s", exc)
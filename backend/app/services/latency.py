@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Log-spaced bucket upper bounds from 10 ms to ~120 s (about 12% wide each).
+_BUCKETS: List[float] = [0.01 * 1.12 ** i for i in range(84)]
+
+# The histogram covers the last `_SLOTS * _SLOT_SECONDS` seconds; one slot is
+# dropped and a fresh one started every `_SLOT_SECONDS`.
+_SLOT_SECONDS = 60.0
+_SLOTS = 10
+
+# Below this many samples the caller's default timeout is used and no hedging happens.
+_MIN_SAMPLES = 20
+
+# Adaptive timeout = p99 × factor, clamped to [_MIN_TIMEOUT, default × _MAX_TIMEOUT_FACTOR].
+_TIMEOUT_FACTOR = 3.0
+_MIN_TIMEOUT = 2.0
+_MAX_TIMEOUT_FACTOR = 2.0
+
+# A duplicate request is sent once the first has run past p95, but never for
+# more than this fraction of requests in the window (hedges add load).
+_HEDGE_PERCENTILE = 0.95
+_HEDGE_BUDGET = 0.1
+_MIN_HEDGE_DELAY = 0.05
+
+
+class _Slot:
+    __slots__ = ("started", "counts", "requests", "hedges")
+
+    def __init__(self, started: float) -> None:
+        self.started = started
+        self.counts = [0] * (len(_BUCKETS) + 1)
+        self.requests = 0
+        self.hedges = 0
+
+
+class LatencyHistogram:
+    """Rolling, bucketed latency distribution for one upstream source.
+
+    Samples land in log-spaced buckets of the current one-minute slot; the
+    last `_SLOTS` slots are summed for percentiles, so the distribution
+    follows the upstream's behaviour over roughly the last ten minutes.
+    Percentiles are reported as the upper bound of the bucket they fall in.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._slots: List[_Slot] = []
+
+    def _current(self, now: float) -> _Slot:
+        if not self._slots or now - self._slots[-1].started >= _SLOT_SECONDS:
+            self._slots.append(_Slot(now))
+            cutoff = now - _SLOT_SECONDS * _SLOTS
+            self._slots = [s for s in self._slots if s.started > cutoff]
+        return self._slots[-1]
+
+    def record(self, seconds: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            slot = self._current(now)
+            slot.counts[bisect.bisect_left(_BUCKETS, seconds)] += 1
+            slot.requests += 1
+
+    def record_hedge(self) -> None:
+        with self._lock:
+            self._current(time.monotonic()).hedges += 1
+
+    def _totals(self) -> List[int]:
+        totals = [0] * (len(_BUCKETS) + 1)
+        cutoff = time.monotonic() - _SLOT_SECONDS * _SLOTS
+        for slot in self._slots:
+            if slot.started > cutoff:
+                for i, count in enumerate(slot.counts):
+                    totals[i] += count
+        return totals
+
+    def count(self) -> int:
+        with self._lock:
+            return sum(self._totals())
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            totals = self._totals()
+        total = sum(totals)
+        if total < _MIN_SAMPLES:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(totals):
+            seen += count
+            if seen >= rank:
+                return _BUCKETS[min(i, len(_BUCKETS) - 1)]
+        return _BUCKETS[-1]
+
+    def hedge_allowed(self) -> bool:
+        cutoff = time.monotonic() - _SLOT_SECONDS * _SLOTS
+        with self._lock:
+            slots = [s for s in self._slots if s.started > cutoff]
+            requests = sum(s.requests for s in slots)
+            hedges = sum(s.hedges for s in slots)
+        return requests > 0 and hedges < requests * _HEDGE_BUDGET
+
+
+_histograms: Dict[str, LatencyHistogram] = {}
+_lock = threading.Lock()
+
+
+def histogram(source: str) -> LatencyHistogram:
+    hist = _histograms.get(source)
+    if hist is None:
+        with _lock:
+            hist = _histograms.setdefault(source, LatencyHistogram())
+    return hist
+
+
+def record(source: str, seconds: float) -> None:
+    """Record one completed (or timed-out) request to `source`."""
+    histogram(source).record(seconds)
+
+
+def adaptive_timeout(source: str, default: float) -> float:
+    """Timeout for the next request to `source`: p99 × factor once warmed up.
+
+    Timed-out requests are recorded at their timeout, so a degrading upstream
+    pushes its own p99, and therefore its timeout, upward (up to twice the
+    default); a fast one converges well below the default.
+    """
+    p99 = histogram(source).percentile(0.99)
+    if p99 is None:
+        return default
+    return max(_MIN_TIMEOUT, min(p99 * _TIMEOUT_FACTOR, default * _MAX_TIMEOUT_FACTOR))
+
+
+def hedge_delay(source: str) -> Optional[float]:
+    """Seconds after which to send a hedged duplicate, or None to not hedge."""
+    hist = histogram(source)
+    p95 = hist.percentile(_HEDGE_PERCENTILE)
+    if p95 is None or not hist.hedge_allowed():
+        return None
+    return max(_MIN_HEDGE_DELAY, p95)
+
+
+def record_hedge(source: str) -> None:
+    histogram(source).record_hedge()
+
+
+def latency_stats() -> Dict[str, dict]:
+    stats: Dict[str, dict] = {}
+    for source, hist in sorted(_histograms.items()):
+        p50, p95, p99 = (hist.percentile(q) for q in (0.5, 0.95, 0.99))
+        stats[source] = {
+            "samples": hist.count(),
+            "p50_ms": int(p50 * 1000) if p50 is not None else None,
+            "p95_ms": int(p95 * 1000) if p95 is not None else None,
+            "p99_ms": int(p99 * 1000) if p99 is not None else None,
+        }
+    return stats
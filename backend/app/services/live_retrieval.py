@@ -1,34 +1,46 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
-from typing import List, Optional
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from urllib.parse import quote_plus
 
 import httpx
+import numpy as np
+
+from .bm25 import BM25Index, tokenize
+from .ecfr_index import EcfrSection, get_ecfr_index
+from .html_text import LII_BODY_TARGETS
+from .http_client import upstream_get, upstream_get_async, upstream_get_text, upstream_get_text_async
+from .passage_scoring import PassageScorer
+from .pattern_index import PatternIndex
+from .query_analysis import AnalyzedQuery, analyze_query
+from .rerank import rerank
+from .retrieval_cache import TTLCache, cached
+from .singleflight import get_flight
+from .statute_store import StatuteStore
+from ..core.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Cold-start timeouts; once a source has enough observed requests its timeout
+# is derived from its own latency histogram (see services/latency.py).
 _TIMEOUT = 15.0
 _OPENSTATES_TIMEOUT = 25.0
 
-# US state names (lowercase) used to detect state jurisdictions
-_US_STATES = {
-    "alabama", "alaska", "arizona", "arkansas", "california", "colorado",
-    "connecticut", "delaware", "florida", "georgia", "hawaii", "idaho",
-    "illinois", "indiana", "iowa", "kansas", "kentucky", "louisiana",
-    "maine", "maryland", "massachusetts", "michigan", "minnesota",
-    "mississippi", "missouri", "montana", "nebraska", "nevada",
-    "new hampshire", "new jersey", "new mexico", "new york",
-    "north carolina", "north dakota", "ohio", "oklahoma", "oregon",
-    "pennsylvania", "rhode island", "south carolina", "south dakota",
-    "tennessee", "texas", "utah", "vermont", "virginia", "washington",
-    "west virginia", "wisconsin", "wyoming",
-}
+# Plain-text budgets for streamed pages; downloads stop once these are reached.
+_FR_TEXT_BUDGET = 400_000
+_LII_TEXT_BUDGET = 100_000
 
+_OPENSTATES_URL = "https://v3.openstates.org/bills"
+_COURTLISTENER_URL = "https://www.courtlistener.com/api/rest/v4/search/"
 
 @dataclass
 class LiveResult:
@@ -44,23 +56,19 @@ def _strip_html(text: str) -> str:
     return re.sub(r"<[^>]+>", "", text).strip()
 
 
-def fetch_ecfr(query: str, max_results: int = 4) -> List[LiveResult]:
-    """Search the eCFR for regulation sections matching the query."""
+def _ecfr_url(query: str, max_results: int) -> str:
     # Fetch extra results to allow deduplication to still yield max_results unique hits
     fetch_count = max_results * 3
-    url = (
+    return (
         f"https://www.ecfr.gov/api/search/v1/results"
         f"?query={quote_plus(query)}&per_page={fetch_count}"
     )
-    try:
-        with httpx.Client(timeout=_TIMEOUT) as client:
-            r = client.get(url)
-            r.raise_for_status()
-            data = r.json()
-    except Exception as exc:
-        logger.warning("eCFR search failed: %s", exc)
-        return []
 
+
+_ECFR_AUTHORITY = "Electronic Code of Federal Regulations (eCFR) / Government Publishing Office"
+
+
+def _parse_ecfr(data: dict, query: str, max_results: int) -> List[LiveResult]:
     results: List[LiveResult] = []
     for item in data.get("results", []):
         hierarchy = item.get("hierarchy", {})
@@ -98,7 +106,7 @@ def fetch_ecfr(query: str, max_results: int = 4) -> List[LiveResult]:
                 title=display_title,
                 url=source_url,
                 citation=citation,
-                authority="Electronic Code of Federal Regulations (eCFR) / Government Publishing Office",
+                authority=_ECFR_AUTHORITY,
                 source="ecfr",
             )
         )
@@ -107,71 +115,285 @@ def fetch_ecfr(query: str, max_results: int = 4) -> List[LiveResult]:
     return results[:max_results]
 
 
-def _fetch_fr_fulltext(body_html_url: str, query: str, max_chars: int = 800) -> str:
-    """Fetch the most relevant excerpt from a Federal Register document's full HTML body."""
+@cached("ecfr")
+def fetch_ecfr(q: AnalyzedQuery, max_results: int = 4) -> List[LiveResult]:
+    """Search the eCFR for regulation sections matching the query."""
+    url = _ecfr_url(q.search_query, max_results)
     try:
-        with httpx.Client(timeout=_TIMEOUT) as client:
-            r = client.get(body_html_url)
-            r.raise_for_status()
+        r = upstream_get(url, timeout=_TIMEOUT, source="ecfr")
+        r.raise_for_status()
+        data = r.json()
     except Exception as exc:
-        logger.debug("FR full-text fetch failed for %s: %s", body_html_url, exc)
-        return ""
+        logger.warning("eCFR search failed: %s", exc)
+        return []
+    return _parse_ecfr(data, q.search_query, max_results)
+
+
+@cached("ecfr")
+async def fetch_ecfr_async(q: AnalyzedQuery, max_results: int = 4) -> List[LiveResult]:
+    """Async variant of `fetch_ecfr`."""
+    url = _ecfr_url(q.search_query, max_results)
+    try:
+        r = await upstream_get_async(url, timeout=_TIMEOUT, source="ecfr")
+        r.raise_for_status()
+        data = r.json()
+    except Exception as exc:
+        logger.warning("eCFR search failed: %s", exc)
+        return []
+    return _parse_ecfr(data, q.search_query, max_results)
+
+
+def _local_ecfr_result(section: EcfrSection, query_words: set) -> LiveResult:
+    passages = PassageScorer(section.text).top_passages(query_words, window=600, max_chars=800, include_short=True)
+    excerpt = passages[0].text if passages and passages[0].score > 0 else section.text[:800]
+    display_title = section.heading or section.citation
+    chapter_label = section.hierarchy.get("chapter", "")
+    if chapter_label and chapter_label not in display_title:
+        display_title = f"{chapter_label} — {display_title}"
+    return LiveResult(
+        text=excerpt,
+        title=display_title,
+        url=section.url,
+        citation=section.citation,
+        authority=_ECFR_AUTHORITY,
+        source="ecfr",
+    )
+
+
+def fetch_ecfr_local(q: AnalyzedQuery, max_results: int = 4, match_all: bool = True) -> Optional[List[LiveResult]]:
+    """Search the local eCFR mirror; None when no title has been ingested.
+
+    With `match_all` only sections containing every query term are returned;
+    otherwise any term matches and bm25 ranking does the rest.
+    """
+    index = get_ecfr_index()
+    if index is None:
+        return None
+    # The state name is appended for the remote search APIs; CFR text rarely names states
+    query = q.search_query
+    if q.is_state:
+        query = re.sub(rf"\b{re.escape(q.state)}\b", " ", query, flags=re.IGNORECASE).strip()
+    try:
+        sections = index.search(query, max_results, match_all=match_all)
+    except sqlite3.Error as exc:
+        logger.warning("Local eCFR search failed: %s", exc)
+        return []
+    query_words = set(re.findall(r"\w+", query.lower())) - {"the", "a", "an", "of", "in", "is", "what", "are", "under"}
+    results = [_local_ecfr_result(section, query_words) for section in sections]
+    logger.warning("Local eCFR returned %d result(s) for query: %r", len(results), query)
+    return results
 
-    text = re.sub(r"<[^>]+>", " ", r.text)
-    text = re.sub(r"\s+", " ", text).strip()
 
+def fetch_regulations(q: AnalyzedQuery, max_results: int = 4) -> List[LiveResult]:
+    """eCFR sections: the local mirror first, then the eCFR search API.
+
+    A local section matching every term wins outright. Otherwise ecfr.gov is
+    asked (when `ecfr_remote_fallback` is on), and if it fails or finds
+    nothing the best partial local matches are used, so an eCFR outage still
+    yields regulation text. Without a local mirror this is just `fetch_ecfr`.
+    """
+    local = fetch_ecfr_local(q, max_results)
+    if local is None:
+        return fetch_ecfr(q, max_results)
+    if local:
+        return local
+    if get_settings().ecfr_remote_fallback:
+        remote = fetch_ecfr(q, max_results)
+        if remote:
+            return remote
+    return fetch_ecfr_local(q, max_results, match_all=False) or []
+
+
+async def fetch_regulations_async(q: AnalyzedQuery, max_results: int = 4) -> List[LiveResult]:
+    """Async variant of `fetch_regulations`; local searches run in a worker thread."""
+    local = await asyncio.to_thread(fetch_ecfr_local, q, max_results)
+    if local is None:
+        return await fetch_ecfr_async(q, max_results)
+    if local:
+        return local
+    if get_settings().ecfr_remote_fallback:
+        remote = await fetch_ecfr_async(q, max_results)
+        if remote:
+            return remote
+    return await asyncio.to_thread(fetch_ecfr_local, q, max_results, False) or []
+
+
+def _best_fr_excerpt(text: str, query: str, max_chars: int) -> str:
+    """Pick the passage of a Federal Register body with the most query-word overlap."""
     # Find the most relevant passage using keyword overlap with the query
     query_words = set(re.findall(r"\w+", query.lower())) - {"the", "a", "an", "of", "in", "is", "what", "are", "under"}
-    best_idx = 0
-    best_score = 0
-    window = 600
-    for i in range(0, len(text) - window, 100):
-        chunk = text[i : i + window].lower()
-        score = sum(1 for w in query_words if w in chunk)
-        if score > best_score:
-            best_score = score
-            best_idx = i
-
-    excerpt = text[best_idx : best_idx + max_chars].strip()
-    return excerpt if best_score > 0 else ""
-
-
-def fetch_federal_register(query: str, max_results: int = 3) -> List[LiveResult]:
-    """Search the Federal Register API for documents matching the query."""
-    url = (
+    passages = PassageScorer(text).top_passages(query_words, window=600, max_chars=max_chars)
+    return passages[0].text if passages and passages[0].score > 0 else ""
+
+
+# Top Federal Register documents that get a full-text excerpt instead of their abstract.
+_FR_FULLTEXT_DOCS = 3
+# Enrichment stops this long before the source's soft budget (or the deadline) runs
+# out, and is not started at all with less than `_FR_MIN_ENRICH_SECONDS` left.
+_FR_ENRICH_MARGIN = 0.5
+_FR_MIN_ENRICH_SECONDS = 0.3
+
+# Published documents do not change, so extracted body text is kept for a week,
+# keyed by document number. Bodies are large; the entry cap bounds memory.
+_FR_TEXT_TTL = 7 * 24 * 3600.0
+_FR_TEXT_CACHE = TTLCache(max_entries=64)
+_FR_TEXTS = get_flight("fetch:federal_register_text")
+
+# Body fetches for the sync path; a separate pool so enrichment never waits on
+# a slot in `_EXECUTOR`, which is running the fetcher that asked for it.
+_FR_TEXT_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fr-fulltext")
+
+
+def _load_fr_text(key: tuple, body_html_url: str) -> str:
+    try:
+        text = upstream_get_text(body_html_url, timeout=_TIMEOUT, max_chars=_FR_TEXT_BUDGET, source="federal_register_text")
+    except Exception as exc:
+        logger.debug("FR full-text fetch failed for %s: %s", body_html_url, exc)
+        return ""
+    if text:
+        _FR_TEXT_CACHE.store(key, text, _FR_TEXT_TTL)
+    return text
+
+
+async def _load_fr_text_async(key: tuple, body_html_url: str) -> str:
+    try:
+        text = await upstream_get_text_async(body_html_url, timeout=_TIMEOUT, max_chars=_FR_TEXT_BUDGET, source="federal_register_text")
+    except Exception as exc:
+        logger.debug("FR full-text fetch failed for %s: %s", body_html_url, exc)
+        return ""
+    if text:
+        _FR_TEXT_CACHE.store(key, text, _FR_TEXT_TTL)
+    return text
+
+
+def _fr_document_text(key: tuple, body_html_url: str) -> str:
+    """Plain text of a Federal Register document body ("" on failure), cached per document."""
+    text, state = _FR_TEXT_CACHE.lookup(key)
+    if state is not None:
+        return text
+    text, _shared = _FR_TEXTS.do(key, _load_fr_text, key, body_html_url)
+    return text
+
+
+async def _fr_document_text_async(key: tuple, body_html_url: str) -> str:
+    text, state = _FR_TEXT_CACHE.lookup(key)
+    if state is not None:
+        return text
+    text, _shared = await _FR_TEXTS.do_async(key, _load_fr_text_async, key, body_html_url)
+    return text
+
+
+def fr_text_cache_stats() -> dict:
+    return _FR_TEXT_CACHE.stats()
+
+
+def _federal_register_url(query: str, max_results: int) -> str:
+    return (
         f"https://www.federalregister.gov/api/v1/documents.json"
         f"?conditions[term]={quote_plus(query)}"
         f"&per_page={max_results}"
         f"&order=relevance"
         f"&fields[]=title&fields[]=abstract&fields[]=html_url&fields[]=citation"
-        f"&fields[]=type&fields[]=body_html_url"
+        f"&fields[]=type&fields[]=body_html_url&fields[]=document_number"
     )
-    try:
-        with httpx.Client(timeout=_TIMEOUT) as client:
-            r = client.get(url)
-            r.raise_for_status()
-            data = r.json()
-    except Exception as exc:
-        logger.warning("Federal Register search failed: %s", exc)
-        return []
 
+
+def _fr_fulltext_targets(items: List[dict]) -> List[Tuple[int, tuple, str]]:
+    """(result index, cache key, body URL) of the top documents that get a full-text excerpt."""
+    targets: List[Tuple[int, tuple, str]] = []
+    for idx, item in enumerate(items):
+        if len(targets) >= _FR_FULLTEXT_DOCS:
+            break
+        if not (item.get("abstract") or "").strip() and not (item.get("title") or "").strip():
+            continue
+        body_url = item.get("body_html_url") or ""
+        if body_url:
+            targets.append((idx, ("federal_register_text", item.get("document_number") or body_url), body_url))
+    return targets
+
+
+def _fr_enrich_budget(started: float) -> float:
+    """Seconds left for full-text enrichment of a search that started at `started`."""
+    limit = min(_SOURCE_BUDGETS["fr"], get_settings().retrieval_deadline_seconds) - _FR_ENRICH_MARGIN
+    return limit - (time.monotonic() - started)
+
+
+def _fr_excerpts(texts: Dict[int, str], query: str) -> Dict[int, str]:
+    """Best passage of each fetched body; the top document gets a longer one."""
+    first = min(texts, default=None)
+    excerpts: Dict[int, str] = {}
+    for idx, text in texts.items():
+        excerpt = _best_fr_excerpt(text, query, 1200 if idx == first else 800) if text else ""
+        if excerpt:
+            excerpts[idx] = excerpt
+    return excerpts
+
+
+def _enrich_federal_register(items: List[dict], query: str, started: float) -> Dict[int, str]:
+    """Full-text excerpts for the top documents, fetched concurrently within the budget.
+
+    Cached bodies are always used. Bodies not yet cached are fetched in
+    parallel only if enough of the budget is left, and only for as long as
+    it lasts; fetches still running then finish in the background and warm
+    the cache, and their documents keep the abstract this time.
+    """
+    texts: Dict[int, str] = {}
+    missing: List[Tuple[int, tuple, str]] = []
+    for idx, key, body_url in _fr_fulltext_targets(items):
+        text, state = _FR_TEXT_CACHE.lookup(key)
+        if state is not None:
+            texts[idx] = text
+        else:
+            missing.append((idx, key, body_url))
+
+    budget = _fr_enrich_budget(started)
+    if missing and budget < _FR_MIN_ENRICH_SECONDS:
+        logger.info("Skipping Federal Register full text for %d document(s): %.2fs left", len(missing), budget)
+    elif missing:
+        futures = {_FR_TEXT_POOL.submit(_fr_document_text, key, body_url): idx for idx, key, body_url in missing}
+        done, _pending = wait(futures, timeout=budget)
+        for future in done:
+            texts[futures[future]] = future.result()
+    return _fr_excerpts(texts, query)
+
+
+async def _enrich_federal_register_async(items: List[dict], query: str, started: float) -> Dict[int, str]:
+    """Async variant of `_enrich_federal_register`."""
+    texts: Dict[int, str] = {}
+    missing: List[Tuple[int, tuple, str]] = []
+    for idx, key, body_url in _fr_fulltext_targets(items):
+        text, state = _FR_TEXT_CACHE.lookup(key)
+        if state is not None:
+            texts[idx] = text
+        else:
+            missing.append((idx, key, body_url))
+
+    budget = _fr_enrich_budget(started)
+    if missing and budget < _FR_MIN_ENRICH_SECONDS:
+        logger.info("Skipping Federal Register full text for %d document(s): %.2fs left", len(missing), budget)
+    elif missing:
+        tasks = {asyncio.ensure_future(_fr_document_text_async(key, body_url)): idx for idx, key, body_url in missing}
+        done, pending = await asyncio.wait(tasks, timeout=budget)
+        for task in done:
+            texts[tasks[task]] = task.result()
+        for task in pending:
+            _abandoned_tasks.add(task)
+            task.add_done_callback(_abandoned_tasks.discard)
+    return _fr_excerpts(texts, query)
+
+
+def _parse_federal_register(items: List[dict], query: str, excerpts: Optional[Dict[int, str]] = None) -> List[LiveResult]:
     results: List[LiveResult] = []
-    items = data.get("results", [])
+    excerpts = excerpts or {}
     for idx, item in enumerate(items):
         abstract = (item.get("abstract") or "").strip()
         title = (item.get("title") or "").strip()
         if not abstract and not title:
             continue
 
-        # For the top result, also fetch full text to surface specific figures/details
-        full_excerpt = ""
-        if idx == 0:
-            body_url = item.get("body_html_url", "")
-            if body_url:
-                full_excerpt = _fetch_fr_fulltext(body_url, query, max_chars=1200)
-
-        if full_excerpt:
-            text = f"Title: {title}\n\nKey text: {full_excerpt}"
+        # Enriched documents carry a full-text excerpt to surface specific figures/details
+        if excerpts.get(idx):
+            text = f"Title: {title}\n\nKey text: {excerpts[idx]}"
         elif abstract:
             text = f"Title: {title}\n\nAbstract: {abstract}"
         else:
@@ -192,39 +414,69 @@ def fetch_federal_register(query: str, max_results: int = 3) -> List[LiveResult]
     return results
 
 
-def fetch_openstates(query: str, state: str, max_results: int = 3) -> List[LiveResult]:
-    """Search the OpenStates v3 API for state bills matching the query."""
-    api_key = os.environ.get("OPENSTATES_API_KEY", "").strip()
-    if not api_key:
-        logger.warning("OPENSTATES_API_KEY not set — skipping state legislation search")
+@cached("federal_register")
+def _search_federal_register(q: AnalyzedQuery, max_results: int) -> List[dict]:
+    """Raw Federal Register search hits. Only the search is cached here;
+    full-text excerpts come from the per-document text cache on every call."""
+    url = _federal_register_url(q.search_query, max_results)
+    try:
+        r = upstream_get(url, timeout=_TIMEOUT, source="federal_register")
+        r.raise_for_status()
+        return r.json().get("results", [])
+    except Exception as exc:
+        logger.warning("Federal Register search failed: %s", exc)
         return []
 
-    params = {
+
+@cached("federal_register")
+async def _search_federal_register_async(q: AnalyzedQuery, max_results: int) -> List[dict]:
+    url = _federal_register_url(q.search_query, max_results)
+    try:
+        r = await upstream_get_async(url, timeout=_TIMEOUT, source="federal_register")
+        r.raise_for_status()
+        return r.json().get("results", [])
+    except Exception as exc:
+        logger.warning("Federal Register search failed: %s", exc)
+        return []
+
+
+def fetch_federal_register(q: AnalyzedQuery, max_results: int = 3) -> List[LiveResult]:
+    """Search the Federal Register API for documents matching the query.
+
+    The top `_FR_FULLTEXT_DOCS` documents get a full-text excerpt in place
+    of their abstract, fetched concurrently within the source's time budget.
+    """
+    started = time.monotonic()
+    items = _search_federal_register(q, max_results)
+    return _parse_federal_register(items, q.search_query, _enrich_federal_register(items, q.search_query, started))
+
+
+async def fetch_federal_register_async(q: AnalyzedQuery, max_results: int = 3) -> List[LiveResult]:
+    """Async variant of `fetch_federal_register`."""
+    started = time.monotonic()
+    items = await _search_federal_register_async(q, max_results)
+    return _parse_federal_register(
+        items, q.search_query, await _enrich_federal_register_async(items, q.search_query, started)
+    )
+
+
+def _openstates_params(query: str, state: str, max_results: int) -> dict:
+    return {
         "jurisdiction": state,
         "q": query,
         "per_page": max_results,
         "include": "abstracts",
     }
-    try:
-        with httpx.Client(timeout=_OPENSTATES_TIMEOUT, headers={"X-API-KEY": api_key}) as client:
-            r = client.get("https://v3.openstates.org/bills", params=params)
-            logger.info(
-                "OpenStates request URL: %s | status: %d",
-                r.url,
-                r.status_code,
-            )
-            if r.status_code == 401:
-                logger.error("OpenStates API key rejected (401). Verify key at open.pluralpolicy.com")
-                return []
-            r.raise_for_status()
-            data = r.json()
-    except httpx.HTTPStatusError as exc:
-        logger.warning("OpenStates HTTP error for %r: %s", state, exc)
-        return []
-    except Exception as exc:
-        logger.warning("OpenStates search failed for %r: %s", state, exc)
-        return []
 
+
+def _openstates_api_key() -> str:
+    api_key = os.environ.get("OPENSTATES_API_KEY", "").strip()
+    if not api_key:
+        logger.warning("OPENSTATES_API_KEY not set — skipping state legislation search")
+    return api_key
+
+
+def _parse_openstates(data: dict, query: str, state: str) -> List[LiveResult]:
     results: List[LiveResult] = []
     for item in data.get("results", []):
         identifier = item.get("identifier", "")
@@ -258,6 +510,79 @@ def fetch_openstates(query: str, state: str, max_results: int = 3) -> List[LiveR
     return results
 
 
+def _openstates_data(r: httpx.Response) -> Optional[dict]:
+    logger.info(
+        "OpenStates request URL: %s | status: %d",
+        r.url,
+        r.status_code,
+    )
+    if r.status_code == 401:
+        logger.error("OpenStates API key rejected (401). Verify key at open.pluralpolicy.com")
+        return None
+    r.raise_for_status()
+    return r.json()
+
+
+@cached("openstates")
+def fetch_openstates(q: AnalyzedQuery, max_results: int = 3) -> List[LiveResult]:
+    """Search the OpenStates v3 API for state bills matching the query."""
+    if not q.is_state:
+        return []
+    api_key = _openstates_api_key()
+    if not api_key:
+        return []
+    query, state = q.question, q.state
+
+    try:
+        r = upstream_get(
+            _OPENSTATES_URL,
+            params=_openstates_params(query, state, max_results),
+            headers={"X-API-KEY": api_key},
+            timeout=_OPENSTATES_TIMEOUT,
+            source="openstates",
+        )
+        data = _openstates_data(r)
+    except httpx.HTTPStatusError as exc:
+        logger.warning("OpenStates HTTP error for %r: %s", state, exc)
+        return []
+    except Exception as exc:
+        logger.warning("OpenStates search failed for %r: %s", state, exc)
+        return []
+    if data is None:
+        return []
+    return _parse_openstates(data, query, state)
+
+
+@cached("openstates")
+async def fetch_openstates_async(q: AnalyzedQuery, max_results: int = 3) -> List[LiveResult]:
+    """Async variant of `fetch_openstates`."""
+    if not q.is_state:
+        return []
+    api_key = _openstates_api_key()
+    if not api_key:
+        return []
+    query, state = q.question, q.state
+
+    try:
+        r = await upstream_get_async(
+            _OPENSTATES_URL,
+            params=_openstates_params(query, state, max_results),
+            headers={"X-API-KEY": api_key},
+            timeout=_OPENSTATES_TIMEOUT,
+            source="openstates",
+        )
+        data = _openstates_data(r)
+    except httpx.HTTPStatusError as exc:
+        logger.warning("OpenStates HTTP error for %r: %s", state, exc)
+        return []
+    except Exception as exc:
+        logger.warning("OpenStates search failed for %r: %s", state, exc)
+        return []
+    if data is None:
+        return []
+    return _parse_openstates(data, query, state)
+
+
 # Maps full US state names to CourtListener jurisdiction codes.
 # Each state has at least one supreme court code; appellate codes added where useful.
 _CL_JURISDICTION: dict = {
@@ -314,32 +639,12 @@ _CL_JURISDICTION: dict = {
 }
 
 
-def fetch_courtlistener(query: str, state: str, max_results: int = 3) -> List[LiveResult]:
-    """Search CourtListener for state court opinions relevant to the query.
-
-    CourtListener (Free Law Project) is a free, public API — no key required.
-    State court opinions cite and apply enacted statutes, giving us indirect
-    coverage of state law even when no statute database API is available.
-    """
-    jx_code = _CL_JURISDICTION.get(state.lower(), "")
-    # State name is included in the search query; court filter is omitted so
-    # CourtListener's own relevance ranking selects the best opinions.
+def _courtlistener_params(q: AnalyzedQuery) -> dict:
+    # State name is included in the search query (see query_analysis); court
+    # filter is omitted so CourtListener's own relevance ranking selects the
+    # best opinions.
     court_param = ""
-
-    # Build the CourtListener query from the user's question.
-    # Strip common question words, keep substantive legal terms (rights, law, etc.).
-    _STOPWORDS = r"\b(what|are|the|is|a|an|of|in|for|how|does|do|under|have|has|been|that|this|those|these|regarding|about|related|rules|rule|i|can|my|your|their|its|will|would|should|could|when|where|which)\b"
-    search_q = re.sub(_STOPWORDS, "", query.lower())
-    search_q = re.sub(r"[?!.,]", "", search_q)
-    search_q = re.sub(r"\s+", " ", search_q).strip()
-
-    # When tenant-related, add "landlord" to disambiguate from unrelated uses
-    # of terms like "security" (e.g. security companies, national security).
-    if "tenant" in search_q and "landlord" not in search_q:
-        search_q = f"landlord {search_q}"
-
-    if state.lower() not in search_q:
-        search_q = f"{search_q} {state}"
+    search_q = q.courtlistener_query
 
     # Fetch a large page so we can filter for results with substantive snippets.
     # Good snippets appear further down CourtListener's ranking for specific topics,
@@ -353,20 +658,10 @@ def fetch_courtlistener(query: str, state: str, max_results: int = 3) -> List[Li
     }
     if court_param:
         params["court"] = court_param.strip()
+    return params
 
-    try:
-        with httpx.Client(timeout=_TIMEOUT) as client:
-            r = client.get(
-                "https://www.courtlistener.com/api/rest/v4/search/",
-                params=params,
-                headers={"User-Agent": "LegalSearchHub/1.0"},
-            )
-            r.raise_for_status()
-            data = r.json()
-    except Exception as exc:
-        logger.warning("CourtListener search failed for %r: %s", state, exc)
-        return []
 
+def _parse_courtlistener(data: dict, state: str, search_q: str, max_results: int) -> List[LiveResult]:
     # Patterns that indicate a snippet is just a filing header, not legal substance
     _HEADER_PATTERNS = re.compile(
         r"^(Filed \d|CERTIFIED FOR|IN THE COURT OF|APPELLATE DIVISION|COURT OF APPEAL|"
@@ -424,6 +719,45 @@ def fetch_courtlistener(query: str, state: str, max_results: int = 3) -> List[Li
     return combined
 
 
+@cached("courtlistener")
+def fetch_courtlistener(q: AnalyzedQuery, max_results: int = 3) -> List[LiveResult]:
+    """Search CourtListener for state court opinions relevant to the query.
+
+    CourtListener (Free Law Project) is a free, public API — no key required.
+    State court opinions cite and apply enacted statutes, giving us indirect
+    coverage of state law even when no statute database API is available.
+    """
+    if not q.is_state:
+        return []
+    state = q.state
+    params = _courtlistener_params(q)
+    try:
+        r = upstream_get(_COURTLISTENER_URL, params=params, timeout=_TIMEOUT, source="courtlistener")
+        r.raise_for_status()
+        data = r.json()
+    except Exception as exc:
+        logger.warning("CourtListener search failed for %r: %s", state, exc)
+        return []
+    return _parse_courtlistener(data, state, params["q"], max_results)
+
+
+@cached("courtlistener")
+async def fetch_courtlistener_async(q: AnalyzedQuery, max_results: int = 3) -> List[LiveResult]:
+    """Async variant of `fetch_courtlistener`."""
+    if not q.is_state:
+        return []
+    state = q.state
+    params = _courtlistener_params(q)
+    try:
+        r = await upstream_get_async(_COURTLISTENER_URL, params=params, timeout=_TIMEOUT, source="courtlistener")
+        r.raise_for_status()
+        data = r.json()
+    except Exception as exc:
+        logger.warning("CourtListener search failed for %r: %s", state, exc)
+        return []
+    return _parse_courtlistener(data, state, params["q"], max_results)
+
+
 
 # ---------------------------------------------------------------------------
 # Keyword → US Code section mapping.
@@ -768,104 +1102,177 @@ _STATUTE_MAP = [
 ]
 
 
-def _fetch_lii_section(url: str, query: str, max_chars: int = 1000) -> str:
-    """Fetch a Cornell LII US Code page and extract the most relevant text."""
-    try:
-        with httpx.Client(timeout=_TIMEOUT, follow_redirects=True,
-                          headers={"User-Agent": "LegalSearchHub/1.0"}) as client:
-            r = client.get(url)
-            r.raise_for_status()
-    except Exception as exc:
-        logger.warning("LII fetch failed for %s: %s", url, exc)
-        return ""
-
-    # Strip HTML tags
-    text = re.sub(r"<[^>]+>", " ", r.text)
-    text = re.sub(r"\s+", " ", text).strip()
-
+def _select_lii_passage(text: str, query: str, max_chars: int = 1000) -> str:
+    """Pick the most relevant passage of an LII page's plain text."""
     # Find the most relevant passage by keyword overlap
     query_words = set(re.findall(r"\w+", query.lower())) - {
         "the", "a", "an", "of", "in", "is", "what", "are", "under", "my", "rights", "how",
     }
-    best_idx = 0
-    best_score = -1
-    window = 800
-    for i in range(0, max(1, len(text) - window), 100):
-        chunk = text[i: i + window].lower()
-        score = sum(1 for w in query_words if w in chunk)
-        if score > best_score:
-            best_score = score
-            best_idx = i
-
     # Always anchor on the first statutory provision marker if found
+    lowered = text.lower()
     for marker in ("it shall be unlawful", "it shall be an unlawful", "no person shall",
                    "every employer shall", "an employer shall", "it is unlawful"):
-        marker_idx = text.lower().find(marker)
+        marker_idx = lowered.find(marker)
         if marker_idx != -1:
-            best_idx = marker_idx
-            break
+            return text[marker_idx: marker_idx + max_chars].strip()
 
+    passages = PassageScorer(text).top_passages(query_words, window=800, max_chars=max_chars, include_short=True)
+    best_idx = passages[0].start if passages else 0
     return text[best_idx: best_idx + max_chars].strip()
 
 
-def fetch_uscode(query: str, max_results: int = 3) -> List[LiveResult]:
-    """Fetch US Code statute text for common federal statutes by keyword matching.
+def _fetch_lii_page_text(url: str) -> str:
+    """Fetch a Cornell LII US Code page and return its plain text ("" on failure)."""
+    try:
+        return upstream_get_text(url, timeout=_TIMEOUT, max_chars=_LII_TEXT_BUDGET, targets=LII_BODY_TARGETS, source="lii")
+    except Exception as exc:
+        logger.warning("LII fetch failed for %s: %s", url, exc)
+        return ""
+
+
+def _statute_store_path() -> str:
+    db_path = os.path.abspath(get_settings().db_path)
+    return os.path.join(os.path.dirname(db_path), "lii_statutes.json")
+
+
+_LII_STORE = StatuteStore(
+    _statute_store_path(),
+    _fetch_lii_page_text,
+    refresh_interval=get_settings().statute_store_refresh_hours * 3600,
+)
+
+
+def start_statute_store() -> None:
+    """Load persisted LII pages and keep every `_STATUTE_MAP` URL fresh in the background."""
+    _LII_STORE.start(dict.fromkeys(entry[2] for entry in _STATUTE_MAP))
+
+
+def stop_statute_store() -> None:
+    _LII_STORE.stop()
+
+
+def _stored_lii_section(url: str, query: str, max_chars: int = 1000) -> str:
+    """Relevant passage of a pre-fetched LII page; "" until the store has it."""
+    text = _LII_STORE.get(url)
+    return _select_lii_passage(text, query, max_chars) if text else ""
+
+
+# Built once at import: every trigger regex in _STATUTE_MAP, matched in one probe.
+_STATUTE_INDEX = PatternIndex([entry[0] for entry in _STATUTE_MAP])
+
+# BM25 scores below these are treated as no match. The state-topic corpus is
+# far smaller, so its idf (and every score) is lower.
+_STATUTE_MIN_SCORE = 4.0
+_STATE_TOPIC_MIN_SCORE = 1.5
+# A BM25-only match must also share trigger words with the question: two or
+# more distinct ones, or a single one with a score at least this high. A lone
+# generic word ("record", "work") is what the trigger regexes are for, and on
+# its own it pulls in unrelated entries.
+_STATUTE_STRONG_SCORE = 8.0
+_STATE_TOPIC_STRONG_SCORE = 6.0
+_MAX_STATE_TOPICS = 3
+
+
+def _pattern_keywords(pattern: re.Pattern) -> str:
+    """The words of a trigger regex (its hand-picked synonyms), without regex syntax."""
+    return re.sub(r"\\[a-zA-Z]|[^A-Za-z ]", " ", pattern.pattern)
+
 
-    Tries to fetch live text from Cornell LII; falls back to embedded statutory
-    text when the live fetch is unavailable. Covers Civil Rights Act (Title VII,
-    II, VI), ADA, FMLA, FLSA, OSHA, ADEA, Fair Housing Act, Title IX, NLRA, § 1983.
-    No API key required.
+def _trigger_terms(pattern: re.Pattern) -> frozenset:
+    return frozenset(tokenize(_pattern_keywords(pattern)))
+
+
+def _confirmed_by_triggers(query_terms: frozenset, trigger_terms: frozenset, score: float, strong_score: float) -> bool:
+    """Whether a BM25-only hit shares enough trigger words with the question to be trusted."""
+    overlap = len(query_terms & trigger_terms)
+    return overlap >= 2 or (overlap == 1 and score >= strong_score)
+
+
+# Every embedded statute, ranked by trigger words, title, citation and fallback text.
+_STATUTE_RANKER = BM25Index([
+    " ".join((_pattern_keywords(pattern), title_label, citation, fallback_text))
+    for pattern, citation, _url, title_label, fallback_text in _STATUTE_MAP
+])
+_STATUTE_TRIGGER_TERMS = [_trigger_terms(entry[0]) for entry in _STATUTE_MAP]
+
+
+def _match_statutes(query: str, max_results: int) -> List[tuple]:
+    """Return the `_STATUTE_MAP` entries for the query, one per URL.
+
+    Entries whose trigger regex fires come first, in map order; remaining
+    slots go to the best BM25 matches above `_STATUTE_MIN_SCORE` that share
+    trigger words with the question, so a question phrased in words no regex
+    anticipated still finds its statute.
     """
-    results: List[LiveResult] = []
+    query_terms = frozenset(tokenize(query))
+    ranked = [
+        idx
+        for idx, score in _STATUTE_RANKER.top(query, len(_STATUTE_MAP), min_score=_STATUTE_MIN_SCORE)
+        if _confirmed_by_triggers(query_terms, _STATUTE_TRIGGER_TERMS[idx], score, _STATUTE_STRONG_SCORE)
+    ]
+    matches: List[tuple] = []
     seen_urls: set = set()
-
-    for pattern, citation, url, title_label, fallback_text in _STATUTE_MAP:
-        if len(results) >= max_results:
+    for idx in _STATUTE_INDEX.matches(query) + ranked:
+        if len(matches) >= max_results:
             break
-        if not pattern.search(query):
-            continue
+        entry = _STATUTE_MAP[idx]
+        url = entry[2]
         if url in seen_urls:
             continue
         seen_urls.add(url)
+        matches.append(entry)
+    return matches
+
+
+def _uscode_result(entry: tuple, live_text: str) -> LiveResult:
+    _pattern, citation, url, title_label, fallback_text = entry
+    # Always start with the comprehensive embedded fallback so all key provisions
+    # are present in context. Supplement with live LII text when available.
+    if live_text:
+        excerpt = f"{fallback_text}\n\n--- Statutory text (Cornell LII) ---\n{live_text}"
+    else:
+        logger.warning("LII text not in statute store for %s — using embedded statute text", citation)
+        excerpt = fallback_text
+
+    return LiveResult(
+        text=f"{title_label}\n\n{excerpt}",
+        title=title_label,
+        url=url,
+        citation=citation,
+        authority="United States Code — Cornell Legal Information Institute (LII)",
+        source="uscode",
+    )
 
-        # Always start with the comprehensive embedded fallback so all key provisions
-        # are present in context. Supplement with live LII text when available.
-        live_text = _fetch_lii_section(url, query)
-        if live_text:
-            excerpt = f"{fallback_text}\n\n--- Statutory text (Cornell LII) ---\n{live_text}"
-        else:
-            logger.warning("LII fetch unavailable for %s — using embedded statute text", citation)
-            excerpt = fallback_text
 
-        results.append(
-            LiveResult(
-                text=f"{title_label}\n\n{excerpt}",
-                title=title_label,
-                url=url,
-                citation=citation,
-                authority="United States Code — Cornell Legal Information Institute (LII)",
-                source="uscode",
-            )
-        )
+def fetch_uscode(q: AnalyzedQuery, max_results: int = 3) -> List[LiveResult]:
+    """Fetch US Code statute text for common federal statutes by keyword and BM25 matching.
 
+    Live Cornell LII text comes from the pre-warmed statute store, which is
+    refreshed in the background, so this makes no network calls. Falls back
+    to embedded statutory text when a page is not in the store yet. Covers
+    Civil Rights Act (Title VII, II, VI), ADA, FMLA, FLSA, OSHA, ADEA, Fair
+    Housing Act, Title IX, NLRA, § 1983. No API key required.
+    """
+    query = q.question
+    results = [
+        _uscode_result(entry, _stored_lii_section(entry[2], query))
+        for entry in _match_statutes(query, max_results)
+    ]
     logger.warning("US Code returned %d result(s) for query: %r", len(results), query)
     return results
 
 
-def fetch_courtlistener_federal(query: str, max_results: int = 3) -> List[LiveResult]:
-    """Search CourtListener for US federal court opinions (SCOTUS, Circuit, District).
+async def fetch_uscode_async(q: AnalyzedQuery, max_results: int = 3) -> List[LiveResult]:
+    """Async variant of `fetch_uscode`; served from memory, so it never awaits I/O."""
+    return fetch_uscode(q, max_results)
 
-    Covers Supreme Court and all federal appellate/district courts — no API key needed.
-    Adds federal case law to complement eCFR and Federal Register sources.
-    """
-    _STOPWORDS = r"\b(what|are|the|is|a|an|of|in|for|how|does|do|under|have|has|been|that|this|those|these|regarding|about|related|rules|rule|i|can|my|your|their|its|will|would|should|could|when|where|which)\b"
-    search_q = re.sub(_STOPWORDS, "", query.lower())
-    search_q = re.sub(r"[?!.,]", "", search_q)
-    search_q = re.sub(r"\s+", " ", search_q).strip()
+
+def _courtlistener_federal_params(q: AnalyzedQuery) -> dict:
+    search_q = q.courtlistener_query
 
     # Restrict to federal courts: Supreme Court + all Circuit Courts of Appeal
     # scotus = Supreme Court; ca1-ca11, cadc, cafc = Circuit Courts
-    params: dict = {
+    return {
         "q": search_q,
         "type": "o",
         "stat_Precedential": "on",
@@ -874,19 +1281,8 @@ def fetch_courtlistener_federal(query: str, max_results: int = 3) -> List[LiveRe
         "court": "scotus ca1 ca2 ca3 ca4 ca5 ca6 ca7 ca8 ca9 ca10 ca11 cadc cafc",
     }
 
-    try:
-        with httpx.Client(timeout=_TIMEOUT) as client:
-            r = client.get(
-                "https://www.courtlistener.com/api/rest/v4/search/",
-                params=params,
-                headers={"User-Agent": "LegalSearchHub/1.0"},
-            )
-            r.raise_for_status()
-            data = r.json()
-    except Exception as exc:
-        logger.warning("CourtListener federal search failed: %s", exc)
-        return []
 
+def _parse_courtlistener_federal(data: dict, search_q: str, max_results: int) -> List[LiveResult]:
     _HEADER_PATTERNS = re.compile(
         r"^(Filed \d|CERTIFIED FOR|IN THE COURT OF|APPELLATE DIVISION|COURT OF APPEAL|"
         r"SUPERIOR COURT|OSCN Found|J-A\d+|FOR PUBLICATION|NOT FOR PUBLICATION)",
@@ -942,6 +1338,38 @@ def fetch_courtlistener_federal(query: str, max_results: int = 3) -> List[LiveRe
     return combined
 
 
+@cached("courtlistener_federal")
+def fetch_courtlistener_federal(q: AnalyzedQuery, max_results: int = 3) -> List[LiveResult]:
+    """Search CourtListener for US federal court opinions (SCOTUS, Circuit, District).
+
+    Covers Supreme Court and all federal appellate/district courts — no API key needed.
+    Adds federal case law to complement eCFR and Federal Register sources.
+    """
+    params = _courtlistener_federal_params(q)
+    try:
+        r = upstream_get(_COURTLISTENER_URL, params=params, timeout=_TIMEOUT, source="courtlistener_federal")
+        r.raise_for_status()
+        data = r.json()
+    except Exception as exc:
+        logger.warning("CourtListener federal search failed: %s", exc)
+        return []
+    return _parse_courtlistener_federal(data, params["q"], max_results)
+
+
+@cached("courtlistener_federal")
+async def fetch_courtlistener_federal_async(q: AnalyzedQuery, max_results: int = 3) -> List[LiveResult]:
+    """Async variant of `fetch_courtlistener_federal`."""
+    params = _courtlistener_federal_params(q)
+    try:
+        r = await upstream_get_async(_COURTLISTENER_URL, params=params, timeout=_TIMEOUT, source="courtlistener_federal")
+        r.raise_for_status()
+        data = r.json()
+    except Exception as exc:
+        logger.warning("CourtListener federal search failed: %s", exc)
+        return []
+    return _parse_courtlistener_federal(data, params["q"], max_results)
+
+
 # ---------------------------------------------------------------------------
 # State statute static content — official sources for common state law topics.
 # Keyed by (state_lower, topic_pattern). No API key or network call required.
@@ -1110,23 +1538,77 @@ _STATE_TOPIC_MAP: List[tuple] = [
 ]
 
 
-def fetch_state_statutes(question: str, state: str) -> List[LiveResult]:
+def _build_state_topic_index() -> Dict[str, Tuple[List[int], PatternIndex]]:
+    """Per-state index: the topics with content for that state and a matcher over them."""
+    by_state: Dict[str, List[int]] = {}
+    for topic_idx, (_pattern, state_map, _label, _url) in enumerate(_STATE_TOPIC_MAP):
+        for state_lower in state_map:
+            by_state.setdefault(state_lower, []).append(topic_idx)
+    return {
+        state_lower: (topic_ids, PatternIndex([_STATE_TOPIC_MAP[i][0] for i in topic_ids]))
+        for state_lower, topic_ids in by_state.items()
+    }
+
+
+_STATE_TOPIC_INDEX = _build_state_topic_index()
+
+
+def _build_state_topic_ranker() -> Tuple[BM25Index, List[int], Dict[str, np.ndarray]]:
+    """BM25 over every (topic, state) text, the topic of each document, and a mask per state."""
+    documents: List[str] = []
+    doc_topics: List[int] = []
+    doc_states: List[str] = []
+    for topic_idx, (pattern, state_map, topic_label, _url) in enumerate(_STATE_TOPIC_MAP):
+        for state_lower, (text, citation, _state_url, title) in state_map.items():
+            documents.append(" ".join((_pattern_keywords(pattern), topic_label, title, citation, text)))
+            doc_topics.append(topic_idx)
+            doc_states.append(state_lower)
+    states = np.array(doc_states)
+    masks = {state_lower: states == state_lower for state_lower in set(doc_states)}
+    return BM25Index(documents), doc_topics, masks
+
+
+_STATE_TOPIC_RANKER, _STATE_TOPIC_DOC_TOPICS, _STATE_TOPIC_MASKS = _build_state_topic_ranker()
+_STATE_TOPIC_TRIGGER_TERMS = [_trigger_terms(entry[0]) for entry in _STATE_TOPIC_MAP]
+
+
+def fetch_state_statutes(q: AnalyzedQuery) -> List[LiveResult]:
     """Return static official-source content for common state law topics.
 
     Uses pre-authored authoritative content drawn from state statutes and
     official government websites. No API key or network call required.
     Covers LLC formation, landlord-tenant, workers' comp for major states.
+    Topics whose trigger regex fires are always returned; BM25 matches above
+    `_STATE_TOPIC_MIN_SCORE` that share trigger words with the question fill
+    up to `_MAX_STATE_TOPICS`.
     """
+    if not q.is_state:
+        return []
+    question, state = q.question, q.state
     state_lower = state.lower()
     results: List[LiveResult] = []
 
-    for pattern, state_map, topic_label, _default_url in _STATE_TOPIC_MAP:
-        if not pattern.search(question):
-            continue
-        entry = state_map.get(state_lower)
-        if not entry:
-            continue
-        text, citation, url, title = entry
+    topic_ids, index = _STATE_TOPIC_INDEX.get(state_lower, ((), None))
+    matched = [topic_ids[i] for i in index.matches(question)] if index is not None else []
+    mask = _STATE_TOPIC_MASKS.get(state_lower)
+    if mask is not None and len(matched) < _MAX_STATE_TOPICS:
+        # Every document for the state contains its name, so it would only add noise
+        topic_query = re.sub(rf"\b{re.escape(state)}\b", " ", question, flags=re.IGNORECASE)
+        query_terms = frozenset(tokenize(topic_query))
+        for doc_idx, score in _STATE_TOPIC_RANKER.top(
+            topic_query, _MAX_STATE_TOPICS, min_score=_STATE_TOPIC_MIN_SCORE, mask=mask
+        ):
+            topic_idx = _STATE_TOPIC_DOC_TOPICS[doc_idx]
+            if not _confirmed_by_triggers(
+                query_terms, _STATE_TOPIC_TRIGGER_TERMS[topic_idx], score, _STATE_TOPIC_STRONG_SCORE
+            ):
+                continue
+            if topic_idx not in matched and len(matched) < _MAX_STATE_TOPICS:
+                matched.append(topic_idx)
+
+    for topic_idx in matched:
+        _pattern, state_map, topic_label, _default_url = _STATE_TOPIC_MAP[topic_idx]
+        text, citation, url, title = state_map[state_lower]
         results.append(
             LiveResult(
                 text=text,
@@ -1142,49 +1624,12 @@ def fetch_state_statutes(question: str, state: str) -> List[LiveResult]:
     return results
 
 
-def retrieve_live(
-    question: str,
-    jurisdiction: Optional[str] = None,
-    max_results: int = 7,
-) -> List[LiveResult]:
-    """
-    Query live official sources in parallel and return combined results.
+async def fetch_state_statutes_async(q: AnalyzedQuery) -> List[LiveResult]:
+    """Async variant of `fetch_state_statutes`; served from memory, so it never awaits I/O."""
+    return fetch_state_statutes(q)
 
-    For US Federal: searches eCFR and Federal Register concurrently.
-    For a US state: searches both sources with the state name added to the
-    query so HUD, FTC, and other federal regulations that apply to states
-    are retrieved alongside CourtListener state case law.
-    All sources run in parallel — slow or failing sources are skipped
-    without blocking the response.
-    """
-    # Strip surrounding quotes users may type (e.g. "What is X?" → What is X?)
-    # Quoted phrases break eCFR/Federal Register Lucene search with zero results
-    question = question.strip().strip('"\'')
-
-    is_state = (
-        jurisdiction is not None
-        and jurisdiction.upper() not in ("US", "US FEDERAL")
-        and jurisdiction.lower() in _US_STATES
-    )
-
-    # Strip common question words to produce a keyword-focused search query.
-    # This improves eCFR/Federal Register relevance vs sending the full question sentence.
-    _STOPWORDS = re.compile(
-        r"\b(what|does|do|is|are|the|a|an|of|in|for|how|under|have|has|been|that|"
-        r"this|those|these|about|related|i|can|my|your|their|its|will|would|should|"
-        r"could|when|where|which|say|says|said|tell|me|us)\b",
-        re.IGNORECASE,
-    )
-    keywords = re.sub(_STOPWORDS, " ", question)
-    keywords = re.sub(r"[?!.,]", " ", keywords)
-    keywords = re.sub(r"\s+", " ", keywords).strip()
-    # Fall back to full question if keyword extraction strips too much
-    search_query = keywords if len(keywords) > 10 else question
 
-    # For state queries, embed the state name so federal APIs return state-relevant results
-    query = f"{search_query} {jurisdiction}" if is_state else search_query
-
-    combined: List[LiveResult] = []
+def _make_dedup():
     seen_citations: set = set()
 
     def _dedup(results: List[LiveResult]) -> List[LiveResult]:
@@ -1196,50 +1641,413 @@ def retrieve_live(
                 unique.append(r)
         return unique
 
-    # Run fetch_uscode and fetch_state_statutes synchronously first so their
-    # results are guaranteed slots in the final list — they complete instantly
-    # (no network I/O for state_statutes; fast local pattern match for uscode
-    # before the optional LII HTTP call) and must not be crowded out by slower
-    # API sources filling the max_results cap before they complete.
-    uscode_results = _dedup(fetch_uscode(question, 3))
-    combined.extend(uscode_results)
-    logger.warning("Source 'uscode' (priority) returned %d unique result(s)", len(uscode_results))
-
-    if is_state:
-        state_statute_results = _dedup(fetch_state_statutes(question, jurisdiction))
-        combined.extend(state_statute_results)
-        logger.warning("Source 'state_statute' (priority) returned %d unique result(s)", len(state_statute_results))
-
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        if is_state:
-            futures = {
-                executor.submit(fetch_ecfr, query, 3): "ecfr",
-                executor.submit(fetch_federal_register, query, 2): "fr",
-                executor.submit(fetch_courtlistener, question, jurisdiction, 3): "courtlistener",
-                executor.submit(fetch_openstates, question, jurisdiction, 3): "openstates",
-            }
-        else:
-            futures = {
-                executor.submit(fetch_ecfr, query, 3): "ecfr",
-                executor.submit(fetch_federal_register, query, 2): "fr",
-                executor.submit(fetch_courtlistener_federal, question, 3): "courtlistener_federal",
-            }
-
-        try:
-            for future in as_completed(futures, timeout=30):
-                name = futures[future]
-                try:
-                    results = _dedup(future.result())
-                    combined.extend(results)
-                    logger.warning("Source %r returned %d unique result(s)", name, len(results))
-                except Exception as exc:
-                    logger.warning("Source %r failed: %s", name, exc)
-        except Exception as exc:
-            logger.warning("Parallel retrieval timed out or failed: %s", exc)
+    return _dedup
+
+
+# Soft time budget per network source, in seconds from the start of retrieval.
+# Once every still-pending source is past its budget and at least one result is
+# in hand, retrieval returns without them. `retrieval_deadline_seconds` in
+# settings is the hard cap regardless of results. Priority sources have no
+# soft budget: they are always waited for up to the deadline.
+_SOURCE_BUDGETS = {
+    "ecfr": 4.0,
+    "fr": 5.0,
+    "courtlistener": 6.0,
+    "courtlistener_federal": 6.0,
+    "openstates": 6.0,
+}
+
+# Sources are asked for more results than are sent to the LLM; the reranker
+# picks the best `max_results`. Waiting stops early only once this many times
+# `max_results` candidates are in and no priority source is outstanding.
+_CANDIDATE_FACTOR = 2
+
+# Shared pool for the sync path. Sources that miss the deadline keep running
+# here in the background and still populate the result cache when they finish.
+_EXECUTOR = ThreadPoolExecutor(max_workers=32, thread_name_prefix="live-retrieval")
+
+# Strong references to async sources abandoned at the deadline.
+_abandoned_tasks: set = set()
+
+
+@dataclass
+class RetrievalReport:
+    """What a `retrieve_live*` call did; pass one in to have it filled."""
+    sources: Dict[str, int] = field(default_factory=dict)
+    dropped: List[str] = field(default_factory=list)
+    elapsed_ms: int = 0
+    # True when this call joined an identical retrieval already in flight
+    coalesced: bool = False
+
+
+@dataclass
+class _Source:
+    name: str
+    fetch: Callable[..., List[LiveResult]]
+    fetch_async: Callable[..., Awaitable[List[LiveResult]]]
+    args: tuple
+    priority: bool = False
+
+
+def _sources(q: AnalyzedQuery) -> List[_Source]:
+    """Every source for a question, in merge order (priority sources first)."""
+    sources = [_Source("uscode", fetch_uscode, fetch_uscode_async, (q, 3), priority=True)]
+    if q.is_state:
+        sources.append(_Source("state_statute", fetch_state_statutes, fetch_state_statutes_async, (q,), priority=True))
+    sources += [
+        _Source("ecfr", fetch_regulations, fetch_regulations_async, (q, 5)),
+        _Source("fr", fetch_federal_register, fetch_federal_register_async, (q, 3)),
+    ]
+    if q.is_state:
+        sources += [
+            _Source("courtlistener", fetch_courtlistener, fetch_courtlistener_async, (q, 5)),
+            _Source("openstates", fetch_openstates, fetch_openstates_async, (q, 5)),
+        ]
+    else:
+        sources.append(
+            _Source("courtlistener_federal", fetch_courtlistener_federal, fetch_courtlistener_federal_async, (q, 5))
+        )
+    return sources
+
+
+def _merge(sources: List[_Source], results: Dict[str, List[LiveResult]]) -> Tuple[List[LiveResult], Dict[str, int]]:
+    """Combine per-source results in the fixed order of `sources`.
 
+    Duplicates are dropped from the later source (priority sources come
+    first, so they keep theirs), so the candidate set handed to the reranker
+    does not depend on which upstream answered first.
+    """
+    dedup = _make_dedup()
+    merged: List[LiveResult] = []
+    counts: Dict[str, int] = {}
+    for source in sources:
+        if source.name in results:
+            unique = dedup(results[source.name])
+            merged.extend(unique)
+            counts[source.name] = len(unique)
+    return merged, counts
+
+
+def _next_wait(
+    pending: List[_Source],
+    merged_count: int,
+    max_results: int,
+    elapsed: float,
+    deadline: float,
+) -> Optional[float]:
+    """Seconds to wait for the next completion, or None to stop waiting now."""
+    if elapsed >= deadline:
+        return None
+    if merged_count >= max_results * _CANDIDATE_FACTOR and not any(s.priority for s in pending):
+        return None
+    open_budgets = [
+        budget
+        for budget in (deadline if s.priority else _SOURCE_BUDGETS.get(s.name, deadline) for s in pending)
+        if budget > elapsed
+    ]
+    if merged_count and not open_budgets:
+        return None
+    return min(open_budgets + [deadline]) - elapsed
+
+
+ProgressCallback = Callable[[dict], None]
+
+
+class _ProgressHub:
+    """Fans one in-flight retrieval's progress events out to every caller sharing it.
+
+    Events are kept, so a caller that joins a coalesced retrieval part-way
+    through is first replayed what it missed.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._events: List[dict] = []
+        self._listeners: List[ProgressCallback] = []
+        self.closed = False
+
+    def subscribe(self, listener: ProgressCallback) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+            missed = list(self._events)
+        for event in missed:
+            _deliver(listener, event)
+
+    def unsubscribe(self, listener: ProgressCallback) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def emit(self, event: dict) -> None:
+        with self._lock:
+            self._events.append(event)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            _deliver(listener, event)
+
+
+def _deliver(listener: ProgressCallback, event: dict) -> None:
+    try:
+        listener(event)
+    except Exception as exc:
+        logger.debug("Progress listener failed: %s", exc)
+
+
+_progress_hubs: Dict[tuple, _ProgressHub] = {}
+_hubs_lock = threading.Lock()
+
+
+def _subscribe(key: tuple, listener: Optional[ProgressCallback]) -> _ProgressHub:
+    """The open hub for `key` (created if needed), with `listener` attached."""
+    with _hubs_lock:
+        hub = _progress_hubs.get(key)
+        if hub is None or hub.closed:
+            hub = _progress_hubs[key] = _ProgressHub()
+    if listener is not None:
+        hub.subscribe(listener)
+    return hub
+
+
+def _close_hub(key: tuple, hub: _ProgressHub) -> None:
+    # Later callers get a fresh hub; current subscribers keep receiving events
+    with _hubs_lock:
+        hub.closed = True
+        if _progress_hubs.get(key) is hub:
+            del _progress_hubs[key]
+
+
+def _finish(
+    sources: List[_Source],
+    results: Dict[str, List[LiveResult]],
+    pending: List[_Source],
+    report: RetrievalReport,
+    started: float,
+    jurisdiction: Optional[str],
+    hub: _ProgressHub,
+) -> List[LiveResult]:
+    """Merge what arrived into the candidate list and record the outcome in `report`."""
+    combined, report.sources = _merge(sources, results)
+    report.dropped = [s.name for s in sources if s in pending]
+    report.elapsed_ms = int((time.monotonic() - started) * 1000)
+    for name in report.dropped:
+        hub.emit({"type": "source_dropped", "source": name, "elapsed_ms": report.elapsed_ms})
+    if report.dropped:
+        logger.warning("Live retrieval returned without source(s) %s after %d ms", report.dropped, report.elapsed_ms)
     logger.info(
-        "Live retrieval: %d total result(s) for jurisdiction=%r",
+        "Live retrieval: %d candidate(s) for jurisdiction=%r",
         len(combined),
         jurisdiction,
     )
-    return combined[:max_results]
+    return combined
+
+
+def _select(
+    q: AnalyzedQuery,
+    sources: List[_Source],
+    report: RetrievalReport,
+    candidates: List[LiveResult],
+    max_results: int,
+) -> List[LiveResult]:
+    """Rerank the merged candidates against the question, drop near-duplicates
+    across sources, and keep the best `max_results`.
+
+    Results from priority sources lead the merged list and are pinned, so
+    they keep their reserved slots whatever the other sources returned.
+    """
+    settings = get_settings()
+    pinned = sum(report.sources.get(s.name, 0) for s in sources if s.priority)
+    embed = None
+    if settings.rerank_embeddings:
+        from .embeddings import embed_texts
+        embed = embed_texts
+    return rerank(
+        q.question,
+        candidates,
+        max_results,
+        pinned=[i < pinned for i in range(len(candidates))],
+        embed=embed,
+        duplicate_threshold=settings.near_duplicate_threshold,
+    )
+
+
+def _source_finished(name: str, started: float, results: Optional[List[LiveResult]]) -> dict:
+    return {
+        "type": "source_finished",
+        "source": name,
+        "status": "ok" if results is not None else "error",
+        "count": len(results) if results is not None else 0,
+        "elapsed_ms": int((time.monotonic() - started) * 1000),
+    }
+
+
+def _retrieve_live(
+    q: AnalyzedQuery, max_results: int, hub: _ProgressHub
+) -> Tuple[List[LiveResult], RetrievalReport]:
+    started = time.monotonic()
+    deadline = get_settings().retrieval_deadline_seconds
+    report = RetrievalReport()
+    sources = _sources(q)
+    futures = {_EXECUTOR.submit(s.fetch, *s.args): s for s in sources}
+    for source in sources:
+        hub.emit({"type": "source_started", "source": source.name})
+    results: Dict[str, List[LiveResult]] = {}
+    pending = set(futures)
+    while pending:
+        merged_count = len(_merge(sources, results)[0])
+        timeout = _next_wait(
+            [futures[f] for f in pending], merged_count, max_results, time.monotonic() - started, deadline
+        )
+        if timeout is None:
+            break
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future].name
+            try:
+                results[name] = future.result()
+                logger.warning("Source %r returned %d result(s)", name, len(results[name]))
+            except Exception as exc:
+                logger.warning("Source %r failed: %s", name, exc)
+            hub.emit(_source_finished(name, started, results.get(name)))
+
+    candidates = _finish(sources, results, [futures[f] for f in pending], report, started, q.jurisdiction, hub)
+    return _select(q, sources, report, candidates, max_results), report
+
+
+async def _retrieve_live_async(
+    q: AnalyzedQuery, max_results: int, hub: _ProgressHub
+) -> Tuple[List[LiveResult], RetrievalReport]:
+    started = time.monotonic()
+    deadline = get_settings().retrieval_deadline_seconds
+    report = RetrievalReport()
+    sources = _sources(q)
+    tasks = {asyncio.ensure_future(s.fetch_async(*s.args)): s for s in sources}
+    for source in sources:
+        hub.emit({"type": "source_started", "source": source.name})
+    results: Dict[str, List[LiveResult]] = {}
+    pending = set(tasks)
+    while pending:
+        merged_count = len(_merge(sources, results)[0])
+        timeout = _next_wait(
+            [tasks[t] for t in pending], merged_count, max_results, time.monotonic() - started, deadline
+        )
+        if timeout is None:
+            break
+        done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            name = tasks[task].name
+            try:
+                results[name] = task.result()
+                logger.warning("Source %r returned %d result(s)", name, len(results[name]))
+            except Exception as exc:
+                logger.warning("Source %r failed: %s", name, exc)
+            hub.emit(_source_finished(name, started, results.get(name)))
+
+    # Stragglers are not cancelled: they finish in the background and warm the result cache
+    for task in pending:
+        _abandoned_tasks.add(task)
+        task.add_done_callback(_abandoned_tasks.discard)
+
+    candidates = _finish(sources, results, [tasks[t] for t in pending], report, started, q.jurisdiction, hub)
+    # Off the loop: optional rerank embeddings are a blocking API call
+    combined = await asyncio.to_thread(_select, q, sources, report, candidates, max_results)
+    return combined, report
+
+
+_RETRIEVALS = get_flight("retrieve_live")
+
+
+def _run_retrieval(key: tuple, q: AnalyzedQuery, max_results: int, hub: _ProgressHub):
+    try:
+        return _retrieve_live(q, max_results, hub)
+    finally:
+        _close_hub(key, hub)
+
+
+async def _run_retrieval_async(key: tuple, q: AnalyzedQuery, max_results: int, hub: _ProgressHub):
+    try:
+        return await _retrieve_live_async(q, max_results, hub)
+    finally:
+        _close_hub(key, hub)
+
+
+def _fill_report(report: Optional[RetrievalReport], source: RetrievalReport, shared: bool) -> None:
+    if report is not None:
+        report.sources = dict(source.sources)
+        report.dropped = list(source.dropped)
+        report.elapsed_ms = source.elapsed_ms
+        report.coalesced = shared
+
+
+def retrieve_live(
+    question: str,
+    jurisdiction: Optional[str] = None,
+    max_results: int = 7,
+    report: Optional[RetrievalReport] = None,
+    on_event: Optional[ProgressCallback] = None,
+) -> List[LiveResult]:
+    """
+    Query live official sources in parallel and return combined results.
+
+    For US Federal: searches eCFR and Federal Register concurrently.
+    For a US state: searches both sources with the state name added to the
+    query so HUD, FTC, and other federal regulations that apply to states
+    are retrieved alongside CourtListener state case law.
+    All sources, including the priority US Code and state statute sources,
+    run concurrently. Retrieval returns as soon as twice `max_results` unique
+    candidates are in (and the priority sources have answered), when every
+    pending source has exceeded its soft budget (and something was found),
+    or at the configured deadline — whichever comes first. Sources still
+    running are left behind and listed in `report.dropped`. The candidates
+    are then reranked against the question (`rerank.rerank`) and the best
+    `max_results` returned, so the result does not depend on arrival order.
+
+    The question is analyzed once (`query_analysis.analyze_query`) and every
+    source consumes that result. Concurrent calls with the same canonical
+    query key and `max_results` share one in-flight retrieval instead of
+    each fanning out to every upstream. Sync and async calls are coalesced
+    separately, so `on_event` only ever sees events from its own path.
+
+    `on_event` receives progress dicts as sources start and finish
+    (`source_started`, `source_finished` with status and count,
+    `source_dropped`); callers sharing a retrieval all receive its events.
+    """
+    q = analyze_query(question, jurisdiction)
+    # Keyed by path too: a sync and an async leader for the same question run
+    # separately, and each hub must only carry its own leader's events
+    key = ("sync", q.key, max_results)
+    hub = _subscribe(key, on_event)
+    try:
+        (combined, leader_report), shared = _RETRIEVALS.do(key, _run_retrieval, key, q, max_results, hub)
+    finally:
+        if on_event is not None:
+            hub.unsubscribe(on_event)
+    _fill_report(report, leader_report, shared)
+    return list(combined)
+
+
+async def retrieve_live_async(
+    question: str,
+    jurisdiction: Optional[str] = None,
+    max_results: int = 7,
+    report: Optional[RetrievalReport] = None,
+    on_event: Optional[ProgressCallback] = None,
+) -> List[LiveResult]:
+    """Async variant of `retrieve_live`.
+
+    Every source runs as a coroutine on the shared `httpx.AsyncClient` pools,
+    so an in-flight chat holds no worker threads while waiting on upstreams.
+    Ordering, priority-slot, deadline, coalescing and progress-event
+    semantics match `retrieve_live`; `on_event` is called on the event loop.
+    """
+    q = analyze_query(question, jurisdiction)
+    key = ("async", q.key, max_results)
+    hub = _subscribe(key, on_event)
+    try:
+        (combined, leader_report), shared = await _RETRIEVALS.do_async(
+            key, _run_retrieval_async, key, q, max_results, hub
+        )
+    finally:
+        if on_event is not None:
+            hub.unsubscribe(on_event)
+    _fill_report(report, leader_report, shared)
+    return list(combined)
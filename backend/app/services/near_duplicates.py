@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import re
+import zlib
+from typing import List, Sequence
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Word 3-grams; short enough that reworded notices still share most shingles.
+_SHINGLE_SIZE = 3
+_NUM_PERM = 64
+# Mersenne prime 2^31 - 1: with a, b below it and 32-bit shingle hashes,
+# a * x + b stays within uint64.
+_PRIME = np.uint64((1 << 31) - 1)
+# Texts with fewer shingles than this are too short to call duplicates reliably.
+_MIN_SHINGLES = 5
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """Distinct 32-bit hashes of the word 3-grams of `text`."""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) < _SHINGLE_SIZE:
+        return np.zeros(0, dtype=np.uint64)
+    # crc32 is stable across processes, unlike hash()
+    h = np.fromiter((zlib.crc32(t.encode()) for t in tokens), dtype=np.uint64, count=len(tokens))
+    # Combine each run of consecutive token hashes into one shingle hash
+    combined = h[: len(h) - _SHINGLE_SIZE + 1].copy()
+    for offset in range(1, _SHINGLE_SIZE):
+        combined = (combined * np.uint64(1_000_003) + h[offset: len(h) - _SHINGLE_SIZE + 1 + offset]) & np.uint64(0xFFFFFFFF)
+    return np.unique(combined)
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, one vectorized pass per text.
+
+    Each of the `num_perm` hash functions is `(a * x + b) mod p`; a text's
+    signature is the minimum of each over its shingle hashes. The fraction of
+    equal signature positions between two texts estimates the Jaccard
+    similarity of their shingle sets.
+    """
+
+    def __init__(self, num_perm: int = _NUM_PERM, seed: int = 1) -> None:
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, text: str) -> np.ndarray:
+        """Signature of `text`, or all-max (matches nothing real) when it is too short."""
+        shingles = shingle_hashes(text)
+        if len(shingles) < _MIN_SHINGLES:
+            return np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        return ((self._a[:, None] * shingles[None, :] + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        return np.stack([self.signature(t) for t in texts]) if texts else np.zeros((0, self.num_perm), dtype=np.uint64)
+
+
+_HASHER = MinHasher()
+
+
+def similarity_matrix(texts: Sequence[str]) -> np.ndarray:
+    """Estimated Jaccard similarity of every pair of texts; 0 where either is too short."""
+    sigs = _HASHER.signatures(texts)
+    sim = (sigs[:, None, :] == sigs[None, :, :]).mean(axis=2)
+    too_short = sigs[:, 0] == np.iinfo(np.uint64).max
+    sim[too_short, :] = 0.0
+    sim[:, too_short] = 0.0
+    return sim
+
+
+def suppress(texts: Sequence[str], order: Sequence[int], pinned: Sequence[bool], threshold: float) -> List[int]:
+    """`order` without the near-duplicates of better-ranked or pinned texts.
+
+    Pinned texts are always kept. Every other text is kept only if its
+    similarity to each text kept so far (pinned ones first, then in `order`)
+    is below `threshold`.
+    """
+    if threshold >= 1.0 or len(texts) < 2:
+        return list(order)
+    sim = similarity_matrix(texts)
+    kept = [i for i in order if pinned[i]]
+    for i in order:
+        if pinned[i]:
+            continue
+        if kept and sim[i, kept].max() >= threshold:
+            continue
+        kept.append(i)
+    kept_set = set(kept)
+    return [i for i in order if i in kept_set]
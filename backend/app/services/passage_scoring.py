@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+@dataclass
+class Passage:
+    start: int
+    score: int
+    text: str
+
+
+class PassageScorer:
+    """Score fixed-size character windows of a page by query-word coverage.
+
+    A window's score is the number of distinct query words that occur in it
+    (as substrings of the lowercased window text), which is exactly what the
+    original sliding-window loop computed. Instead of re-testing every word
+    at every window, the page is lowercased once, each word's occurrence
+    offsets are collected in a single C-level scan, and all windows are
+    scored together with vectorized `searchsorted` counts over those sorted
+    position arrays.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._lower = text.lower()
+        self._positions: Dict[str, np.ndarray] = {}
+
+    def positions(self, word: str) -> np.ndarray:
+        """Sorted start offsets of every occurrence of `word` in the page."""
+        cached = self._positions.get(word)
+        if cached is None:
+            # str.split scans in C; each occurrence starts where the preceding
+            # pieces (plus the occurrences between them) end.
+            pieces = self._lower.split(word)
+            lengths = np.fromiter(map(len, pieces[:-1]), dtype=np.int64, count=len(pieces) - 1)
+            cached = np.cumsum(lengths) + np.arange(len(lengths), dtype=np.int64) * len(word)
+            self._positions[word] = cached
+        return cached
+
+    def window_starts(self, window: int, stride: int = 100, include_short: bool = False) -> np.ndarray:
+        """Start offsets of the windows that are scored.
+
+        Matches `range(0, len(text) - window, stride)`; with `include_short`
+        a page no longer than one window still gets a single window at 0.
+        """
+        stop = len(self.text) - window
+        if include_short:
+            stop = max(1, stop)
+        return np.arange(0, max(0, stop), stride, dtype=np.int64)
+
+    def score_windows(self, words: Iterable[str], starts: np.ndarray, window: int) -> np.ndarray:
+        scores = np.zeros(len(starts), dtype=np.int64)
+        if not len(starts):
+            return scores
+        for word in set(words):
+            pos = self.positions(word)
+            if not len(pos):
+                continue
+            # An occurrence counts when it lies entirely inside [start, start + window)
+            lo = np.searchsorted(pos, starts, side="left")
+            hi = np.searchsorted(pos, starts + (window - len(word)), side="right")
+            scores += hi > lo
+        return scores
+
+    def top_passages(
+        self,
+        words: Iterable[str],
+        window: int,
+        k: int = 1,
+        max_chars: int = 800,
+        stride: int = 100,
+        include_short: bool = False,
+    ) -> List[Passage]:
+        """Up to `k` highest-scoring, non-overlapping passages, best first.
+
+        Ties go to the earlier window, as in the original loop.
+        """
+        starts = self.window_starts(window, stride, include_short)
+        if not len(starts):
+            return []
+        scores = self.score_windows(words, starts, window)
+        # Stable sort on -score keeps earlier windows first among equals
+        order = np.argsort(-scores, kind="stable")
+        chosen: List[Passage] = []
+        for i in order:
+            start = int(starts[i])
+            if any(abs(start - p.start) < window for p in chosen):
+                continue
+            chosen.append(Passage(start=start, score=int(scores[i]), text=self.text[start: start + max_chars].strip()))
+            if len(chosen) >= k:
+                break
+        return chosen
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Sequence, Set
+
+try:
+    from re import _parser as sre_parse  # type: ignore[attr-defined]  # Python 3.11+
+    from re import _constants as sre_constants  # type: ignore[attr-defined]
+except ImportError:  # pragma: no cover - Python < 3.11
+    import sre_parse  # type: ignore[no-redef]
+    import sre_constants  # type: ignore[no-redef]
+
+_LITERAL = sre_constants.LITERAL
+_SUBPATTERN = sre_constants.SUBPATTERN
+_BRANCH = sre_constants.BRANCH
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+
+# Literals shorter than this match too much text to be a useful filter.
+_MIN_TRIGGER_LEN = 3
+
+
+def _required_literals(seq) -> Optional[Set[str]]:
+    """Return literals at least one of which occurs in every match of `seq`.
+
+    Walks the parsed regex; each literal run, required group or fully-covered
+    alternation is a candidate, and the most selective candidate wins. Returns
+    None when no such set can be derived (the pattern is then always checked).
+    """
+    candidates: List[Set[str]] = []
+    run: List[str] = []
+
+    def flush() -> None:
+        if run:
+            candidates.append({"".join(run).lower()})
+            run.clear()
+
+    for op, av in seq:
+        if op is _LITERAL:
+            run.append(chr(av))
+            continue
+        flush()
+        if op is _SUBPATTERN:
+            sub = _required_literals(av[-1])
+            if sub:
+                candidates.append(sub)
+        elif op is _BRANCH:
+            subs = [_required_literals(branch) for branch in av[1]]
+            if all(subs):
+                candidates.append(set().union(*subs))
+        elif op in _REPEATS and av[0] >= 1:
+            sub = _required_literals(av[2])
+            if sub:
+                candidates.append(sub)
+    flush()
+
+    candidates = [c for c in candidates if min(len(s) for s in c) >= _MIN_TRIGGER_LEN]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda c: (min(len(s) for s in c), -len(c)))
+
+
+class PatternIndex:
+    """Match a text against many regexes, returning every pattern that fires.
+
+    Each pattern is reduced to a set of trigger literals (one of which must
+    appear in any match) and indexed by literal. A query lowercases the text
+    once, probes the distinct literals with C-level substring checks, and runs
+    the full regex only for patterns whose trigger was seen. Cost therefore
+    grows with the number of distinct triggers, not with the number of
+    regexes, and questions that mention none of them are rejected without any
+    regex work.
+    """
+
+    def __init__(self, patterns: Sequence[re.Pattern]) -> None:
+        self.patterns = list(patterns)
+        self._by_literal: Dict[str, List[int]] = {}
+        self._always: List[int] = []
+        for idx, pattern in enumerate(self.patterns):
+            try:
+                triggers = _required_literals(sre_parse.parse(pattern.pattern, pattern.flags))
+            except Exception:
+                triggers = None
+            if not triggers:
+                self._always.append(idx)
+                continue
+            for literal in triggers:
+                self._by_literal.setdefault(literal, []).append(idx)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def matches(self, text: str) -> List[int]:
+        """Indices of all patterns that match `text`, in pattern order."""
+        lowered = text.lower()
+        candidates = set(self._always)
+        for literal, ids in self._by_literal.items():
+            if literal in lowered:
+                candidates.update(ids)
+        return [idx for idx in sorted(candidates) if self.patterns[idx].search(text)]
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+
+# US state names (lowercase) used to detect state jurisdictions
+US_STATES: FrozenSet[str] = frozenset({
+    "alabama", "alaska", "arizona", "arkansas", "california", "colorado",
+    "connecticut", "delaware", "florida", "georgia", "hawaii", "idaho",
+    "illinois", "indiana", "iowa", "kansas", "kentucky", "louisiana",
+    "maine", "maryland", "massachusetts", "michigan", "minnesota",
+    "mississippi", "missouri", "montana", "nebraska", "nevada",
+    "new hampshire", "new jersey", "new mexico", "new york",
+    "north carolina", "north dakota", "ohio", "oklahoma", "oregon",
+    "pennsylvania", "rhode island", "south carolina", "south dakota",
+    "tennessee", "texas", "utah", "vermont", "virginia", "washington",
+    "west virginia", "wisconsin", "wyoming",
+})
+
+# Question words stripped to produce the eCFR / Federal Register keyword query.
+_KEYWORD_STOPWORD_LIST = (
+    "what", "does", "do", "is", "are", "the", "a", "an", "of", "in", "for", "how", "under",
+    "have", "has", "been", "that", "this", "those", "these", "about", "related", "i", "can",
+    "my", "your", "their", "its", "will", "would", "should", "could", "when", "where",
+    "which", "say", "says", "said", "tell", "me", "us",
+)
+# CourtListener keeps "say"/"tell"/"me"/"us" but also drops "regarding" and
+# "rule(s)", which match far too many opinions.
+_COURTLISTENER_STOPWORD_LIST = (
+    "what", "are", "the", "is", "a", "an", "of", "in", "for", "how", "does", "do", "under",
+    "have", "has", "been", "that", "this", "those", "these", "regarding", "about", "related",
+    "rules", "rule", "i", "can", "my", "your", "their", "its", "will", "would", "should",
+    "could", "when", "where", "which",
+)
+
+_KEYWORD_STOPWORDS = re.compile(r"\b(" + "|".join(_KEYWORD_STOPWORD_LIST) + r")\b", re.IGNORECASE)
+# Applied to the lowercased question, as the CourtListener query always was
+_COURTLISTENER_STOPWORDS = re.compile(r"\b(" + "|".join(_COURTLISTENER_STOPWORD_LIST) + r")\b")
+
+_PUNCT = re.compile(r"[?!.,]")
+_WS = re.compile(r"\s+")
+_TOKEN = re.compile(r"[a-z0-9§]+")
+
+# Words ignored by the canonical key.
+_KEY_STOPWORDS = frozenset(_KEYWORD_STOPWORD_LIST) | frozenset(_COURTLISTENER_STOPWORD_LIST)
+
+# A keyword query shorter than this has lost too much; the full question is used.
+_MIN_KEYWORD_CHARS = 10
+
+
+@dataclass(frozen=True)
+class AnalyzedQuery:
+    """Everything the live sources need from one chat question, derived once.
+
+    `key` is canonical and order-insensitive: questions that differ only in
+    case, punctuation, stopwords or word order share it, and with it every
+    result-cache entry and in-flight retrieval.
+    """
+    question: str
+    jurisdiction: Optional[str]
+    # The state as the user gave it (e.g. "Texas"), or None for federal questions
+    state: Optional[str]
+    search_query: str
+    courtlistener_query: str
+    key: str
+
+    @property
+    def is_state(self) -> bool:
+        return self.state is not None
+
+
+def _courtlistener_query(question: str, state: Optional[str]) -> str:
+    search_q = _COURTLISTENER_STOPWORDS.sub("", question.lower())
+    search_q = _PUNCT.sub("", search_q)
+    search_q = _WS.sub(" ", search_q).strip()
+    if state is None:
+        return search_q
+
+    # When tenant-related, add "landlord" to disambiguate from unrelated uses
+    # of terms like "security" (e.g. security companies, national security).
+    if "tenant" in search_q and "landlord" not in search_q:
+        search_q = f"landlord {search_q}"
+    if state.lower() not in search_q:
+        search_q = f"{search_q} {state}"
+    return search_q
+
+
+def analyze_query(question: str, jurisdiction: Optional[str] = None) -> AnalyzedQuery:
+    """Clean a chat question and derive the per-source queries and cache key."""
+    # Strip surrounding quotes users may type (e.g. "What is X?" → What is X?)
+    # Quoted phrases break eCFR/Federal Register Lucene search with zero results
+    question = question.strip().strip('"\'')
+
+    state: Optional[str] = None
+    if jurisdiction is not None:
+        jurisdiction = jurisdiction.strip()
+        if jurisdiction.upper() not in ("US", "US FEDERAL") and jurisdiction.lower() in US_STATES:
+            state = jurisdiction
+
+    # Keyword-focused search query: improves eCFR/Federal Register relevance
+    # vs sending the full question sentence.
+    keywords = _KEYWORD_STOPWORDS.sub(" ", question)
+    keywords = _PUNCT.sub(" ", keywords)
+    keywords = _WS.sub(" ", keywords).strip()
+    search_query = keywords if len(keywords) > _MIN_KEYWORD_CHARS else question
+    # For state queries, embed the state name so federal APIs return state-relevant results
+    if state is not None:
+        search_query = f"{search_query} {state}"
+
+    tokens = sorted({t for t in _TOKEN.findall(question.lower()) if t not in _KEY_STOPWORDS})
+    scope = state.lower() if state is not None else "federal"
+    return AnalyzedQuery(
+        question=question,
+        jurisdiction=jurisdiction,
+        state=state,
+        search_query=search_query,
+        courtlistener_query=_courtlistener_query(question, state),
+        key=f"{scope}:{' '.join(tokens)}",
+    )
@@ -142,11 +142,17 @@ def _build_prompt(question: str, country: Optional[str], results: List[LiveResul
     return f"{instructions}\n\nQuestion{location}: {question}\n\nContext:\n{context}\n\nAnswer:"
 
 
-def answer_stream(question: str, country: Optional[str], results: Optional[List[LiveResult]] = None) -> Generator[str, None, None]:
-    if results is None:
-        logger.info("Live retrieval for question: %r (jurisdiction: %r)", question, country)
-        results = retrieve_live(question, jurisdiction=country, max_results=7)
+def source_links(results: List[LiveResult]) -> List[dict]:
+    """Citation metadata for the results that have a URL, numbered as in the prompt."""
+    return [
+        {"n": i, "citation": r.citation, "url": r.url, "title": r.title}
+        for i, r in enumerate(results, start=1)
+        if r.url
+    ]
+
 
+def answer_tokens(question: str, country: Optional[str], results: List[LiveResult]) -> Generator[str, None, None]:
+    """Stream the answer text only; citation metadata comes from `source_links`."""
     if not results:
         is_state_jurisdiction = country and country.upper() not in ("US", "US FEDERAL")
         state_resources = {
@@ -228,11 +234,14 @@ def answer_stream(question: str, country: Optional[str], results: Optional[List[
     for chunk in stream_completion(system_prompt, user_prompt):
         yield chunk
 
-    # Append source metadata so the frontend can render clickable citation links
-    sources_payload = [
-        {"n": i, "citation": r.citation, "url": r.url, "title": r.title}
-        for i, r in enumerate(results, start=1)
-        if r.url
-    ]
-    yield f"\n\nSOURCES_DATA:{json.dumps(sources_payload)}"
 
+def answer_stream(question: str, country: Optional[str], results: Optional[List[LiveResult]] = None) -> Generator[str, None, None]:
+    """Plain-text answer followed by the `SOURCES_DATA:` trailer (the legacy stream format)."""
+    if results is None:
+        logger.info("Live retrieval for question: %r (jurisdiction: %r)", question, country)
+        results = retrieve_live(question, jurisdiction=country, max_results=7)
+
+    yield from answer_tokens(question, country, results)
+    if results:
+        # Append source metadata so the frontend can render clickable citation links
+        yield f"\n\nSOURCES_DATA:{json.dumps(source_links(results))}"
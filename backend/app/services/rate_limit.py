@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from ..core.settings import get_settings
+
+
+class RateLimitedError(Exception):
+    """Raised when a request would have to queue longer than the allowed wait."""
+
+    def __init__(self, name: str, wait: float) -> None:
+        super().__init__(f"rate limit for {name}: next slot in {wait:.1f}s")
+        self.name = name
+        self.wait = wait
+
+
+class TokenBucket:
+    """Token bucket that paces requests to an upstream's quota.
+
+    Tokens refill continuously at `rate` per second up to `burst`. A caller
+    that finds the bucket empty reserves the next token anyway (the balance
+    goes negative) and sleeps until it is due, so waiting callers are served
+    in arrival order at exactly the refill rate. A reservation that would be
+    due more than `max_wait` seconds out is refused instead, letting the
+    caller degrade rather than hold a chat request in the queue.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, max_wait: float) -> None:
+        self.name = name
+        self.rate = rate
+        self.burst = float(burst)
+        self.max_wait = max_wait
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._counts = {"granted": 0, "queued": 0, "rejected": 0, "throttled_by_upstream": 0}
+        self._wait_total = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return how long to sleep before using it.
+
+        Raises `RateLimitedError` (without taking a token) when the wait would
+        exceed `max_wait`.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._refill(now)
+            wait = max(0.0, (1.0 - self._tokens) / self.rate)
+            if wait > self.max_wait:
+                self._counts["rejected"] += 1
+                raise RateLimitedError(self.name, wait)
+            self._tokens -= 1.0
+            self._counts["granted"] += 1
+            if wait:
+                self._counts["queued"] += 1
+                self._wait_total += wait
+            return wait
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait:
+            with self._lock:
+                self._waiting += 1
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+
+    async def acquire_async(self) -> None:
+        wait = self.reserve()
+        if wait:
+            with self._lock:
+                self._waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+
+    def drain(self) -> None:
+        """Empty the bucket after the upstream answered 429 despite pacing."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0)
+            self._counts["throttled_by_upstream"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            queued = self._counts["queued"]
+            return {
+                "rate_per_minute": round(self.rate * 60, 1),
+                "burst": int(self.burst),
+                "tokens_available": round(max(0.0, self._tokens), 2),
+                "waiting": self._waiting,
+                "avg_queue_wait_ms": int(self._wait_total / queued * 1000) if queued else 0,
+                **self._counts,
+            }
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_lock = threading.Lock()
+
+
+def _host_rates() -> Dict[str, float]:
+    """Requests per minute for each rate-limited upstream host."""
+    settings = get_settings()
+    return {
+        "www.courtlistener.com": settings.courtlistener_requests_per_minute,
+        "v3.openstates.org": settings.openstates_requests_per_minute,
+    }
+
+
+_RATES: Optional[Dict[str, float]] = None
+
+
+def get_bucket(url: str) -> Optional[TokenBucket]:
+    """Return the bucket for the host of `url`, or None if it is not rate limited."""
+    global _RATES
+    host = urlsplit(url).netloc.lower()
+    bucket = _buckets.get(host)
+    if bucket is not None:
+        return bucket
+    with _lock:
+        if _RATES is None:
+            _RATES = _host_rates()
+        per_minute = _RATES.get(host)
+        if not per_minute:
+            return None
+        bucket = _buckets.get(host)
+        if bucket is None:
+            settings = get_settings()
+            bucket = TokenBucket(
+                host, per_minute / 60.0, settings.rate_limit_burst, settings.rate_limit_max_wait_seconds
+            )
+            _buckets[host] = bucket
+        return bucket
+
+
+def rate_limit_stats() -> Dict[str, dict]:
+    """Remaining tokens, queue depth and grant/reject counters per upstream host."""
+    return {host: bucket.snapshot() for host, bucket in sorted(_buckets.items())}
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .bm25 import BM25Index
+from .near_duplicates import suppress
+
+if TYPE_CHECKING:
+    from .live_retrieval import LiveResult
+
+logger = logging.getLogger(__name__)
+
+# How much a result's origin (`LiveResult.source`) is trusted before looking at its text: curated
+# statute text first, then regulations, case law, rules and bills.
+SOURCE_PRIORS: Dict[str, float] = {
+    "uscode": 1.0,
+    "state_statute": 1.0,
+    "ecfr": 0.7,
+    "courtlistener": 0.5,
+    "courtlistener_federal": 0.5,
+    "federal_register": 0.4,
+    "openstates": 0.3,
+}
+_DEFAULT_PRIOR = 0.3
+
+# Weights of the combined score; the embedding weight applies only when an
+# embedding function is given, and is otherwise left out of the sum.
+_LEXICAL_WEIGHT = 0.6
+_PRIOR_WEIGHT = 0.25
+_EMBEDDING_WEIGHT = 0.4
+
+EmbedFn = Callable[[Sequence[str]], List[List[float]]]
+
+
+def _document(result: LiveResult) -> str:
+    return f"{result.title} {result.citation or ''} {result.text}"
+
+
+def _lexical_scores(question: str, documents: List[str]) -> np.ndarray:
+    """BM25 of each candidate against the question, scaled so the best is 1."""
+    scores = BM25Index(documents).scores(question)
+    best = float(scores.max()) if len(scores) else 0.0
+    return scores / best if best > 0 else scores
+
+
+def _embedding_scores(question: str, documents: List[str], embed: EmbedFn) -> Optional[np.ndarray]:
+    """Cosine similarity of each candidate to the question, or None if embedding fails."""
+    try:
+        vectors = np.asarray(embed([question] + documents), dtype=np.float32)
+    except Exception as exc:
+        logger.warning("Rerank embeddings unavailable, using lexical scores only: %s", exc)
+        return None
+    norms = np.linalg.norm(vectors, axis=1)
+    norms[norms == 0] = 1.0
+    vectors /= norms[:, None]
+    return np.clip(vectors[1:] @ vectors[0], 0.0, 1.0)
+
+
+def score_results(question: str, results: List[LiveResult], embed: Optional[EmbedFn] = None) -> np.ndarray:
+    """Relevance of every result to the question, computed for the whole batch at once."""
+    if not results:
+        return np.zeros(0, dtype=np.float32)
+    documents = [_document(r) for r in results]
+    priors = np.array([SOURCE_PRIORS.get(r.source, _DEFAULT_PRIOR) for r in results], dtype=np.float32)
+    scores = _LEXICAL_WEIGHT * _lexical_scores(question, documents) + _PRIOR_WEIGHT * priors
+    if embed is not None:
+        similarity = _embedding_scores(question, documents, embed)
+        if similarity is not None:
+            scores = scores + _EMBEDDING_WEIGHT * similarity
+    return scores
+
+
+def rerank(
+    question: str,
+    results: List[LiveResult],
+    k: int,
+    pinned: Optional[Sequence[bool]] = None,
+    embed: Optional[EmbedFn] = None,
+    duplicate_threshold: float = 1.0,
+) -> List[LiveResult]:
+    """The `k` most relevant results, best first.
+
+    Pinned results (e.g. from priority sources) are selected before any
+    other, up to `k`, but still take their place in the output by score.
+    A result whose text is at least `duplicate_threshold` similar (MinHash
+    Jaccard estimate) to a pinned or better-scoring one is dropped before
+    selection, so near-identical notices and snippets do not take slots;
+    1.0 disables this. Equal scores keep the input order, so the output is
+    deterministic for a given input.
+    """
+    if not results:
+        return []
+    pinned_mask = np.asarray(pinned if pinned is not None else [False] * len(results), dtype=bool)
+    scores = score_results(question, results, embed)
+    order = np.argsort(-scores, kind="stable")
+    distinct = np.asarray(suppress([r.text for r in results], order, pinned_mask, duplicate_threshold), dtype=np.int64)
+    if len(distinct) < len(order):
+        logger.info("Rerank dropped %d near-duplicate result(s)", len(order) - len(distinct))
+    reserved = distinct[pinned_mask[distinct]][:k]
+    rest = distinct[~pinned_mask[distinct]][: k - len(reserved)]
+    chosen = distinct[np.isin(distinct, np.concatenate([reserved, rest]))]
+    return [results[i] for i in chosen]
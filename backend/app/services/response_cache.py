@@ -0,0 +1,348 @@
+"""
+Persistent on-disk cache for raw upstream HTTP responses.
+
+Stored in a SQLite database (WAL mode) so it survives redeploys and is shared
+by every uvicorn worker on the host. Entries keep the upstream ETag and
+Last-Modified validators; once an entry is older than its host's freshness
+window it is revalidated with a conditional request instead of refetched.
+
+Inspect or purge from the backend directory:
+
+    python -m app.services.response_cache stats
+    python -m app.services.response_cache list --limit 20
+    python -m app.services.response_cache purge --host www.ecfr.gov
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# How long a stored response is used without contacting the upstream at all.
+# After this the entry is revalidated with If-None-Match / If-Modified-Since.
+HOST_FRESHNESS: Dict[str, float] = {
+    "www.ecfr.gov": 3600.0,
+    "www.federalregister.gov": 3600.0,
+    "v3.openstates.org": 3600.0,
+    "www.courtlistener.com": 6 * 3600.0,
+    "www.law.cornell.edu": 24 * 3600.0,
+}
+_DEFAULT_FRESHNESS = 600.0
+
+# A hit only rewrites accessed_at once it is this stale. Eviction order just
+# needs to be roughly LRU, and a write plus commit per hit serialises readers.
+_ACCESS_RESOLUTION = 300.0
+
+# Evict down to this fraction of the size cap so eviction does not run on every write.
+_EVICT_TARGET = 0.9
+
+
+@dataclass
+class CachedResponse:
+    key: str
+    status: int
+    content_type: str
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def is_fresh(self) -> bool:
+        host = urlsplit(self.key).netloc.lower()
+        return time.time() - self.fetched_at < HOST_FRESHNESS.get(host, _DEFAULT_FRESHNESS)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        headers = {"content-type": self.content_type} if self.content_type else {}
+        return httpx.Response(self.status, content=self.body, headers=headers, request=request)
+
+
+def _ensure_db(conn: sqlite3.Connection) -> None:
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            host TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            content_type TEXT,
+            body BLOB NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            size INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+    # Running total of body sizes, kept by triggers in the writing transaction,
+    # so checking the size cap is one row read instead of a table scan
+    conn.execute("CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)")
+    conn.execute("INSERT OR IGNORE INTO cache_size (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM responses")
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS responses_size_ai AFTER INSERT ON responses BEGIN
+            UPDATE cache_size SET total = total + new.size WHERE id = 0;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS responses_size_au AFTER UPDATE OF size ON responses BEGIN
+            UPDATE cache_size SET total = total - old.size + new.size WHERE id = 0;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS responses_size_ad AFTER DELETE ON responses BEGIN
+            UPDATE cache_size SET total = total - old.size WHERE id = 0;
+        END
+        """
+    )
+    conn.commit()
+
+
+def _cache_path() -> str:
+    settings = get_settings()
+    if settings.response_cache_path:
+        return os.path.abspath(settings.response_cache_path)
+    return os.path.join(os.path.dirname(os.path.abspath(settings.db_path)), "http_cache.db")
+
+
+class ResponseCache:
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10.0)
+        self._lock = threading.Lock()
+        with self._lock:
+            _ensure_db(self._conn)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, content_type, body, etag, last_modified, fetched_at, accessed_at "
+                "FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[6] >= _ACCESS_RESOLUTION:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+        status, content_type, body, etag, last_modified, fetched_at, _accessed_at = row
+        return CachedResponse(key, status, content_type or "", body, etag, last_modified, fetched_at)
+
+    def put(self, key: str, response: httpx.Response) -> None:
+        self.put_body(
+            key,
+            response.status_code,
+            response.headers.get("content-type", ""),
+            response.content,
+            response.headers.get("etag"),
+            response.headers.get("last-modified"),
+        )
+
+    def put_body(
+        self,
+        key: str,
+        status: int,
+        content_type: str,
+        body: bytes,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete
+            # does not fire delete triggers, which would skew cache_size
+            self._conn.execute(
+                """
+                INSERT INTO responses
+                    (key, host, status, content_type, body, etag, last_modified, fetched_at, accessed_at, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    host = excluded.host, status = excluded.status, content_type = excluded.content_type,
+                    body = excluded.body, etag = excluded.etag, last_modified = excluded.last_modified,
+                    fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at, size = excluded.size
+                """,
+                (
+                    key,
+                    urlsplit(key).netloc.lower(),
+                    status,
+                    content_type,
+                    body,
+                    etag,
+                    last_modified,
+                    now,
+                    now,
+                    len(body),
+                ),
+            )
+            self._conn.commit()
+            self._evict()
+
+    def touch(self, key: str, response: httpx.Response) -> None:
+        """Mark an entry as revalidated after a 304, picking up any new validators."""
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE responses
+                SET fetched_at = ?, accessed_at = ?,
+                    etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+                WHERE key = ?
+                """,
+                (time.time(), time.time(), response.headers.get("etag"), response.headers.get("last-modified"), key),
+            )
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT total FROM cache_size WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * _EVICT_TARGET)
+        evicted = 0
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC").fetchall()
+        for key, size in rows:
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self._conn.commit()
+        logger.info("Response cache evicted %d entr(ies); now %d bytes", evicted, total)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT host, COUNT(*), COALESCE(SUM(size), 0), MIN(fetched_at), MAX(fetched_at) "
+                "FROM responses GROUP BY host ORDER BY host"
+            ).fetchall()
+        hosts = {
+            host: {"entries": count, "bytes": size, "oldest_fetch": oldest, "newest_fetch": newest}
+            for host, count, size, oldest, newest in rows
+        }
+        return {
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "entries": sum(h["entries"] for h in hosts.values()),
+            "bytes": sum(h["bytes"] for h in hosts.values()),
+            "hosts": hosts,
+        }
+
+    def entries(self, limit: int = 50, host: Optional[str] = None) -> List[tuple]:
+        sql = "SELECT key, status, size, etag, last_modified, fetched_at, accessed_at FROM responses"
+        params: tuple = ()
+        if host:
+            sql += " WHERE host = ?"
+            params = (host.lower(),)
+        sql += " ORDER BY accessed_at DESC LIMIT ?"
+        with self._lock:
+            return self._conn.execute(sql, params + (limit,)).fetchall()
+
+    def purge(self, host: Optional[str] = None, older_than: Optional[float] = None) -> int:
+        clauses: List[str] = []
+        params: List = []
+        if host:
+            clauses.append("host = ?")
+            params.append(host.lower())
+        if older_than is not None:
+            clauses.append("fetched_at < ?")
+            params.append(time.time() - older_than)
+        sql = "DELETE FROM responses"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            self._conn.commit()
+            removed = cur.rowcount
+            if not clauses:
+                self._conn.execute("VACUUM")
+        return removed
+
+
+_CACHE: Optional[ResponseCache] = None
+_FAILED_AT = 0.0
+_init_lock = threading.Lock()
+
+# How long after a failed open (unwritable volume, corrupt file) before trying again
+_RETRY_SECONDS = 60.0
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide cache, or None when disabled in settings."""
+    global _CACHE, _FAILED_AT
+    if _CACHE is not None:
+        return _CACHE
+    now = time.monotonic()
+    if _FAILED_AT and now - _FAILED_AT < _RETRY_SECONDS:
+        return None
+    settings = get_settings()
+    if not settings.response_cache_enabled:
+        return None
+    with _init_lock:
+        if _CACHE is None:
+            if _FAILED_AT and now - _FAILED_AT < _RETRY_SECONDS:
+                return None
+            try:
+                _CACHE = ResponseCache(_cache_path(), settings.response_cache_max_mb * 1024 * 1024)
+            except Exception as exc:
+                _FAILED_AT = now
+                logger.warning("Response cache unavailable (retrying in %.0fs): %s", _RETRY_SECONDS, exc)
+                return None
+        return _CACHE
+
+
+def _main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect or purge the upstream response cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Entry count and size per host")
+    list_cmd = sub.add_parser("list", help="Most recently used entries")
+    list_cmd.add_argument("--limit", type=int, default=50)
+    list_cmd.add_argument("--host")
+    purge_cmd = sub.add_parser("purge", help="Delete entries (all by default)")
+    purge_cmd.add_argument("--host")
+    purge_cmd.add_argument("--older-than", type=float, help="Only entries fetched more than N seconds ago")
+    args = parser.parse_args()
+
+    cache = ResponseCache(_cache_path(), get_settings().response_cache_max_mb * 1024 * 1024)
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"{stats['path']}: {stats['entries']} entries, {stats['bytes']} / {stats['max_bytes']} bytes")
+        for host, info in stats["hosts"].items():
+            print(f"  {host}: {info['entries']} entries, {info['bytes']} bytes")
+    elif args.command == "list":
+        for key, status, size, etag, last_modified, fetched_at, _accessed_at in cache.entries(args.limit, args.host):
+            age = int(time.time() - fetched_at)
+            print(f"{status} {size:>9}B age={age}s etag={etag or '-'} lm={last_modified or '-'} {key}")
+    elif args.command == "purge":
+        removed = cache.purge(host=args.host, older_than=args.older_than)
+        print(f"Purged {removed} entr(ies)")
+
+
+if __name__ == "__main__":
+    _main()
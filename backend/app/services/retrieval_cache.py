@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .query_analysis import AnalyzedQuery
+from .singleflight import get_flight
+
+logger = logging.getLogger(__name__)
+
+# Freshness per source, in seconds. Regulations and Federal Register documents
+# change daily at most; bills move more slowly; published opinions are static.
+SOURCE_TTLS: Dict[str, float] = {
+    "ecfr": 6 * 3600,
+    "federal_register": 3 * 3600,
+    "openstates": 24 * 3600,
+    "courtlistener": 7 * 24 * 3600,
+    "courtlistener_federal": 7 * 24 * 3600,
+}
+_DEFAULT_TTL = 3600.0
+
+# An expired entry is still served (while a refresh runs) for this multiple of
+# its TTL; past that it is treated as a miss.
+_STALE_FACTOR = 2.0
+
+_MAX_ENTRIES = 2048
+
+_PUNCT_RE = re.compile(r"[?!.,;:\"'()]")
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(value: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return _WS_RE.sub(" ", _PUNCT_RE.sub(" ", value.lower())).strip()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries carry a per-entry TTL."""
+
+    def __init__(self, max_entries: int = _MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Tuple, Tuple[float, float, Any]]" = OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "refreshes": 0}
+        )
+
+    def lookup(self, key: Tuple) -> Tuple[Any, Optional[str]]:
+        """Return (value, state) where state is "fresh", "stale" or None on a miss."""
+        source = key[0]
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                stored_at, ttl, value = entry
+                age = now - stored_at
+                if age <= ttl:
+                    self._data.move_to_end(key)
+                    self._stats[source]["hits"] += 1
+                    return value, "fresh"
+                if age <= ttl * _STALE_FACTOR:
+                    self._data.move_to_end(key)
+                    self._stats[source]["stale_hits"] += 1
+                    return value, "stale"
+                del self._data[key]
+            self._stats[source]["misses"] += 1
+            return None, None
+
+    def store(self, key: Tuple, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                evicted, _ = self._data.popitem(last=False)
+                self._stats[evicted[0]]["evictions"] += 1
+
+    def begin_refresh(self, key: Tuple) -> bool:
+        """Claim the background refresh for `key`; False if one is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._stats[key[0]]["refreshes"] += 1
+            return True
+
+    def end_refresh(self, key: Tuple) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sizes: Dict[str, int] = defaultdict(int)
+            for key in self._data:
+                sizes[key[0]] += 1
+            sources = {
+                source: {**counters, "entries": sizes.get(source, 0)}
+                for source, counters in self._stats.items()
+            }
+            for source, size in sizes.items():
+                sources.setdefault(source, {"entries": size})
+            return {"entries": len(self._data), "max_entries": self.max_entries, "sources": sources}
+
+
+_CACHE = TTLCache()
+# Strong references to in-flight async refreshes so they are not GC'd mid-run.
+_background_tasks: set = set()
+
+
+def _key_part(value: Any) -> Any:
+    # An analyzed query contributes only its canonical, order-insensitive key
+    if isinstance(value, AnalyzedQuery):
+        return value.key
+    return normalize_text(value) if isinstance(value, str) else value
+
+
+def _make_key(source: str, sig: inspect.Signature, args: tuple, kwargs: dict) -> Tuple:
+    bound = sig.bind(*args, **kwargs)
+    bound.apply_defaults()
+    parts = tuple((name, _key_part(value)) for name, value in bound.arguments.items())
+    return (source,) + parts
+
+
+def cached(source: str) -> Callable:
+    """Cache a `fetch_*` function (sync or async) under the TTL for `source`.
+
+    Keys are built from the normalized call arguments, so sync and async
+    variants of the same fetcher share entries. Empty results are not stored:
+    fetchers return [] on upstream failure and that must not be pinned.
+    Concurrent misses on the same key are coalesced into one upstream call.
+    """
+    ttl = SOURCE_TTLS.get(source, _DEFAULT_TTL)
+    flight = get_flight(f"fetch:{source}")
+
+    def decorator(fn: Callable) -> Callable:
+        sig = inspect.signature(fn)
+
+        if inspect.iscoroutinefunction(fn):
+            async def _load_async(key: Tuple, args: tuple, kwargs: dict):
+                result = await fn(*args, **kwargs)
+                if result:
+                    _CACHE.store(key, result, ttl)
+                return result
+
+            async def _refresh_async(key: Tuple, args: tuple, kwargs: dict) -> None:
+                try:
+                    result = await fn(*args, **kwargs)
+                    if result:
+                        _CACHE.store(key, result, ttl)
+                except Exception as exc:
+                    logger.warning("Background refresh failed for %s: %s", source, exc)
+                finally:
+                    _CACHE.end_refresh(key)
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                key = _make_key(source, sig, args, kwargs)
+                value, state = _CACHE.lookup(key)
+                if state == "stale" and _CACHE.begin_refresh(key):
+                    task = asyncio.get_running_loop().create_task(_refresh_async(key, args, kwargs))
+                    _background_tasks.add(task)
+                    task.add_done_callback(_background_tasks.discard)
+                if state is not None:
+                    return list(value)
+                result, _shared = await flight.do_async(key, _load_async, key, args, kwargs)
+                return list(result)
+
+            return async_wrapper
+
+        def _load(key: Tuple, args: tuple, kwargs: dict):
+            result = fn(*args, **kwargs)
+            if result:
+                _CACHE.store(key, result, ttl)
+            return result
+
+        def _refresh(key: Tuple, args: tuple, kwargs: dict) -> None:
+            try:
+                result = fn(*args, **kwargs)
+                if result:
+                    _CACHE.store(key, result, ttl)
+            except Exception as exc:
+                logger.warning("Background refresh failed for %s: %s", source, exc)
+            finally:
+                _CACHE.end_refresh(key)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = _make_key(source, sig, args, kwargs)
+            value, state = _CACHE.lookup(key)
+            if state == "stale" and _CACHE.begin_refresh(key):
+                threading.Thread(
+                    target=_refresh, args=(key, args, kwargs), name=f"refresh:{source}", daemon=True
+                ).start()
+            if state is not None:
+                return list(value)
+            result, _shared = flight.do(key, _load, key, args, kwargs)
+            return list(result)
+
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction counters and entry counts per source."""
+    return _CACHE.stats()
+
+
+def clear_cache() -> None:
+    _CACHE.clear()
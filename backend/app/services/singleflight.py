@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is in flight wait for and share its result or exception.
+    Nothing is remembered once the call completes — caching is the job of
+    `retrieval_cache`. Threads and coroutines are tracked separately, since a
+    coroutine cannot wait on a thread's call without blocking its loop.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._stats = {"calls": 0, "shared": 0}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Tuple[Any, bool]:
+        """Run `fn(*args, **kwargs)` once per in-flight `key`; returns (result, shared)."""
+        with self._lock:
+            self._stats["calls"] += 1
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats["shared"] += 1
+            else:
+                self._calls[key] = Future()
+        if future is not None:
+            return future.result(), True
+
+        future = self._calls[key]
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def do_async(self, key: Hashable, fn: Callable, *args, **kwargs) -> Tuple[Any, bool]:
+        """Async variant of `do`; `fn` is a coroutine function.
+
+        The shared task is shielded, so a caller that is cancelled (e.g. its
+        client disconnected) does not cancel the work the others are awaiting.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._stats["calls"] += 1
+            task = self._tasks.get(key)
+            shared = task is not None and task.get_loop() is loop
+            if shared:
+                self._stats["shared"] += 1
+            else:
+                task = loop.create_task(fn(*args, **kwargs))
+                self._tasks[key] = task
+                task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls) + len(self._tasks)}
+
+
+_flights: Dict[str, SingleFlight] = {}
+_registry_lock = threading.Lock()
+
+
+def get_flight(name: str) -> SingleFlight:
+    """Return the process-wide `SingleFlight` registered under `name`."""
+    with _registry_lock:
+        flight = _flights.get(name)
+        if flight is None:
+            flight = _flights[name] = SingleFlight(name)
+        return flight
+
+
+def flight_stats() -> Dict[str, Dict[str, int]]:
+    """Per-name call, shared-call and in-flight counters."""
+    with _registry_lock:
+        flights = sorted(_flights.items())
+    return {name: flight.stats() for name, flight in flights}
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StatuteStore:
+    """In-memory store of extracted statute page text, persisted to a JSON file.
+
+    Pages are fetched off the request path — at startup and then on a fixed
+    interval by a background thread — so query-time lookups never touch the
+    network.
+    """
+
+    def __init__(self, path: str, fetch_text: Callable[[str], str], refresh_interval: float) -> None:
+        self.path = path
+        self.fetch_text = fetch_text
+        self.refresh_interval = refresh_interval
+        self._texts: Dict[str, str] = {}
+        self._fetched_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self, url: str) -> Optional[str]:
+        return self._texts.get(url)
+
+    def load(self) -> int:
+        """Load previously persisted pages; returns the number loaded."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except Exception as exc:
+            logger.warning("Statute store at %s is unreadable: %s", self.path, exc)
+            return 0
+        with self._lock:
+            for url, entry in data.items():
+                self._texts[url] = entry["text"]
+                self._fetched_at[url] = entry["fetched_at"]
+        return len(data)
+
+    def _save(self) -> None:
+        with self._lock:
+            data = {
+                url: {"text": text, "fetched_at": self._fetched_at.get(url, 0.0)}
+                for url, text in self._texts.items()
+            }
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        # A unique temp file per save: another worker or the CLI may be saving
+        # the same store, and a shared name could publish a half-written file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self.path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def stale_urls(self, urls: Iterable[str]) -> list:
+        now = time.time()
+        return [u for u in urls if now - self._fetched_at.get(u, 0.0) >= self.refresh_interval]
+
+    def refresh(self, urls: Iterable[str]) -> int:
+        """Fetch `urls` concurrently, keeping the previous text when a fetch fails."""
+        urls = list(urls)
+        if not urls:
+            return 0
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            texts = list(executor.map(self.fetch_text, urls))
+        updated = 0
+        now = time.time()
+        with self._lock:
+            for url, text in zip(urls, texts):
+                if text:
+                    self._texts[url] = text
+                    self._fetched_at[url] = now
+                    updated += 1
+        if updated:
+            self._save()
+        logger.info("Statute store refreshed %d/%d page(s)", updated, len(urls))
+        return updated
+
+    def _run(self, urls: list) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh(self.stale_urls(urls))
+            except Exception as exc:
+                logger.warning("Statute store refresh failed: %s", exc)
+            # Re-check hourly so pages that failed to fetch are retried promptly
+            self._stop.wait(min(self.refresh_interval, 3600.0))
+
+    def start(self, urls: Iterable[str]) -> None:
+        """Load from disk, then keep `urls` fresh on a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        loaded = self.load()
+        logger.info("Statute store loaded %d page(s) from %s", loaded, self.path)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(list(urls),), name="statute-store", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
 import sqlite3
+import threading
 from dataclasses import dataclass
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 
 from ..core.settings import get_settings
+from .vector_index import VectorIndex, normalize
+
+logger = logging.getLogger(__name__)
 
 
 def _ensure_db(conn: sqlite3.Connection) -> None:
@@ -32,12 +37,32 @@ def _ensure_db(conn: sqlite3.Connection) -> None:
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             document_id INTEGER NOT NULL,
             text TEXT NOT NULL,
-            embedding TEXT NOT NULL,
+            embedding BLOB NOT NULL,
             FOREIGN KEY(document_id) REFERENCES documents(id)
         )
         """
     )
     conn.commit()
+    _migrate_json_embeddings(conn)
+
+
+def _encode(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def _migrate_json_embeddings(conn: sqlite3.Connection) -> None:
+    """Rewrite embeddings stored by older versions as JSON text into normalized float32 BLOBs."""
+    cur = conn.cursor()
+    cur.execute("SELECT id, embedding FROM chunks WHERE typeof(embedding) = 'text'")
+    rows = cur.fetchall()
+    if not rows:
+        return
+    logger.info("Converting %d JSON chunk embedding(s) to float32 BLOBs...", len(rows))
+    cur.executemany(
+        "UPDATE chunks SET embedding = ? WHERE id = ?",
+        ((_encode(normalize(np.array(json.loads(emb), dtype=np.float32))), chunk_id) for chunk_id, emb in rows),
+    )
+    conn.commit()
 
 
 def _connect() -> sqlite3.Connection:
@@ -70,11 +95,112 @@ def save_document(
     return int(cur.lastrowid)
 
 
+def segments_dir() -> str:
+    settings = get_settings()
+    if settings.vector_segments_path:
+        return os.path.abspath(settings.vector_segments_path)
+    return os.path.join(os.path.dirname(os.path.abspath(settings.db_path)), "vectors")
+
+
+# Chunk embeddings as memory-mapped segment files next to the database. The
+# segments are the search copy; SQLite stays the source of truth, and the
+# first search in each process adds or deletes whatever the two disagree on
+# (first run, or a crash between the SQLite commit and the segment write).
+_INDEX = VectorIndex(segments_dir())
+_INDEX_LOCK = threading.Lock()
+_index_synced = False
+
+# Rows per batch when copying embeddings from SQLite into the segments
+_SYNC_BATCH = 10000
+
+
+def _sync_index() -> None:
+    global _index_synced
+    with _INDEX_LOCK:
+        if _index_synced:
+            return
+        # Index first: a chunk saved by another worker in between is then in
+        # `stored` but not `indexed` (re-added, a no-op), never the reverse,
+        # which would delete a live chunk from search
+        indexed = _INDEX.ids()
+        cur = _CONN.cursor()
+        cur.execute("SELECT id FROM chunks")
+        stored = np.fromiter((row[0] for row in cur), dtype=np.int64)
+        missing = set(np.setdiff1d(stored, indexed).tolist())
+        stale = np.setdiff1d(indexed, stored)
+        if missing:
+            logger.info("Adding %d chunk embedding(s) from SQLite to the vector segments...", len(missing))
+            cur.execute(
+                """
+                SELECT d.country, c.id, c.embedding
+                FROM chunks c
+                JOIN documents d ON d.id = c.document_id
+                ORDER BY d.country, c.id
+                """
+            )
+            country: Optional[str] = None
+            ids: List[int] = []
+            blobs: List[bytes] = []
+            for row_country, chunk_id, blob in cur:
+                if chunk_id not in missing:
+                    continue
+                if ids and (row_country != country or len(ids) >= _SYNC_BATCH):
+                    _add_to_index(country, ids, blobs)
+                    ids, blobs = [], []
+                country = row_country
+                ids.append(chunk_id)
+                blobs.append(blob)
+            if ids:
+                _add_to_index(country, ids, blobs)
+        if len(stale):
+            _INDEX.delete(stale)
+        _index_synced = True
+        logger.info("Vector segments ready: %s", _INDEX.stats())
+        if get_settings().vector_search_mode == "ivf" and not _INDEX.trained:
+            logger.warning("VECTOR_SEARCH_MODE=ivf but no IVF lists exist; searching exactly until "
+                           "`python -m app.services.vector_index train` is run")
+
+
+def _add_to_index(country: Optional[str], ids: List[int], blobs: List[bytes]) -> None:
+    """Add one country's rows; rows whose dimension differs from the index's are left out by it."""
+    by_size: Dict[int, Tuple[List[int], List[bytes]]] = {}
+    for chunk_id, blob in zip(ids, blobs):
+        group_ids, group_blobs = by_size.setdefault(len(blob), ([], []))
+        group_ids.append(chunk_id)
+        group_blobs.append(blob)
+    for group_ids, group_blobs in by_size.values():
+        vectors = np.frombuffer(b"".join(group_blobs), dtype=np.float32).reshape(len(group_ids), -1)
+        _INDEX.add(country, group_ids, vectors)
+
+
 def save_chunks(document_id: int, chunks: Iterable[Tuple[str, List[float]]]) -> None:
-    rows = [(document_id, text, json.dumps(vec)) for text, vec in chunks]
+    chunks = list(chunks)
+    if not chunks:
+        return
+    vectors = normalize(np.array([vec for _, vec in chunks], dtype=np.float32))
     cur = _CONN.cursor()
-    cur.executemany("INSERT INTO chunks (document_id, text, embedding) VALUES (?, ?, ?)", rows)
+    ids: List[int] = []
+    for (text, _vec), vector in zip(chunks, vectors):
+        cur.execute(
+            "INSERT INTO chunks (document_id, text, embedding) VALUES (?, ?, ?)",
+            (document_id, text, _encode(vector)),
+        )
+        ids.append(int(cur.lastrowid))
     _CONN.commit()
+    cur.execute("SELECT country FROM documents WHERE id = ?", (document_id,))
+    row = cur.fetchone()
+    _INDEX.add(row[0] if row else None, ids, vectors)
+
+
+def delete_document(document_id: int) -> None:
+    """Remove a document and its chunks; their segment rows are compacted away in the background."""
+    cur = _CONN.cursor()
+    cur.execute("SELECT id FROM chunks WHERE document_id = ?", (document_id,))
+    ids = [row[0] for row in cur.fetchall()]
+    cur.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+    cur.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+    _CONN.commit()
+    _INDEX.delete(ids)
 
 
 @dataclass
@@ -86,43 +212,33 @@ class RetrievedChunk:
     title: Optional[str]
 
 
-def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-    denom = (np.linalg.norm(a) * np.linalg.norm(b))
-    if denom == 0:
-        return 0.0
-    return float(np.dot(a, b) / denom)
-
-
 def retrieve_similar(query_embedding: List[float], *, country: Optional[str], k: int = 6) -> List[RetrievedChunk]:
     """
-    Naive retrieval: load embeddings to memory, compute cosine, filter by country if provided.
+    Cosine retrieval over the memory-mapped embedding segments, filtered by country if provided;
+    approximate (IVF) when VECTOR_SEARCH_MODE=ivf.
+    Only the top-k chunks' text and document fields are read from SQLite.
     """
-    q = np.array(query_embedding, dtype=np.float32)
+    _sync_index()
+    settings = get_settings()
+    nprobe = settings.ivf_nprobe if settings.vector_search_mode == "ivf" else None
+    hits = _INDEX.search(normalize(np.array(query_embedding, dtype=np.float32)), country=country, k=k, nprobe=nprobe)
+    if not hits:
+        return []
     cur = _CONN.cursor()
-    if country:
-        cur.execute(
-            """
-            SELECT c.text, c.embedding, d.source, d.url, d.title
-            FROM chunks c
-            JOIN documents d ON d.id = c.document_id
-            WHERE d.country = ?
-            """,
-            (country,),
-        )
-    else:
-        cur.execute(
-            """
-            SELECT c.text, c.embedding, d.source, d.url, d.title
-            FROM chunks c
-            JOIN documents d ON d.id = c.document_id
-            """
-        )
-    rows = cur.fetchall()
-    scored: List[RetrievedChunk] = []
-    for text, emb_json, source, url, title in rows:
-        vec = np.array(json.loads(emb_json), dtype=np.float32)
-        score = _cosine_similarity(q, vec)
-        scored.append(RetrievedChunk(text=text, score=score, source=source, url=url, title=title))
-    scored.sort(key=lambda r: r.score, reverse=True)
-    return scored[:k]
-
+    cur.execute(
+        f"""
+        SELECT c.id, c.text, d.source, d.url, d.title
+        FROM chunks c
+        JOIN documents d ON d.id = c.document_id
+        WHERE c.id IN ({",".join("?" * len(hits))})
+        """,
+        [chunk_id for chunk_id, _ in hits],
+    )
+    rows = {row[0]: row[1:] for row in cur.fetchall()}
+    results: List[RetrievedChunk] = []
+    for chunk_id, score in hits:
+        if chunk_id not in rows:
+            continue
+        text, source, url, title = rows[chunk_id]
+        results.append(RetrievedChunk(text=text, score=score, source=source, url=url, title=title))
+    return results
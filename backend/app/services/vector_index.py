@@ -0,0 +1,558 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .ann_index import InvertedLists, assign, default_nlist, recall_at_k, sample_size, train_centroids
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within one process
+    fcntl = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Rows per segment file before a new one is started for the country.
+_SEGMENT_ROWS = 16384
+# A segment is rewritten once this fraction of its rows has been deleted.
+_COMPACT_FRACTION = 0.2
+_MANIFEST = "manifest.json"
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Rows scaled to unit length as float32; all-zero rows stay zero."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` largest scores, best first, without sorting the rest."""
+    if k <= 0 or len(scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class _Segment:
+    """Read-only mapping of one segment's first `rows` vectors and ids, and
+    of the IVF list numbers of its first `assigned` rows."""
+
+    def __init__(self, directory: str, entry: dict, dim: int, ivf: Optional[dict]) -> None:
+        self.name: str = entry["name"]
+        self.country: Optional[str] = entry["country"]
+        self.rows: int = entry["rows"]
+        self.first_id: int = entry["first_id"]
+        self.last_id: int = entry["last_id"]
+        path = os.path.join(directory, self.name)
+        self.vectors = np.memmap(f"{path}.f32", dtype=np.float32, mode="r", shape=(self.rows, dim))
+        self.ids = np.memmap(f"{path}.ids", dtype=np.int64, mode="r", shape=(self.rows,))
+        self.deleted = np.zeros(self.rows, dtype=bool)
+        self.deleted[entry.get("deleted", [])] = True
+        self.n_deleted = int(self.deleted.sum())
+        self.ivf_version: Optional[int] = ivf["version"] if ivf else None
+        self.assigned: int = entry.get("assigned", 0) if ivf else 0
+        self.assignments: Optional[np.ndarray] = None
+        self.lists: Optional[InvertedLists] = None
+        if self.assigned:
+            self.assignments = np.memmap(
+                f"{path}.ivf{self.ivf_version}", dtype=np.int32, mode="r", shape=(self.assigned,)
+            )
+            self.lists = InvertedLists(self.assignments, ivf["nlist"])
+
+    def candidate_rows(self, probes: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Rows in the probed lists plus any not yet assigned to a list, in
+        file order; None (meaning every row) without probes or assignments."""
+        if probes is None or self.lists is None:
+            return None
+        rows = self.lists.rows(probes)
+        if self.assigned < self.rows:
+            rows = np.concatenate([rows, np.arange(self.assigned, self.rows)])
+        return np.sort(rows)
+
+    def live_ids(self) -> np.ndarray:
+        return np.asarray(self.ids)[~self.deleted]
+
+
+class VectorIndex:
+    """Exact cosine search over unit vectors kept in memory-mapped segment files.
+
+    Vectors are appended to per-country segments in `directory`: raw float32
+    rows in `<name>.f32` and the matching row ids in `<name>.ids`.
+    `manifest.json` lists each segment's country, row count, id range and
+    deleted rows; a segment file is only ever appended to, and a row counts
+    once the manifest (replaced atomically) says so. Every process maps the
+    segments read-only, so workers share their pages through the OS page
+    cache, and remaps when the manifest changes.
+
+    A query is one matrix-vector product per searched segment plus an
+    `argpartition` for the top k, merged across segments. Deletes are
+    recorded in the manifest and masked out of results; segments with
+    enough deleted rows are rewritten by a background thread.
+
+    Once `train` has run, searches may pass `nprobe` for approximate
+    (IVF-flat) search: rows are grouped by their nearest k-means centroid,
+    and only the rows of the `nprobe` lists whose centroids are closest to
+    the query are scored. Rows added later are assigned to a list as they
+    are appended (`<name>.ivf<version>`); rows without a list, from before
+    training, are always scored.
+    """
+
+    def __init__(self, directory: str, segment_rows: int = _SEGMENT_ROWS) -> None:
+        self.directory = directory
+        self.segment_rows = segment_rows
+        os.makedirs(directory, exist_ok=True)
+        self._manifest_path = os.path.join(directory, _MANIFEST)
+        self._manifest: dict = {"dim": None, "next_segment": 1, "segments": []}
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._segments: List[_Segment] = []
+        self._centroids: Optional[np.ndarray] = None
+        # `_lock` guards the mapped view; `_write_lock` (plus a lock file
+        # across processes) serializes changes to the segments and manifest.
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return sum(s.rows - s.n_deleted for s in self._view())
+
+    @property
+    def trained(self) -> bool:
+        self._refresh()
+        return self._centroids is not None
+
+    def ids(self) -> np.ndarray:
+        """Ids of every live (not deleted) row."""
+        segments = self._view()
+        return np.concatenate([s.live_ids() for s in segments]) if segments else np.zeros(0, dtype=np.int64)
+
+    def stats(self) -> dict:
+        segments = self._view()
+        ivf = self._manifest.get("ivf")
+        return {
+            "dim": self._manifest["dim"],
+            "segments": len(segments),
+            "rows": sum(s.rows for s in segments),
+            "deleted": sum(s.n_deleted for s in segments),
+            "ivf": {**ivf, "unassigned": sum(s.rows - s.assigned for s in segments)} if ivf else None,
+        }
+
+    # Reading
+
+    def _refresh(self, force: bool = False) -> None:
+        """Remap if the manifest changed since it was last read (one stat call otherwise)."""
+        try:
+            st = os.stat(self._manifest_path)
+            stamp: Optional[Tuple[int, int, int]] = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamp = None
+        with self._lock:
+            if stamp == self._stamp and not force:
+                return
+            if stamp is None:
+                manifest: dict = {"dim": None, "next_segment": 1, "segments": []}
+            else:
+                with open(self._manifest_path, encoding="utf-8") as f:
+                    manifest = json.load(f)
+            ivf = manifest.get("ivf")
+            centroids = None
+            if ivf:
+                centroids = np.memmap(
+                    os.path.join(self.directory, f"centroids-{ivf['version']}.f32"),
+                    dtype=np.float32, mode="r", shape=(ivf["nlist"], manifest["dim"]),
+                )
+            mapped = {s.name: s for s in self._segments}
+            segments: List[_Segment] = []
+            for entry in manifest["segments"]:
+                if not entry["rows"]:
+                    continue
+                current = mapped.get(entry["name"])
+                if (
+                    current is not None
+                    and current.rows == entry["rows"]
+                    and current.n_deleted == len(entry.get("deleted", []))
+                    and current.ivf_version == (ivf["version"] if ivf else None)
+                    and current.assigned == (entry.get("assigned", 0) if ivf else 0)
+                ):
+                    segments.append(current)
+                else:
+                    segments.append(_Segment(self.directory, entry, manifest["dim"], ivf))
+            self._manifest, self._segments, self._centroids, self._stamp = manifest, segments, centroids, stamp
+
+    def _snapshot(self) -> Tuple[List[_Segment], Optional[np.ndarray], Optional[int]]:
+        self._refresh()
+        with self._lock:
+            return list(self._segments), self._centroids, self._manifest["dim"]
+
+    def _view(self) -> List[_Segment]:
+        return self._snapshot()[0]
+
+    def search(
+        self, query: np.ndarray, *, country: Optional[str], k: int, nprobe: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Up to `k` (row id, cosine similarity) pairs, best first.
+
+        `query` must be normalized. With a country only that country's
+        segments are searched; without one, every segment is. With `nprobe`
+        and a trained index, only the `nprobe` closest lists are scanned;
+        otherwise the search is exact.
+        """
+        segments, centroids, dim = self._snapshot()
+        if dim is None or len(query) != dim:
+            if dim is not None:
+                logger.warning("Query embedding has dimension %d; the index holds %d", len(query), dim)
+            return []
+        if country:
+            segments = [s for s in segments if s.country == country]
+        probes = top_k(centroids @ query, nprobe) if nprobe and centroids is not None else None
+
+        all_ids: List[np.ndarray] = []
+        all_scores: List[np.ndarray] = []
+        for segment in segments:
+            rows = segment.candidate_rows(probes)
+            if rows is None:
+                scores, ids, deleted = segment.vectors @ query, segment.ids, segment.deleted
+            else:
+                scores, ids, deleted = segment.vectors[rows] @ query, segment.ids[rows], segment.deleted[rows]
+            if segment.n_deleted:
+                scores[deleted] = -np.inf
+            best = top_k(scores, k)
+            best = best[np.isfinite(scores[best])]
+            all_ids.append(np.asarray(ids[best]))
+            all_scores.append(scores[best])
+        if not all_ids:
+            return []
+        ids = np.concatenate(all_ids)
+        scores = np.concatenate(all_scores)
+        best = top_k(scores, k)
+        return [(int(ids[i]), float(scores[i])) for i in best]
+
+    # Writing
+
+    @contextmanager
+    def _locked(self) -> Iterator[dict]:
+        """Exclusive access to the segments; yields a copy of the latest manifest to modify."""
+        with self._write_lock:
+            lock_file = open(os.path.join(self.directory, "manifest.lock"), "a")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._refresh(force=True)
+                yield json.loads(json.dumps(self._manifest))
+            finally:
+                lock_file.close()
+
+    def _write_manifest(self, manifest: dict) -> None:
+        tmp_path = f"{self._manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path)
+        self._refresh(force=True)
+
+    def _new_segment(self, manifest: dict, country: Optional[str]) -> dict:
+        """Entry for an empty segment with the next free name (not yet listed in `manifest`)."""
+        entry = {
+            "name": f"seg-{manifest['next_segment']:06d}",
+            "country": country,
+            "rows": 0,
+            "first_id": None,
+            "last_id": None,
+            "deleted": [],
+            "assigned": 0,
+        }
+        manifest["next_segment"] += 1
+        return entry
+
+    @staticmethod
+    def _write_rows(file_path: str, row: int, data: np.ndarray) -> None:
+        """Write `data` starting at row `row`; a torn tail from a crash is overwritten."""
+        with open(file_path, "r+b" if os.path.exists(file_path) else "wb") as f:
+            f.seek(row * data[0].nbytes)
+            f.write(np.ascontiguousarray(data).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _append_rows(
+        self, entry: dict, ids: np.ndarray, vectors: np.ndarray, lists: Optional[np.ndarray] = None, manifest: Optional[dict] = None
+    ) -> None:
+        """Append rows after the segment's committed ones, with their IVF
+        list numbers if given and every earlier row has one too."""
+        path = os.path.join(self.directory, entry["name"])
+        self._write_rows(f"{path}.f32", entry["rows"], vectors)
+        self._write_rows(f"{path}.ids", entry["rows"], ids)
+        if lists is not None and manifest and manifest.get("ivf") and entry.get("assigned", 0) == entry["rows"]:
+            self._write_rows(f"{path}.ivf{manifest['ivf']['version']}", entry["rows"], lists)
+            entry["assigned"] = entry["rows"] + len(ids)
+        entry["rows"] += len(ids)
+        lo, hi = int(ids.min()), int(ids.max())
+        entry["first_id"] = lo if entry["first_id"] is None else min(entry["first_id"], lo)
+        entry["last_id"] = hi if entry["last_id"] is None else max(entry["last_id"], hi)
+
+    def _locate(self, ids: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Which of `ids` are already stored, and the deleted rows holding any of them, by segment."""
+        present = np.zeros(len(ids), dtype=bool)
+        deleted_rows: Dict[str, np.ndarray] = {}
+        lo, hi = ids.min(), ids.max()
+        for segment in self._segments:
+            if segment.first_id <= hi and segment.last_id >= lo:
+                present |= np.isin(ids, segment.ids)
+                rows = np.flatnonzero(np.isin(segment.ids, ids) & segment.deleted)
+                if len(rows):
+                    deleted_rows[segment.name] = rows
+        return present, deleted_rows
+
+    def add(self, country: Optional[str], ids: Iterable[int], vectors: np.ndarray) -> None:
+        """Append normalized vectors; ids already in the index are skipped,
+        and revived if they were marked deleted (chunk ids are never reused)."""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(ids) == 0:
+            return
+        with self._locked() as manifest:
+            if manifest["dim"] is None:
+                manifest["dim"] = int(vectors.shape[1])
+            if vectors.shape[1] != manifest["dim"]:
+                logger.warning(
+                    "Skipping %d embedding(s) of dimension %d; the index holds dimension %d",
+                    len(ids), vectors.shape[1], manifest["dim"],
+                )
+                return
+            present, deleted_rows = self._locate(ids)
+            for entry in manifest["segments"]:
+                if entry["name"] in deleted_rows:
+                    entry["deleted"] = sorted(set(entry["deleted"]) - set(deleted_rows[entry["name"]].tolist()))
+            ids, vectors = ids[~present], vectors[~present]
+            if len(ids) == 0:
+                if deleted_rows:
+                    self._write_manifest(manifest)
+                return
+            lists = assign(vectors, self._centroids) if self._centroids is not None else None
+
+            own = [e for e in manifest["segments"] if e["country"] == country]
+            active = own[-1] if own and own[-1]["rows"] < self.segment_rows else None
+            start = 0
+            while start < len(ids):
+                if active is None:
+                    active = self._new_segment(manifest, country)
+                    manifest["segments"].append(active)
+                end = start + min(len(ids) - start, self.segment_rows - active["rows"])
+                self._append_rows(
+                    active, ids[start:end], vectors[start:end],
+                    lists[start:end] if lists is not None else None, manifest,
+                )
+                if active["rows"] >= self.segment_rows:
+                    active = None
+                start = end
+            self._write_manifest(manifest)
+
+    def delete(self, ids: Iterable[int]) -> int:
+        """Mark rows deleted; returns how many were found. Compaction follows in the background."""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        if len(ids) == 0:
+            return 0
+        found = 0
+        with self._locked() as manifest:
+            segments = {s.name: s for s in self._segments}
+            for entry in manifest["segments"]:
+                segment = segments.get(entry["name"])
+                if segment is None or segment.first_id > ids.max() or segment.last_id < ids.min():
+                    continue
+                rows = np.flatnonzero(np.isin(segment.ids, ids) & ~segment.deleted)
+                if len(rows):
+                    entry["deleted"] = sorted(set(entry["deleted"]) | set(rows.tolist()))
+                    found += len(rows)
+            if found:
+                self._write_manifest(manifest)
+        if found:
+            self._schedule_compaction()
+        return found
+
+    def _needs_compaction(self, entry: dict) -> bool:
+        return bool(entry["deleted"]) and len(entry["deleted"]) >= _COMPACT_FRACTION * entry["rows"]
+
+    def compact(self) -> int:
+        """Rewrite segments with enough deleted rows into new files; returns how many were rewritten."""
+        obsolete: List[str] = []
+        with self._locked() as manifest:
+            segments = {s.name: s for s in self._segments}
+            kept: List[dict] = []
+            for entry in manifest["segments"]:
+                segment = segments.get(entry["name"])
+                if segment is None or not self._needs_compaction(entry):
+                    kept.append(entry)
+                    continue
+                obsolete.append(entry["name"])
+                live = ~segment.deleted
+                if not live.any():
+                    continue
+                replacement = self._new_segment(manifest, entry["country"])
+                # Live rows keep their order, so the assigned ones stay a prefix
+                assigned = np.flatnonzero(live[: segment.assigned])
+                unassigned = segment.assigned + np.flatnonzero(live[segment.assigned:])
+                if len(assigned):
+                    self._append_rows(
+                        replacement, np.asarray(segment.ids[assigned]), np.asarray(segment.vectors[assigned]),
+                        np.asarray(segment.assignments[assigned]), manifest,
+                    )
+                if len(unassigned):
+                    self._append_rows(
+                        replacement, np.asarray(segment.ids[unassigned]), np.asarray(segment.vectors[unassigned])
+                    )
+                kept.append(replacement)
+            if not obsolete:
+                return 0
+            manifest["segments"] = kept
+            self._write_manifest(manifest)
+
+        for name in obsolete:
+            self._remove(glob.glob(os.path.join(self.directory, f"{name}.*")))
+        logger.info("Compacted %d vector segment(s)", len(obsolete))
+        return len(obsolete)
+
+    def _remove(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError as exc:
+                # Still mapped elsewhere on platforms that refuse to unlink it
+                logger.debug("Could not remove %s: %s", path, exc)
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10) -> int:
+        """(Re)build the IVF lists: k-means centroids from a sample of the
+        stored rows, then every row's list. Returns the number of lists.
+
+        Writers wait for this to finish; searches keep using the previous
+        lists (or exact search) until the new manifest is in place.
+        """
+        with self._locked() as manifest:
+            segments = list(self._segments)
+            sizes = np.array([s.rows for s in segments], dtype=np.int64)
+            total = int(sizes.sum())
+            if not total:
+                return 0
+            nlist = min(nlist or default_nlist(total), total)
+            picks = np.sort(np.random.default_rng(0).choice(total, size=sample_size(nlist, total), replace=False))
+            bounds = np.concatenate([[0], np.cumsum(sizes)])
+            sample = np.concatenate([
+                np.asarray(s.vectors[picks[(picks >= lo) & (picks < hi)] - lo])
+                for s, lo, hi in zip(segments, bounds[:-1], bounds[1:])
+            ])
+            started = time.monotonic()
+            centroids = train_centroids(sample, nlist, iterations)
+            logger.info("Trained %d IVF centroid(s) on %d row(s) in %.1fs", nlist, len(sample), time.monotonic() - started)
+
+            previous = manifest.get("ivf")
+            version = (previous["version"] if previous else 0) + 1
+            self._write_rows(os.path.join(self.directory, f"centroids-{version}.f32"), 0, centroids)
+            by_name = {s.name: s for s in segments}
+            for entry in manifest["segments"]:
+                segment = by_name.get(entry["name"])
+                if segment is None:
+                    entry["assigned"] = 0
+                    continue
+                self._write_rows(
+                    os.path.join(self.directory, f"{entry['name']}.ivf{version}"), 0, assign(segment.vectors, centroids)
+                )
+                entry["assigned"] = entry["rows"]
+            manifest["ivf"] = {"version": version, "nlist": nlist}
+            self._write_manifest(manifest)
+
+        if previous:
+            old = previous["version"]
+            self._remove(glob.glob(os.path.join(self.directory, f"*.ivf{old}")))
+            self._remove([os.path.join(self.directory, f"centroids-{old}.f32")])
+        return nlist
+
+    def _schedule_compaction(self) -> None:
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+
+        def run() -> None:
+            try:
+                self.compact()
+            except Exception as exc:
+                logger.warning("Vector segment compaction failed: %s", exc)
+
+        self._compactor = threading.Thread(target=run, name="vector-compaction", daemon=True)
+        self._compactor.start()
+
+
+def _benchmark(index: VectorIndex, queries: int, k: int, nprobes: List[int]) -> None:
+    """Recall@k and latency of IVF search against exact search, for stored rows perturbed with noise."""
+    ids = index.ids()
+    if not len(ids):
+        print("The index is empty")
+        return
+    segments, _centroids, dim = index._snapshot()
+    rng = np.random.default_rng(1)
+    chosen = rng.choice(ids, size=min(queries, len(ids)), replace=False)
+    picked = [np.asarray(s.vectors[np.isin(s.ids, chosen)]) for s in segments]
+    vectors = np.concatenate(picked)
+    vectors = normalize(vectors + rng.normal(scale=0.5 / np.sqrt(dim), size=vectors.shape))
+
+    def run(nprobe: Optional[int]) -> Tuple[np.ndarray, List[float]]:
+        found, times = [], []
+        for query in vectors:
+            started = time.perf_counter()
+            hits = index.search(query, country=None, k=k, nprobe=nprobe)
+            times.append((time.perf_counter() - started) * 1000)
+            found.append(np.array([chunk_id for chunk_id, _ in hits], dtype=np.int64))
+        return np.array(found, dtype=object), times
+
+    exact, exact_times = run(None)
+    print(f"{len(ids)} row(s), {len(vectors)} quer(ies), k={k}")
+    print(f"  exact       recall 1.000  mean {np.mean(exact_times):7.2f} ms  p95 {np.percentile(exact_times, 95):7.2f} ms")
+    for nprobe in nprobes:
+        found, times = run(nprobe)
+        print(
+            f"  nprobe {nprobe:<4} recall {recall_at_k(exact, found):.3f}  "
+            f"mean {np.mean(times):7.2f} ms  p95 {np.percentile(times, 95):7.2f} ms"
+        )
+
+
+def _main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect, train and benchmark the local chunk vector index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Segments, rows and IVF lists")
+    train_cmd = sub.add_parser("train", help="Build the IVF lists used when VECTOR_SEARCH_MODE=ivf")
+    train_cmd.add_argument("--nlist", type=int, default=None, help="Number of lists (default: about sqrt(rows))")
+    train_cmd.add_argument("--iterations", type=int, default=10)
+    bench_cmd = sub.add_parser("bench", help="Recall@k and latency of IVF search against exact search")
+    bench_cmd.add_argument("--queries", type=int, default=100)
+    bench_cmd.add_argument("-k", type=int, default=10)
+    bench_cmd.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    from .storage import segments_dir
+
+    index = VectorIndex(segments_dir())
+    if args.command == "stats":
+        print(json.dumps(index.stats(), indent=2))
+    elif args.command == "train":
+        started = time.monotonic()
+        nlist = index.train(args.nlist, args.iterations)
+        print(f"{nlist} list(s) over {len(index)} row(s) in {time.monotonic() - started:.1f}s")
+    elif args.command == "bench":
+        if not index.trained:
+            print("No IVF lists yet; run `train` first")
+            return
+        _benchmark(index, args.queries, args.k, args.nprobe)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Keep databases, caches and segment files the app creates at import out of app/data
+_DATA_DIR = tempfile.mkdtemp(prefix="legal-assistant-tests-")
+os.environ.setdefault("DB_PATH", os.path.join(_DATA_DIR, "app.db"))
+os.environ.setdefault("RESPONSE_CACHE_PATH", os.path.join(_DATA_DIR, "http_cache.db"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from app.services.ann_index import recall_at_k
+from app.services.vector_index import VectorIndex, normalize
+
+ROWS, DIM, CLUSTERS, K, NPROBE = 2000, 32, 40, 10, 4
+MIN_RECALL = 0.95
+
+
+def _clustered(rng, centers, n):
+    labels = rng.integers(0, len(centers), n)
+    return normalize((centers[labels] + rng.normal(scale=0.5, size=(n, DIM))).astype(np.float32))
+
+
+def _search_all(index, queries, nprobe):
+    return [np.array([i for i, _ in index.search(q, country=None, k=K, nprobe=nprobe)]) for q in queries]
+
+
+def _recall(index, queries):
+    return recall_at_k(_search_all(index, queries, None), _search_all(index, queries, NPROBE))
+
+
+def _settle(index):
+    # Let a compaction started by delete() finish before looking at the index
+    if index._compactor is not None:
+        index._compactor.join()
+
+
+@pytest.fixture
+def trained(tmp_path):
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(CLUSTERS, DIM))
+    index = VectorIndex(str(tmp_path), segment_rows=500)
+    index.add("US", range(1, ROWS + 1), _clustered(rng, centers, ROWS))
+    index.train()
+    return index, _clustered(rng, centers, 50)
+
+
+def test_ivf_recall_against_exact_search(trained):
+    index, queries = trained
+
+    assert index.stats()["ivf"]["unassigned"] == 0
+    assert _recall(index, queries) >= MIN_RECALL
+
+
+def test_ivf_skips_deleted_rows(trained):
+    index, queries = trained
+    # Few enough that the segment is not compacted: rows stay, tombstoned
+    deleted = set(range(1, 51))
+    index.delete(deleted)
+    _settle(index)
+
+    assert index.stats()["deleted"] == len(deleted)
+    for hits in _search_all(index, queries, NPROBE):
+        assert not deleted & set(hits.tolist())
+    assert _recall(index, queries) >= MIN_RECALL
+
+
+def test_ivf_survives_compaction(trained):
+    index, queries = trained
+    deleted = set(range(1, 401))
+    index.delete(deleted)
+    _settle(index)
+    index.compact()
+
+    stats = index.stats()
+    assert stats["rows"] == ROWS - len(deleted)
+    assert stats["deleted"] == 0
+    assert stats["ivf"]["unassigned"] == 0  # compacted rows keep their lists
+    for hits in _search_all(index, queries, NPROBE):
+        assert not deleted & set(hits.tolist())
+    assert _recall(index, queries) >= MIN_RECALL
+
+
+def test_rows_added_after_training_are_searched(trained):
+    index, _ = trained
+    extra = normalize(np.eye(DIM, dtype=np.float32)[:1])
+    index.add("US", [ROWS + 1], extra)
+
+    assert index.stats()["ivf"]["unassigned"] == 0  # assigned to its nearest list on add
+    assert index.search(extra[0], country=None, k=1, nprobe=1)[0][0] == ROWS + 1
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import chat
+from app.services.live_retrieval import LiveResult
+
+
+RESULTS = [
+    LiveResult(
+        text="Work not requested but suffered or permitted is work time.",
+        title="General",
+        url="https://www.ecfr.gov/current/title-29/section-785.11",
+        citation="29 CFR § 785.11",
+        authority="binding",
+        source="ecfr",
+    )
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_retrieve(question, jurisdiction=None, max_results=10, report=None, on_event=None):
+        on_event({"type": "source_started", "source": "ecfr"})
+        on_event({"type": "source_finished", "source": "ecfr", "status": "ok", "count": 1, "elapsed_ms": 5})
+        return RESULTS
+
+    monkeypatch.setattr(chat, "retrieve_live_async", fake_retrieve)
+    monkeypatch.setattr(chat, "answer_tokens", lambda question, country, results: iter(["Overtime ", "is due [1]."]))
+    app = FastAPI()
+    app.include_router(chat.router)
+    return TestClient(app)
+
+
+def test_text_stream_matches_legacy_format(client):
+    resp = client.post("/api/chat/stream", json={"question": "Do I get overtime?", "country": "US"})
+
+    assert resp.headers["content-type"] == "text/plain; charset=utf-8"
+    assert resp.headers["x-retrieval-count"] == "1"
+    sources = [{"n": 1, "citation": RESULTS[0].citation, "url": RESULTS[0].url, "title": RESULTS[0].title}]
+    assert resp.text == f"Overtime is due [1].\n\nSOURCES_DATA:{json.dumps(sources)}"
+
+
+def test_ndjson_stream_carries_progress(client):
+    resp = client.post("/api/chat/stream?format=ndjson", json={"question": "Do I get overtime?", "country": "US"})
+
+    kinds = [json.loads(line)["type"] for line in resp.text.splitlines()]
+    assert kinds[:3] == ["retrieval_started", "source_started", "source_finished"]
+    assert kinds[-1] == "done"
+    assert "x-retrieval-count" not in resp.headers
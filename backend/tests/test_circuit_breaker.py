@@ -0,0 +1,51 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import http_client
+from app.services.circuit_breaker import CircuitOpenError, get_breaker
+
+
+def _half_open_breaker(url):
+    breaker = get_breaker(url)
+    # An open period of zero seconds: the next call is the half-open probe
+    breaker.hold_open(0.0)
+    return breaker
+
+
+def _raise_decoding_error(request):
+    raise httpx.DecodingError("bad gzip", request=request)
+
+
+def test_non_transport_error_during_probe_releases_breaker():
+    url = "https://probe-sync.example/doc"
+    breaker = _half_open_breaker(url)
+    client = httpx.Client(transport=httpx.MockTransport(_raise_decoding_error))
+    with pytest.raises(httpx.DecodingError):
+        http_client._send(client, client.build_request("GET", url), "probe-sync")
+
+    assert breaker.snapshot()["failure"] == 1
+    breaker.before_call()  # a new probe is admitted instead of CircuitOpenError
+
+
+def test_non_transport_error_during_async_probe_releases_breaker():
+    url = "https://probe-async.example/doc"
+    breaker = _half_open_breaker(url)
+
+    async def probe():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_raise_decoding_error)) as client:
+            await http_client._send_async(client, client.build_request("GET", url), "probe-async")
+
+    with pytest.raises(httpx.DecodingError):
+        asyncio.run(probe())
+
+    assert breaker.snapshot()["failure"] == 1
+    breaker.before_call()
+
+
+def test_probe_in_flight_refuses_second_call():
+    breaker = _half_open_breaker("https://probe-busy.example/doc")
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services import retrieval_cache
+from app.services.query_analysis import analyze_query
+from app.services.retrieval_cache import cached
+from app.services.singleflight import SingleFlight
+
+N = 8
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def _run_threads(flight, key, fn):
+    outcomes = []
+
+    def call():
+        try:
+            outcomes.append(flight.do(key, fn))
+        except Exception as exc:
+            outcomes.append(exc)
+
+    threads = [threading.Thread(target=call) for _ in range(N)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight("test-threads")
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(2.0)
+        return ["result"]
+
+    threads, outcomes = _run_threads(flight, "key", fetch)
+    _wait_for(lambda: flight.stats()["shared"] == N - 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _result, shared in outcomes) == [False] + [True] * (N - 1)
+    assert all(result == ["result"] for result, _shared in outcomes)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_leader_exception_reaches_every_thread():
+    flight = SingleFlight("test-thread-errors")
+    release = threading.Event()
+
+    def fetch():
+        release.wait(2.0)
+        raise RuntimeError("upstream down")
+
+    threads, outcomes = _run_threads(flight, "key", fetch)
+    _wait_for(lambda: flight.stats()["shared"] == N - 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(outcomes) == N
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+
+def test_concurrent_coroutines_share_one_call():
+    flight = SingleFlight("test-async")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return ["result"]
+
+    async def run():
+        return await asyncio.gather(*(flight.do_async("key", fetch) for _ in range(N)))
+
+    outcomes = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert sum(shared for _result, shared in outcomes) == N - 1
+    assert all(result == ["result"] for result, _shared in outcomes)
+
+
+def test_leader_exception_reaches_every_coroutine():
+    flight = SingleFlight("test-async-errors")
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        return await asyncio.gather(*(flight.do_async("key", fetch) for _ in range(N)), return_exceptions=True)
+
+    outcomes = asyncio.run(run())
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+
+def test_cancelled_follower_does_not_cancel_shared_task():
+    flight = SingleFlight("test-cancel")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ["result"]
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do_async("key", fetch))
+        follower = asyncio.ensure_future(flight.do_async("key", fetch))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(run()) == (["result"], False)
+    assert len(calls) == 1
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(monkeypatch):
+    retrieval_cache.clear_cache()
+    ttl = retrieval_cache.SOURCE_TTLS["ecfr"]
+    refreshing = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    @cached("ecfr")
+    def fetch(query):
+        calls.append(query)
+        if len(calls) > 1:
+            refreshing.set()
+            release.wait(2.0)
+        return [f"result {len(calls)}"]
+
+    assert fetch("overtime pay") == ["result 1"]
+
+    now = time.monotonic()
+    monkeypatch.setattr(retrieval_cache.time, "monotonic", lambda: now + ttl * 1.5)
+    # Expired but within the stale window: every caller gets the old value at once
+    assert [fetch("overtime pay") for _ in range(3)] == [["result 1"]] * 3
+    assert refreshing.wait(2.0)
+    release.set()
+    _wait_for(lambda: fetch("overtime pay") == ["result 2"])
+
+    assert len(calls) == 2
+    retrieval_cache.clear_cache()
+
+
+def test_equivalent_questions_share_a_key():
+    base = analyze_query("What is the minimum wage in Texas?", "Texas")
+
+    assert analyze_query("minimum wage Texas", "Texas").key == base.key
+    assert analyze_query("TEXAS: what are the minimum wage rules?", "Texas").key == base.key
+    assert analyze_query("What is the maximum wage in Texas?", "Texas").key != base.key
+    assert analyze_query("In Texas, what does the minimum wage say?", "Texas").key == base.key
+    assert analyze_query("What is the minimum wage in Texas?", "US").key != base.key
+
+
+def test_equivalent_questions_share_cache_entries():
+    retrieval_cache.clear_cache()
+    calls = []
+
+    @cached("federal_register")
+    def fetch(q):
+        calls.append(q.question)
+        return ["notice"]
+
+    fetch(analyze_query("What are the overtime rules for nurses?", "US"))
+    fetch(analyze_query("nurses overtime rules", "US"))
+
+    assert len(calls) == 1
+    retrieval_cache.clear_cache()
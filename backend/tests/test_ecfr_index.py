@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from app.services import ecfr_index, live_retrieval
+from app.services.ecfr_index import EcfrIndex
+from app.services.live_retrieval import LiveResult
+from app.services.query_analysis import analyze_query
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "ecfr-title29-sample.xml")
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = EcfrIndex(str(tmp_path / "ecfr.db"))
+    index.ingest(FIXTURE)
+    return index
+
+
+@pytest.fixture
+def fresh_lookup(monkeypatch, tmp_path):
+    """get_ecfr_index() as in a new process, pointed at tmp_path/ecfr.db."""
+    path = str(tmp_path / "ecfr.db")
+    monkeypatch.setattr(ecfr_index, "_INDEX", None)
+    monkeypatch.setattr(ecfr_index, "_INDEX_CHECKED_AT", None)
+    monkeypatch.setattr(ecfr_index, "_index_path", lambda: path)
+    return path
+
+
+def test_ingest_skips_reserved_sections(index):
+    stats = index.stats()
+
+    assert stats["sections"] == 3
+    assert stats["titles"]["29"]["amended"] == "Jan. 2, 2024"
+    assert stats["titles"]["29"]["heading"] == "Title 29—Labor"
+
+
+def test_search_ranks_heading_matches_and_keeps_hierarchy(index):
+    sections = index.search("overtime pay", limit=5)
+
+    assert [s.section for s in sections][:1] == ["778.107"]
+    best = sections[0]
+    assert best.citation == "29 C.F.R. § 778.107"
+    assert best.url == "https://www.ecfr.gov/current/title-29/part-778/section-778.107"
+    assert best.heading == "General standard for overtime pay"
+    assert best.hierarchy["part"] == "PART 778—OVERTIME COMPENSATION"
+    assert "[33 FR" not in best.text  # source notes are not regulation text
+
+
+def test_search_match_all_versus_any(index):
+    assert index.search("overtime sleeping", match_all=True) == []
+    assert {s.section for s in index.search("overtime sleeping", match_all=False)} >= {"778.107", "785.22"}
+    assert index.search("federal regulations") == []  # only stopwords
+
+
+def test_reingest_replaces_title_and_its_fts_rows(index, tmp_path):
+    revised = tmp_path / "title29.xml"
+    with open(FIXTURE, encoding="utf-8") as f:
+        revised.write_text(f.read().replace("sleeping period", "rest period"), encoding="utf-8")
+
+    assert index.ingest(str(revised)) == (29, 3)
+    assert index.search("sleeping") == []
+    assert [s.section for s in index.search("rest period")] == ["785.22"]
+    assert index.section_count() == 3
+
+
+def test_missing_index_is_none_and_picked_up_after_recheck(monkeypatch, fresh_lookup):
+    clock = [5.0]  # shortly after boot: the first look must still happen
+    monkeypatch.setattr(ecfr_index.time, "monotonic", lambda: clock[0])
+
+    assert ecfr_index.get_ecfr_index() is None
+    EcfrIndex(fresh_lookup).ingest(FIXTURE)
+    assert ecfr_index.get_ecfr_index() is None  # checked moments ago
+
+    clock[0] += ecfr_index._RECHECK_SECONDS
+    assert ecfr_index.get_ecfr_index() is not None
+
+
+def test_first_lookup_soon_after_boot_finds_existing_index(monkeypatch, fresh_lookup):
+    EcfrIndex(fresh_lookup).ingest(FIXTURE)
+    monkeypatch.setattr(ecfr_index.time, "monotonic", lambda: 5.0)
+
+    assert ecfr_index.get_ecfr_index() is not None
+
+
+def test_regulations_fall_back_to_ecfr_api_without_mirror(monkeypatch, fresh_lookup):
+    remote = [LiveResult("text", "title", "https://www.ecfr.gov/x", "29 C.F.R. § 1.1", "binding", "ecfr")]
+    monkeypatch.setattr(live_retrieval, "fetch_ecfr", lambda q, max_results: remote)
+
+    assert live_retrieval.fetch_regulations(analyze_query("overtime pay rate", "US")) == remote
+
+
+def test_regulations_answered_from_mirror(monkeypatch, fresh_lookup):
+    EcfrIndex(fresh_lookup).ingest(FIXTURE)
+    monkeypatch.setattr(live_retrieval, "fetch_ecfr", lambda q, max_results: pytest.fail("remote called"))
+
+    results = live_retrieval.fetch_regulations(analyze_query("What is the overtime pay standard?", "US"))
+
+    assert results[0].citation == "29 C.F.R. § 778.107"
+    assert results[0].source == "ecfr"
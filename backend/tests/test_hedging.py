@@ -0,0 +1,82 @@
+import asyncio
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED
+
+import httpx
+
+from app.services import http_client
+
+URL = "https://hedge.example/doc"
+
+
+def _slow_ok(request):
+    time.sleep(0.05)
+    # An iterator body stays open until read or closed, like a real streamed response
+    return httpx.Response(200, content=iter([b"ok"]))
+
+
+async def _slow_ok_async(request):
+    await asyncio.sleep(0.05)
+
+    async def body():
+        yield b"ok"
+
+    return httpx.Response(200, content=body())
+
+
+def test_both_hedged_responses_landing_together_are_all_closed(monkeypatch):
+    monkeypatch.setattr(http_client.latency, "hedge_delay", lambda source: 0.01)
+    real_wait = http_client.wait
+
+    def wait_for_both(futures, timeout=None, return_when=ALL_COMPLETED):
+        # Force primary and hedge into the same done set
+        if return_when == FIRST_COMPLETED:
+            return_when = ALL_COMPLETED
+        return real_wait(futures, timeout=timeout, return_when=return_when)
+
+    monkeypatch.setattr(http_client, "wait", wait_for_both)
+    client = httpx.Client(transport=httpx.MockTransport(_slow_ok))
+    sent = []
+    send = client.send
+
+    def recording_send(request, stream=False):
+        sent.append(send(request, stream=stream))
+        return sent[-1]
+
+    monkeypatch.setattr(client, "send", recording_send)
+
+    response = http_client._send_hedged(client, client.build_request("GET", URL), True, "hedge-sync")
+
+    assert len(sent) == 2
+    assert not response.is_closed
+    assert [r.is_closed for r in sent if r is not response] == [True]
+
+
+def test_both_async_hedged_responses_landing_together_are_all_closed(monkeypatch):
+    monkeypatch.setattr(http_client.latency, "hedge_delay", lambda source: 0.01)
+    real_wait = asyncio.wait
+
+    async def wait_for_both(tasks, timeout=None, return_when=asyncio.ALL_COMPLETED):
+        if return_when == asyncio.FIRST_COMPLETED:
+            return_when = asyncio.ALL_COMPLETED
+        return await real_wait(tasks, timeout=timeout, return_when=return_when)
+
+    monkeypatch.setattr(http_client.asyncio, "wait", wait_for_both)
+    sent = []
+
+    async def hedge():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_slow_ok_async)) as client:
+            send = client.send
+
+            async def recording_send(request, stream=False):
+                sent.append(await send(request, stream=stream))
+                return sent[-1]
+
+            client.send = recording_send
+            return await http_client._send_hedged_async(client, client.build_request("GET", URL), True, "hedge-async")
+
+    response = asyncio.run(hedge())
+
+    assert len(sent) == 2
+    assert not response.is_closed
+    assert [r.is_closed for r in sent if r is not response] == [True]
@@ -0,0 +1,41 @@
+from app.services.near_duplicates import similarity_matrix, suppress
+
+NOTICE = (
+    "The Department of Labor is amending its regulations under the Fair Labor Standards Act "
+    "to update the salary level required for the executive, administrative and professional "
+    "exemption from minimum wage and overtime pay requirements, effective July 1."
+)
+# The same notice republished with a couple of words changed
+REPRINT = NOTICE.replace("is amending", "amends").replace("effective July 1", "effective on July 1")
+OTHER = (
+    "Landlords must return a tenant's security deposit within thirty days after the lease ends, "
+    "together with an itemized list of any deductions for unpaid rent or damage beyond normal "
+    "wear and tear to the rental unit."
+)
+THRESHOLD = 0.6
+
+
+def test_near_identical_passage_is_suppressed():
+    texts = [NOTICE, OTHER, REPRINT]
+
+    assert similarity_matrix(texts)[0, 2] >= THRESHOLD
+    assert suppress(texts, [0, 1, 2], [False, False, False], THRESHOLD) == [0, 1]
+
+
+def test_distinct_passages_are_kept():
+    texts = [NOTICE, OTHER]
+
+    assert similarity_matrix(texts)[0, 1] < 0.1
+    assert suppress(texts, [1, 0], [False, False], THRESHOLD) == [1, 0]
+
+
+def test_pinned_passage_is_kept_and_wins_over_better_ranked_copy():
+    texts = [NOTICE, REPRINT]
+
+    assert suppress(texts, [0, 1], [False, True], THRESHOLD) == [1]
+
+
+def test_short_texts_are_never_duplicates():
+    texts = ["Overtime pay rules.", "Overtime pay rules."]
+
+    assert suppress(texts, [0, 1], [False, False], THRESHOLD) == [0, 1]
@@ -0,0 +1,85 @@
+import httpx
+import pytest
+
+from app.services import circuit_breaker, http_client, rate_limit
+from app.services.circuit_breaker import CircuitOpenError, get_breaker
+from app.services.rate_limit import RateLimitedError, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def quota_host(monkeypatch):
+    """A fresh 60/min bucket and a closed breaker for a test-only host."""
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    monkeypatch.setattr(rate_limit, "_buckets", {})
+    monkeypatch.setattr(rate_limit, "_RATES", {"quota.example": 60.0})
+    return "quota.example"
+
+
+def test_bucket_refills_at_its_rate(clock):
+    bucket = TokenBucket("test", rate=2.0, burst=2, max_wait=1.0)
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    # Empty: the next token is due in 1 / rate seconds
+    assert bucket.reserve() == pytest.approx(0.5)
+
+    clock[0] += 2.0
+    assert bucket.snapshot()["tokens_available"] == pytest.approx(2.0)  # capped at burst
+    assert bucket.reserve() == 0.0
+
+
+def test_bucket_refuses_waits_beyond_max_wait(clock):
+    bucket = TokenBucket("test", rate=1.0, burst=1, max_wait=1.5)
+    bucket.reserve()
+    bucket.reserve()  # due in 1s
+
+    with pytest.raises(RateLimitedError):
+        bucket.reserve()  # would be due in 2s
+    assert bucket.snapshot()["rejected"] == 1
+
+
+def test_429_retry_after_is_honoured_and_drains_bucket(monkeypatch, quota_host):
+    replies = iter([httpx.Response(429, headers={"retry-after": "2"}), httpx.Response(200, text="ok")])
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: next(replies)))
+    slept = []
+    monkeypatch.setattr(http_client.time, "sleep", slept.append)
+
+    response = http_client._send(client, client.build_request("GET", f"https://{quota_host}/a"), "quota")
+
+    assert response.status_code == 200
+    # Backoff at least as long as Retry-After, then a queue wait: the 429 emptied the bucket
+    assert len(slept) == 2 and slept[0] >= 2.0
+    stats = rate_limit.rate_limit_stats()[quota_host]
+    assert stats["throttled_by_upstream"] == 1
+    assert stats["granted"] == 2
+
+
+def test_open_breaker_refuses_before_taking_a_token(quota_host):
+    url = f"https://{quota_host}/b"
+    get_breaker(url).hold_open(30.0)
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+
+    with pytest.raises(CircuitOpenError):
+        http_client._send(client, client.build_request("GET", url), "quota")
+
+    assert rate_limit.get_bucket(url).snapshot()["granted"] == 0
+
+
+def test_rate_limited_probe_frees_half_open_slot(monkeypatch, quota_host):
+    url = f"https://{quota_host}/c"
+    breaker = get_breaker(url)
+    breaker.hold_open(0.0)
+    monkeypatch.setattr(rate_limit.get_bucket(url), "max_wait", -1.0)
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+
+    with pytest.raises(RateLimitedError):
+        http_client._send(client, client.build_request("GET", url), "quota")
+
+    breaker.before_call()  # the probe was never sent, so the next caller may make it
@@ -0,0 +1,23 @@
+import ast
+import inspect
+
+from app.services import live_retrieval
+from app.services.rerank import SOURCE_PRIORS
+
+
+def _emitted_sources():
+    """Every `source=` literal passed to a LiveResult in live_retrieval."""
+    tree = ast.parse(inspect.getsource(live_retrieval))
+    sources = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "LiveResult":
+            for keyword in node.keywords:
+                if keyword.arg == "source" and isinstance(keyword.value, ast.Constant):
+                    sources.add(keyword.value.value)
+    return sources
+
+
+def test_every_live_source_has_an_explicit_prior():
+    sources = _emitted_sources()
+    assert {"uscode", "state_statute", "ecfr", "federal_register"} <= sources
+    assert sources - SOURCE_PRIORS.keys() == set()
@@ -0,0 +1,87 @@
+import httpx
+
+from app.services import response_cache
+from app.services.response_cache import ResponseCache
+
+KEY = "https://www.ecfr.gov/api/versioner/v1/full/2024-01-01/title-29.xml"
+
+
+def _accessed_at(cache: ResponseCache) -> float:
+    return cache._conn.execute("SELECT accessed_at FROM responses WHERE key = ?", (KEY,)).fetchone()[0]
+
+
+def test_hit_updates_accessed_at_only_when_stale(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "http_cache.db"), 1024 * 1024)
+    cache.put(KEY, httpx.Response(200, content=b"<xml/>", headers={"etag": '"v1"'}))
+    stored = _accessed_at(cache)
+
+    clock = [stored + 10.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: clock[0])
+    assert cache.get(KEY).body == b"<xml/>"
+    assert _accessed_at(cache) == stored
+
+    clock[0] = stored + response_cache._ACCESS_RESOLUTION + 1.0
+    assert cache.get(KEY) is not None
+    assert _accessed_at(cache) == clock[0]
+
+
+def test_failed_open_is_not_retried_on_every_call(monkeypatch):
+    attempts = []
+
+    def broken(path, max_bytes):
+        attempts.append(path)
+        raise OSError("read-only file system")
+
+    monkeypatch.setattr(response_cache, "_CACHE", None)
+    monkeypatch.setattr(response_cache, "_FAILED_AT", 0.0)
+    monkeypatch.setattr(response_cache, "ResponseCache", broken)
+    clock = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: clock[0])
+
+    assert response_cache.get_response_cache() is None
+    assert response_cache.get_response_cache() is None
+    assert len(attempts) == 1
+
+    clock[0] += response_cache._RETRY_SECONDS
+    assert response_cache.get_response_cache() is None
+    assert len(attempts) == 2
+
+
+def _tracked_total(cache: ResponseCache) -> int:
+    return cache._conn.execute("SELECT total FROM cache_size WHERE id = 0").fetchone()[0]
+
+
+def _actual_total(cache: ResponseCache) -> int:
+    return cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+
+def test_size_total_follows_puts_replacements_and_purges(tmp_path):
+    cache = ResponseCache(str(tmp_path / "http_cache.db"), 1024 * 1024)
+    cache.put_body(KEY, 200, "text/xml", b"x" * 100, None, None)
+    cache.put_body(KEY + "?p=2", 200, "text/xml", b"y" * 50, None, None)
+    cache.put_body(KEY, 200, "text/xml", b"z" * 30, None, None)  # replaces the first body
+    assert _tracked_total(cache) == _actual_total(cache) == 80
+
+    cache.purge(host="www.ecfr.gov")
+    assert _tracked_total(cache) == _actual_total(cache) == 0
+
+
+def test_eviction_keeps_cache_under_its_cap(tmp_path):
+    cache = ResponseCache(str(tmp_path / "http_cache.db"), 1000)
+    for n in range(12):
+        cache.put_body(f"{KEY}?page={n}", 200, "text/xml", b"x" * 100, None, None)
+
+    assert _tracked_total(cache) == _actual_total(cache) <= 1000
+    assert cache.get(f"{KEY}?page=0") is None  # least recently used went first
+    assert cache.get(f"{KEY}?page=11") is not None
+
+
+def test_existing_database_gets_its_total_on_open(tmp_path):
+    path = str(tmp_path / "http_cache.db")
+    cache = ResponseCache(path, 1024 * 1024)
+    cache.put_body(KEY, 200, "text/xml", b"x" * 100, None, None)
+    # A cache file written before the counter existed
+    cache._conn.execute("DROP TABLE cache_size")
+    cache._conn.commit()
+
+    assert _tracked_total(ResponseCache(path, 1024 * 1024)) == 100
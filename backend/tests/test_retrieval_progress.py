@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+from app.services import live_retrieval
+from app.services.live_retrieval import RetrievalReport
+
+QUESTION = "Is my landlord allowed to keep my security deposit?"
+
+
+def _emit_source(hub, source):
+    hub.emit({"type": "source_started", "source": source})
+    hub.emit({"type": "source_finished", "source": source, "status": "ok", "count": 0, "elapsed_ms": 1})
+
+
+def test_overlapping_sync_and_async_retrievals_keep_separate_progress(monkeypatch):
+    sync_done = threading.Event()
+
+    def fake_retrieve(q, max_results, hub):
+        _emit_source(hub, "ecfr")
+        sync_done.set()
+        return [], RetrievalReport()
+
+    async def fake_retrieve_async(q, max_results, hub):
+        _emit_source(hub, "ecfr")
+        # Stay in flight until the sync leader for the same question has run
+        while not sync_done.is_set():
+            await asyncio.sleep(0.01)
+        return [], RetrievalReport()
+
+    monkeypatch.setattr(live_retrieval, "_retrieve_live", fake_retrieve)
+    monkeypatch.setattr(live_retrieval, "_retrieve_live_async", fake_retrieve_async)
+    async_events, sync_events = [], []
+
+    async def both():
+        loop_thread = threading.get_ident()
+
+        def on_async_event(event):
+            async_events.append((event["type"], threading.get_ident() == loop_thread))
+
+        retrieval = asyncio.ensure_future(
+            live_retrieval.retrieve_live_async(QUESTION, "US", max_results=5, on_event=on_async_event)
+        )
+        await asyncio.sleep(0.01)
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: live_retrieval.retrieve_live(QUESTION, "US", max_results=5, on_event=sync_events.append),
+        )
+        await retrieval
+
+    asyncio.run(both())
+
+    assert async_events == [("source_started", True), ("source_finished", True)]
+    assert [event["type"] for event in sync_events] == ["source_started", "source_finished"]
@@ -0,0 +1,17 @@
+from app.core.settings import get_settings
+
+
+def test_settings_are_read_once_until_cache_cleared(monkeypatch):
+    first = get_settings()
+    assert get_settings() is first
+
+    monkeypatch.setenv("RETRIEVAL_DEADLINE_SECONDS", "3.5")
+    assert get_settings().retrieval_deadline_seconds == first.retrieval_deadline_seconds
+
+    # Environment changes only take effect after the cache is cleared
+    get_settings.cache_clear()
+    try:
+        assert get_settings().retrieval_deadline_seconds == 3.5
+    finally:
+        monkeypatch.undo()
+        get_settings.cache_clear()
@@ -0,0 +1,37 @@
+import pytest
+
+from app.services.live_retrieval import fetch_state_statutes, fetch_uscode
+from app.services.query_analysis import analyze_query
+
+OFF_TOPIC = [
+    ("Is it legal to record a phone call?", "Texas"),
+    ("Is it legal to record a phone call?", "California"),
+    ("Is it legal to record a phone call?", "New York"),
+    ("Is it legal to record a phone call?", "Florida"),
+    ("Can I carry a gun in my car?", "Texas"),
+    ("Can my boss make me work on Sunday?", "Texas"),
+    ("Can I be fired for my religion at work?", "Texas"),
+]
+
+
+@pytest.mark.parametrize("question,state", OFF_TOPIC)
+def test_off_topic_questions_match_no_statute(question, state):
+    q = analyze_query(question, state)
+    assert fetch_uscode(q) == []
+    assert fetch_state_statutes(q) == []
+
+
+@pytest.mark.parametrize(
+    "question,state,citation",
+    [
+        ("My employer won't pay me overtime", "Texas", "29 U.S.C. § 206-207"),
+        ("Can I take unpaid leave to care for my sick mother?", "Texas", "29 U.S.C. § 2612"),
+    ],
+)
+def test_bm25_finds_statute_without_regex_match(question, state, citation):
+    assert [r.citation for r in fetch_uscode(analyze_query(question, state))] == [citation]
+
+
+def test_bm25_finds_state_topic_without_regex_match():
+    results = fetch_state_statutes(analyze_query("Who pays for an injury in the workplace?", "Texas"))
+    assert [r.citation for r in results] == ["Tex. Labor Code § 406"]
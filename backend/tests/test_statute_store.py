@@ -0,0 +1,49 @@
+import json
+import os
+import threading
+
+from app.services.statute_store import StatuteStore
+
+URL = "https://www.law.cornell.edu/uscode/text/29/207"
+
+
+def test_concurrent_saves_always_publish_a_complete_file(tmp_path):
+    path = str(tmp_path / "lii_statutes.json")
+    # Two processes' stores (e.g. a second worker and the CLI) sharing one file
+    stores = [StatuteStore(path, lambda url: "", refresh_interval=3600) for _ in range(2)]
+    for n, store in enumerate(stores):
+        store._texts = {f"{URL}?v={i}": f"text {n} " * 2000 for i in range(20)}
+    errors = []
+
+    def save_repeatedly(store):
+        try:
+            for _ in range(20):
+                store._save()
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=save_repeatedly, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with open(path, encoding="utf-8") as f:
+        assert len(json.load(f)) == 20
+    assert os.listdir(tmp_path) == ["lii_statutes.json"]  # no temp files left behind
+
+
+def test_refresh_keeps_previous_text_when_fetch_fails(tmp_path):
+    path = str(tmp_path / "lii_statutes.json")
+    pages = {URL: "Overtime at one and one-half times the regular rate."}
+    store = StatuteStore(path, lambda url: pages[url], refresh_interval=3600)
+    assert store.refresh([URL]) == 1
+
+    pages[URL] = ""  # the upstream is failing
+    assert store.refresh([URL]) == 0
+    assert store.get(URL) == "Overtime at one and one-half times the regular rate."
+
+    reloaded = StatuteStore(path, lambda url: "", refresh_interval=3600)
+    assert reloaded.load() == 1
+    assert reloaded.stale_urls([URL]) == []
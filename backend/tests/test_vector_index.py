@@ -0,0 +1,41 @@
+import numpy as np
+
+from app.services import storage
+from app.services.vector_index import VectorIndex, normalize
+
+
+def _vectors(*rows):
+    return normalize(np.array(rows, dtype=np.float32))
+
+
+def test_add_revives_deleted_id(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    # Enough rows that one delete stays below the compaction threshold
+    index.add("US", range(1, 11), _vectors(*([[1, 0, 0]] * 9 + [[0, 1, 0]])))
+    index.delete([10])
+    assert index.search(_vectors([0, 1, 0])[0], country=None, k=1)[0][0] != 10
+
+    index.add("US", [10], _vectors([0, 1, 0]))
+    assert index.search(_vectors([0, 1, 0])[0], country=None, k=1)[0][0] == 10
+    assert sorted(index.ids().tolist()) == list(range(1, 11))
+
+
+def test_sync_keeps_chunk_saved_by_another_worker(monkeypatch):
+    doc = storage.save_document(source="s", url="u", country="US", title="t", content="c", metadata={})
+    storage.save_chunks(doc, [("first", [1.0, 0.0, 0.0])])
+
+    # Another worker saves (and indexes) a chunk while this one is reconciling
+    original_ids = storage._INDEX.ids
+
+    def concurrent_save_then_ids():
+        storage.save_chunks(doc, [("concurrent", [0.0, 1.0, 0.0])])
+        return original_ids()
+
+    monkeypatch.setattr(storage._INDEX, "ids", concurrent_save_then_ids)
+    storage._index_synced = False
+    storage._sync_index()
+    monkeypatch.undo()
+    assert storage._index_synced
+
+    hits = storage.retrieve_similar([0.0, 1.0, 0.0], country="US", k=1)
+    assert [h.text for h in hits] == ["concurrent"]
@@ -130,7 +130,45 @@ function emailSummary(question: string, content: string, sources?: Source[], jur
 }
 
 type Source = { n: number; citation: string | null; url: string; title: string | null };
-type Message = { role: "user" | "assistant"; content: string; country?: string; error?: boolean; sources?: Source[] };
+type Message = { role: "user" | "assistant"; content: string; country?: string; error?: boolean; sources?: Source[]; status?: string };
+
+// Events of the NDJSON chat stream (one JSON object per line). Progress
+// events come first, then `sources`, then `token`s and finally `done`/`error`.
+type StreamEvent = {
+  type: string;
+  source?: string;
+  count?: number;
+  status?: string;
+  sources?: Source[];
+  text?: string;
+  message?: string;
+};
+
+const SOURCE_LABELS: Record<string, string> = {
+  uscode: "US Code",
+  state_statute: "state statutes",
+  ecfr: "eCFR",
+  fr: "Federal Register",
+  courtlistener: "CourtListener",
+  courtlistener_federal: "CourtListener",
+  openstates: "OpenStates",
+};
+
+function describeProgress(event: StreamEvent, current: string): string {
+  const label = SOURCE_LABELS[event.source || ""] || event.source;
+  switch (event.type) {
+    case "retrieval_started":
+      return "Searching official sources…";
+    case "source_started":
+      return `Searching ${label}…`;
+    case "source_finished":
+      return event.status === "ok" ? `${label}: ${event.count} result(s)` : `${label} unavailable`;
+    case "retrieval_finished":
+      return `Found ${event.count} source(s) — drafting answer…`;
+    default:
+      return current;
+  }
+}
 
 export default function HomePage() {
   const [question, setQuestion] = useState("");
@@ -273,7 +311,7 @@ export default function HomePage() {
       streamAbortRef.current = controller;
       const res = await fetch(`${BACKEND_URL}/api/chat/stream`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: { "Content-Type": "application/json", Accept: "application/x-ndjson" },
         body: JSON.stringify({ question: userQuestion, country: country || null }),
         signal: controller.signal
       });
@@ -283,29 +321,59 @@ export default function HomePage() {
 
       const reader = res.body.getReader();
       const decoder = new TextDecoder();
+      let pending = "";
       let assistant = "";
+      let status = "Searching official sources…";
       let sources: Source[] = [];
+      let failure = "";
       setMessages((prev) => [...prev, { role: "assistant", content: "" }]);
 
+      const handleEvent = (event: StreamEvent) => {
+        switch (event.type) {
+          case "sources":
+            sources = event.sources || [];
+            break;
+          case "token":
+            assistant += event.text || "";
+            break;
+          case "error":
+            failure = event.message || "The answer could not be completed.";
+            break;
+          case "done":
+            break;
+          default:
+            status = describeProgress(event, status);
+        }
+      };
+
       while (true) {
         const { done, value } = await reader.read();
         if (done) break;
-        const chunk = decoder.decode(value, { stream: true });
-        assistant += chunk;
-
-        const markerIdx = assistant.indexOf("\n\nSOURCES_DATA:");
-        let displayText = assistant;
-        if (markerIdx !== -1) {
-          displayText = assistant.slice(0, markerIdx);
+        pending += decoder.decode(value, { stream: true });
+
+        // Only complete lines are parsed; a partial one waits for the next chunk
+        let newline: number;
+        while ((newline = pending.indexOf("\n")) !== -1) {
+          const line = pending.slice(0, newline);
+          pending = pending.slice(newline + 1);
+          if (!line.trim()) continue;
           try {
-            const jsonStr = assistant.slice(markerIdx + "\n\nSOURCES_DATA:".length);
-            sources = JSON.parse(jsonStr) as Source[];
-          } catch { /* incomplete chunk */ }
+            handleEvent(JSON.parse(line) as StreamEvent);
+          } catch { /* malformed line */ }
         }
 
         setMessages((prev) => {
           const copy = [...prev];
-          copy[copy.length - 1] = { role: "assistant", content: displayText, sources };
+          copy[copy.length - 1] = assistant
+            ? { role: "assistant", content: assistant, sources }
+            : { role: "assistant", content: "", sources, status };
+          return copy;
+        });
+      }
+      if (failure) {
+        setMessages((prev) => {
+          const copy = [...prev];
+          copy[copy.length - 1] = { role: "assistant", content: assistant ? `${assistant}\n\n${failure}` : failure, sources, error: true };
           return copy;
         });
       }
@@ -459,7 +527,9 @@ export default function HomePage() {
                             {m.country && <span className="opacity-60">· {m.country}</span>}
                           </div>
                           <div className="text-sm text-white/90 leading-relaxed whitespace-pre-wrap">
-                            {m.error ? m.content : renderContent(m.content, m.sources)}
+                            {m.error ? m.content : m.content ? renderContent(m.content, m.sources) : (
+                              <span className="text-white/50 italic">{m.status}</span>
+                            )}
                           </div>
                         </div>
 
@@ -0,0 +1,106 @@
+"""
+bench_passage_scoring.py — Compare PassageScorer with the original sliding-window loop.
+
+Usage:
+    python scripts/bench_passage_scoring.py                  # synthetic pages (200 KB – 4 MB)
+    python scripts/bench_passage_scoring.py page1.html ...   # saved Federal Register / LII pages
+
+Requirements:
+    pip install -r backend/requirements.txt
+
+For each page the script checks that both implementations pick the same
+excerpt, then reports the best-of-N wall time per call.
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from app.services.live_retrieval import _STATE_TOPIC_MAP, _STATUTE_MAP  # noqa: E402
+from app.services.passage_scoring import PassageScorer  # noqa: E402
+
+QUERIES = [
+    "What are the federal laws for overtime pay?",
+    "Can my employer fire me for requesting FMLA medical leave?",
+    "reasonable accommodation disability discrimination employer duties",
+]
+STOPWORDS = {"the", "a", "an", "of", "in", "is", "what", "are", "under"}
+REPEATS = 5
+
+
+def legacy_best(text: str, query_words: set, window: int = 600, max_chars: int = 1200) -> str:
+    """The loop previously inlined in _fetch_fr_fulltext."""
+    best_idx = 0
+    best_score = 0
+    for i in range(0, len(text) - window, 100):
+        chunk = text[i: i + window].lower()
+        score = sum(1 for w in query_words if w in chunk)
+        if score > best_score:
+            best_score = score
+            best_idx = i
+    excerpt = text[best_idx: best_idx + max_chars].strip()
+    return excerpt if best_score > 0 else ""
+
+
+def scorer_best(text: str, query_words: set, window: int = 600, max_chars: int = 1200) -> str:
+    passages = PassageScorer(text).top_passages(query_words, window=window, max_chars=max_chars)
+    return passages[0].text if passages and passages[0].score > 0 else ""
+
+
+def synthetic_page(target_chars: int, seed: int = 7) -> str:
+    """Federal Register-sized plain text assembled from the embedded statute corpus."""
+    rng = random.Random(seed)
+    paragraphs = [entry[4] for entry in _STATUTE_MAP]
+    for _pattern, state_map, _label, _url in _STATE_TOPIC_MAP:
+        paragraphs.extend(entry[0] for entry in state_map.values())
+    filler = (
+        "The agency received comments on the proposed rule and responds to them below. "
+        "Paperwork Reduction Act burden estimates are provided in the regulatory impact analysis. "
+    )
+    parts = []
+    size = 0
+    while size < target_chars:
+        part = rng.choice(paragraphs) if rng.random() < 0.3 else filler * rng.randint(1, 6)
+        parts.append(part)
+        size += len(part) + 1
+    return " ".join(parts)[:target_chars]
+
+
+def timed(fn, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        pages = []
+        for path in sys.argv[1:]:
+            html = Path(path).read_text(encoding="utf-8", errors="replace")
+            text = re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", html)).strip()
+            pages.append((Path(path).name, text))
+    else:
+        pages = [(f"synthetic {n // 1000} KB", synthetic_page(n)) for n in (200_000, 1_000_000, 4_000_000)]
+
+    print(f"{'page':<24}{'query':<10}{'legacy ms':>12}{'scorer ms':>12}{'speedup':>10}  same")
+    for name, text in pages:
+        for qi, query in enumerate(QUERIES, start=1):
+            words = set(re.findall(r"\w+", query.lower())) - STOPWORDS
+            same = legacy_best(text, words) == scorer_best(text, words)
+            legacy = timed(legacy_best, text, words)
+            scorer = timed(scorer_best, text, words)
+            print(
+                f"{name:<24}{'q' + str(qi):<10}{legacy * 1000:>12.1f}{scorer * 1000:>12.1f}"
+                f"{legacy / scorer:>9.1f}x  {'yes' if same else 'NO'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
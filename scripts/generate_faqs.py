@@ -8,8 +8,8 @@ Requirements:
     pip install httpx
 
 The script reads the questions from frontend/data/faqs.json, calls the Railway
-backend for each one, parses the streamed response (including the SOURCES_DATA
-marker), and writes the answers back to the same file.
+backend for each one, reads the NDJSON event stream (sources, answer tokens,
+done/error), and writes the answers back to the same file.
 
 Set BACKEND_URL below to your Railway URL before running.
 """
@@ -39,30 +39,29 @@ def call_backend(question: str, jurisdiction: str) -> tuple[str, list]:
     url = f"{BACKEND_URL}/api/chat/stream"
     payload = {"question": question, "country": jurisdiction}
 
-    full = ""
+    tokens: list[str] = []
+    sources: list = []
     try:
         with httpx.Client(timeout=TIMEOUT) as client:
-            with client.stream("POST", url, json=payload) as r:
+            with client.stream("POST", url, json=payload, params={"format": "ndjson"}) as r:
                 r.raise_for_status()
-                for chunk in r.iter_text():
-                    full += chunk
+                # One JSON event per line; progress events are ignored here
+                for line in r.iter_lines():
+                    if not line.strip():
+                        continue
+                    event = json.loads(line)
+                    if event["type"] == "sources":
+                        sources = event["sources"]
+                    elif event["type"] == "token":
+                        tokens.append(event["text"])
+                    elif event["type"] == "error":
+                        print(f"    ERROR: {event['message']}")
+                        return "", []
     except Exception as exc:
         print(f"    ERROR: {exc}")
         return "", []
 
-    # Split off the SOURCES_DATA marker appended by rag.py
-    sources: list = []
-    marker = "\n\nSOURCES_DATA:"
-    if marker in full:
-        text_part, sources_part = full.split(marker, 1)
-        try:
-            sources = json.loads(sources_part.strip())
-        except json.JSONDecodeError:
-            pass
-        full = text_part.strip()
-    else:
-        full = full.strip()
-
+    full = "".join(tokens).strip()
     return full, sources
 
 